@@ -0,0 +1,105 @@
+"""
+Buffered page-view counting.
+
+Every blog page view used to cost a synchronous UPDATE, written from a stale
+in-memory value so concurrent readers lost increments. Views are now counted
+in memory per process and flushed every VIEW_COUNT_FLUSH_INTERVAL seconds as
+batched F() updates in one transaction, which are atomic in the database and
+therefore lossless across processes. Blogs with the same pending count share
+one UPDATE, and the trending rollups for views are bumped in the same flush.
+
+Pending counts are flushed at interpreter exit. A failed flush puts its
+counts back so they are retried on the next one.
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+
+class ViewCountBuffer:
+    def __init__(self, interval=5):
+        self.interval = interval
+        self._counts = Counter()  # (blog id, hour) -> pending views
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def increment(self, blog_id, count=1):
+        """Count views of a blog; they reach the database on the next flush."""
+        from recommendations.trending import current_hour
+
+        with self._lock:
+            # Before counting: after a fork this discards the parent's counts
+            self._ensure_flusher()
+            self._counts[blog_id, current_hour()] += count
+
+    def flush(self):
+        """Write pending counts to the database. Returns the number of views written."""
+        from recommendations.trending import record_event
+        from .models import Blog
+
+        with self._flush_lock:
+            with self._lock:
+                counts, self._counts = self._counts, Counter()
+            if not counts:
+                return 0
+
+            per_blog = Counter()
+            for (blog_id, _), n in counts.items():
+                per_blog[blog_id] += n
+            by_count = defaultdict(list)
+            for blog_id, n in per_blog.items():
+                by_count[n].append(blog_id)
+
+            try:
+                with transaction.atomic():
+                    for n, blog_ids in by_count.items():
+                        Blog.objects.filter(pk__in=blog_ids).update(views_count=F('views_count') + n)
+                    for (blog_id, hour), n in counts.items():
+                        record_event(blog_id, 'view', hour=hour, count=n)
+            except Exception:
+                # Keep the views for the next attempt
+                with self._lock:
+                    self._counts.update(counts)
+                raise
+            return sum(per_blog.values())
+
+    def _ensure_flusher(self):
+        """Start the flush thread in this process (again after a fork)."""
+        if self._pid == os.getpid():
+            return
+        if self._pid is not None:
+            # Counts inherited from the parent are the parent's to flush
+            self._counts.clear()
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='view-count-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self._flush_at_exit)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                pass
+            finally:
+                connection.close()
+
+    def _flush_at_exit(self):
+        if self._pid == os.getpid():
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+
+view_counts = ViewCountBuffer(getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 5))
@@ -0,0 +1,300 @@
+from contextlib import contextmanager
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from blog.models import Blog, Bookmark, Category, Comment, Like, Tag
+from blog.services import INTERACTION_RATINGS
+from recommendations.engine import get_recommendation_engine
+from recommendations.models import UserInteraction, UserItemAggregate
+from recommendations.popularity import refresh_popularity
+from recommendations.snapshot import InteractionSnapshot
+from recommendations.synthetic import (
+    INTERACTION_MIX, synthetic_pairs, synthetic_texts, synthetic_words, zipf_choice
+)
+from recommendations.trending import backfill_rollups
+
+User = get_user_model()
+
+COMMENTS = [
+    "Great article! Very informative.",
+    "Thanks for sharing this!",
+    "I learned something new today.",
+    "Well written and easy to understand.",
+    "Looking forward to more content like this!",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a large synthetic dataset with bulk inserts: users, posts, tags and '
+        'skewed interactions, reproducible from a seed'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Users to create (default: 1000)')
+        parser.add_argument('--posts', type=int, default=5000, help='Posts to create (default: 5000)')
+        parser.add_argument('--tags', type=int, default=200, help='Tags to create (default: 200)')
+        parser.add_argument(
+            '--categories', type=int, default=20, help='Categories to create (default: 20)'
+        )
+        parser.add_argument(
+            '--interactions', type=int, default=100000, help='Interactions to create (default: 100000)'
+        )
+        parser.add_argument(
+            '--item-skew',
+            type=float,
+            default=1.0,
+            help='Zipf exponent of post popularity; 0 is uniform (default: 1.0)'
+        )
+        parser.add_argument(
+            '--user-skew',
+            type=float,
+            default=1.0,
+            help='Zipf exponent of user activity; 0 is uniform (default: 1.0)'
+        )
+        parser.add_argument('--words', type=int, default=200, help='Mean words per post (default: 200)')
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=90,
+            help=(
+                'Posts are published at random over this many past days, and interact '
+                'with between publication and now (default: 90)'
+            )
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000, help='Rows per bulk insert (default: 5000)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed; the same seed generates the same data (default: 0)'
+        )
+        parser.add_argument(
+            '--prefix',
+            default='synthetic',
+            help='Prefix of generated usernames, slugs and names, so runs can coexist (default: synthetic)'
+        )
+        parser.add_argument(
+            '--skip-index',
+            action='store_true',
+            help='Do not rebuild the recommendation indices afterwards'
+        )
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}-').exists():
+            raise CommandError(f"Users prefixed '{prefix}-' already exist; choose another --prefix")
+
+        self.rng = np.random.default_rng(options['seed'])
+        self.batch_size = options['batch_size']
+        now = timezone.now()
+
+        category_ids = self._create(Category, (
+            Category(name=f'{prefix} category {i}', slug=f'{prefix}-category-{i}')
+            for i in range(options['categories'])
+        ), return_pks=True)
+        tag_ids = self._create(Tag, (
+            Tag(name=f'{prefix}-tag-{i}', slug=f'{prefix}-tag-{i}') for i in range(options['tags'])
+        ), return_pks=True)
+
+        password = make_password('password123')  # Hashed once; hashing per user would dominate
+        user_ids = self._create(User, (
+            User(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password=password)
+            for i in range(options['users'])
+        ), total=options['users'], return_pks=True)
+
+        # Interactions are drawn before posts exist, so view counts can be stored with them
+        user_rows, post_rows = synthetic_pairs(
+            self.rng, options['users'], options['posts'], options['interactions'],
+            options['item_skew'], options['user_skew']
+        )
+        types = list(INTERACTION_MIX)
+        type_rows = self.rng.choice(len(types), size=options['interactions'], p=list(INTERACTION_MIX.values()))
+        views = np.bincount(
+            post_rows[type_rows == types.index('view')], minlength=options['posts']
+        ).tolist()
+
+        # Seconds before now: posts are published within --days and interacted
+        # with after publication. Interactions are stored oldest first, so ids
+        # follow time as they do for real traffic.
+        published_ago = self.rng.random(options['posts']) * options['days'] * 86400
+        ago = published_ago[post_rows] * self.rng.random(options['interactions'])
+        order = np.argsort(-ago, kind='stable')
+        user_rows, post_rows, type_rows, ago = (
+            user_rows[order], post_rows[order], type_rows[order], ago[order]
+        )
+
+        post_ids = self._create_posts(
+            options, user_ids, category_ids, tag_ids, views,
+            [now - timedelta(seconds=seconds) for seconds in published_ago.tolist()]
+        )
+
+        with _stored_timestamps(UserInteraction):
+            self._create(UserInteraction, (
+                UserInteraction(
+                    user_id=user_ids[user_row], blog_id=post_ids[post_row],
+                    interaction_type=types[type_row], rating=INTERACTION_RATINGS.get(types[type_row], 1.0),
+                    created_at=now - timedelta(seconds=seconds)
+                )
+                for user_row, post_row, type_row, seconds in zip(
+                    user_rows.tolist(), post_rows.tolist(), type_rows.tolist(), ago.tolist()
+                )
+            ), total=options['interactions'])
+        self._create_engagement(types, user_ids, post_ids, user_rows, post_rows, type_rows, ago, now)
+        self._create_aggregates(types, user_ids, post_ids, user_rows, post_rows, type_rows, ago, now)
+
+        self.stdout.write('Refreshing popularity and trending rollups...')
+        refresh_popularity()
+        backfill_rollups()
+
+        if not options['skip_index']:
+            self.stdout.write('Building recommendation index...')
+            InteractionSnapshot().append(settle=0)
+            get_recommendation_engine().rebuild_indices()
+
+        self.stdout.write(self.style.SUCCESS('Synthetic data generated successfully!'))
+
+    def _create(self, model, objects, total=None, return_pks=False):
+        """
+        bulk_create objects in batches, reporting progress. Returns the number
+        of rows, or their primary keys if return_pks.
+        """
+        objects = iter(objects)
+        created, pks = 0, []
+        while True:
+            batch = [obj for _, obj in zip(range(self.batch_size), objects)]
+            if not batch:
+                break
+            with transaction.atomic():
+                batch = model.objects.bulk_create(batch)
+            created += len(batch)
+            if return_pks:
+                pks.extend(obj.pk for obj in batch)
+            if total:
+                self.stdout.write(f'  {model.__name__}: {created}/{total}')
+        if not total:
+            self.stdout.write(f'  {model.__name__}: {created}')
+        return pks if return_pks else created
+
+    def _create_posts(self, options, user_ids, category_ids, tag_ids, views, published):
+        prefix = options['prefix']
+        words = synthetic_words(20000)
+        n_posts = options['posts']
+        # A few prolific authors write most posts
+        authors = zipf_choice(self.rng, len(user_ids), n_posts, 1.0).tolist()
+
+        post_ids = []
+        for start in range(0, n_posts, self.batch_size):
+            count = min(self.batch_size, n_posts - start)
+            texts = synthetic_texts(self.rng, words, count, options['words'])
+            titles = synthetic_texts(self.rng, words, count, 5)
+            category_rows = self.rng.integers(len(category_ids), size=count).tolist() if category_ids else None
+            # Up to three distinct tags per post, popular tags more often
+            tag_rows = zipf_choice(self.rng, len(tag_ids), (count, 3), 1.0).tolist() if tag_ids else None
+            posts = [
+                Blog(
+                    title=titles[i][:200],
+                    slug=f'{prefix}-post-{start + i}',
+                    author_id=user_ids[authors[start + i]],
+                    content=texts[i],
+                    excerpt=texts[i][:497] + '...' if len(texts[i]) > 500 else texts[i],
+                    category_id=category_ids[category_rows[i]] if category_ids else None,
+                    status='published',
+                    views_count=views[start + i],
+                    published_at=published[start + i],
+                    created_at=published[start + i],
+                    updated_at=published[start + i],
+                )
+                for i in range(count)
+            ]
+            with transaction.atomic(), _stored_timestamps(Blog):
+                posts = Blog.objects.bulk_create(posts)
+                if tag_ids:
+                    Blog.tags.through.objects.bulk_create([
+                        Blog.tags.through(blog_id=post.pk, tag_id=tag_ids[tag_row])
+                        for post, post_tag_rows in zip(posts, tag_rows)
+                        for tag_row in set(post_tag_rows)
+                    ])
+            post_ids.extend(post.pk for post in posts)
+            self.stdout.write(f'  Blog: {len(post_ids)}/{n_posts}')
+        return post_ids
+
+    def _create_engagement(self, types, user_ids, post_ids, user_rows, post_rows, type_rows, ago, now):
+        """Likes, bookmarks and comments matching the generated interactions, dated alike."""
+        n_posts = len(post_ids)
+        for model, name in ((Like, 'like'), (Bookmark, 'bookmark')):
+            # One row per (user, post), as the tables are unique on the pair,
+            # dated by the pair's first such interaction (they are oldest first)
+            matching = type_rows == types.index(name)
+            pairs, first = np.unique(
+                user_rows[matching] * n_posts + post_rows[matching], return_index=True
+            )
+            with _stored_timestamps(model):
+                self._create(model, (
+                    model(
+                        user_id=user_ids[pair // n_posts], blog_id=post_ids[pair % n_posts],
+                        created_at=now - timedelta(seconds=seconds)
+                    )
+                    for pair, seconds in zip(pairs.tolist(), ago[matching][first].tolist())
+                ), total=len(pairs))
+
+        commented = type_rows == types.index('comment')
+        texts = self.rng.integers(len(COMMENTS), size=int(commented.sum()))
+        with _stored_timestamps(Comment):
+            self._create(Comment, (
+                Comment(
+                    author_id=user_ids[user_row], blog_id=post_ids[post_row], content=COMMENTS[text],
+                    created_at=now - timedelta(seconds=seconds), updated_at=now - timedelta(seconds=seconds)
+                )
+                for user_row, post_row, text, seconds in zip(
+                    user_rows[commented].tolist(), post_rows[commented].tolist(), texts.tolist(),
+                    ago[commented].tolist()
+                )
+            ), total=len(texts))
+
+    def _create_aggregates(self, types, user_ids, post_ids, user_rows, post_rows, type_rows, ago, now):
+        """Per-(user, post) aggregates; every pair is new, since the users are."""
+        ratings = np.array([INTERACTION_RATINGS.get(name, 1.0) for name in types])[type_rows]
+        pairs, inverse = np.unique(
+            user_rows * len(post_ids) + post_rows, return_inverse=True
+        )
+        max_ratings = np.zeros(len(pairs))
+        np.maximum.at(max_ratings, inverse, ratings)
+        counts = np.bincount(inverse, minlength=len(pairs))
+        last_ago = np.full(len(pairs), np.inf)
+        np.minimum.at(last_ago, inverse, ago)
+
+        self._create(UserItemAggregate, (
+            UserItemAggregate(
+                user_id=user_ids[pair // len(post_ids)], blog_id=post_ids[pair % len(post_ids)],
+                max_rating=max_rating, interaction_count=count,
+                last_seen=now - timedelta(seconds=seconds)
+            )
+            for pair, max_rating, count, seconds in zip(
+                pairs.tolist(), max_ratings.tolist(), counts.tolist(), last_ago.tolist()
+            )
+        ), total=len(pairs))
+
+
+@contextmanager
+def _stored_timestamps(model):
+    """Make bulk_create keep the auto_now(_add) field values given instead of stamping now."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
@@ -4,6 +4,10 @@ from django.utils import timezone
 from blog.models import Category, Tag, Blog, Like, Comment
 from recommendations.models import UserInteraction
 from recommendations.engine import get_recommendation_engine
+from recommendations.aggregates import rebuild_aggregates
+from recommendations.popularity import refresh_popularity
+from recommendations.snapshot import InteractionSnapshot
+from recommendations.trending import backfill_rollups
 import random
 
 User = get_user_model()
@@ -286,8 +290,12 @@ Documentation matters. Document your setup, runbooks for common issues, and arch
 
         # Build recommendation index
         self.stdout.write('Building recommendation index...')
+        rebuild_aggregates()
+        InteractionSnapshot().append(settle=0)
         engine = get_recommendation_engine()
         engine.rebuild_indices()
+        refresh_popularity()
+        backfill_rollups()
 
         self.stdout.write(self.style.SUCCESS('Database seeded successfully!'))
         self.stdout.write(f'  Categories: {Category.objects.count()}')
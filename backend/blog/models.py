@@ -1,38 +1,63 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.utils.text import slugify
 
 
+def count_related(model):
+    """Correlated subquery counting a related model's rows per blog (0 if none)."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(blog=OuterRef('pk')).order_by().values('blog')
+            .annotate(n=Count('pk')).values('n'),
+            output_field=models.IntegerField()
+        ),
+        Value(0)
+    )
+
+
+def with_counts(queryset):
+    """
+    Annotate likes_count and comments_count with subqueries, so serializers
+    never load engagement rows just to count them.
+    """
+    return queryset.annotate(
+        likes_count=count_related(Like),
+        comments_count=count_related(Comment)
+    )
+
+
 class BlogManager(models.Manager):
     """Custom manager for Blog model with optimized queries."""
 
     def with_relations(self):
-        """Return queryset with all related objects prefetched."""
-        return self.select_related(
+        """Return queryset with related objects and engagement counts."""
+        return with_counts(self.select_related(
             'author', 'category'
         ).prefetch_related(
-            'tags', 'likes', 'comments', 'bookmarks'
-        )
+            'tags'
+        ))
 
     def with_detail_relations(self):
         """Return queryset with relations needed for detail view."""
-        return self.select_related(
+        return with_counts(self.select_related(
             'author', 'category'
         ).prefetch_related(
-            'tags', 'likes', 'comments__author', 'bookmarks'
-        )
+            'tags', 'comments__author'
+        ))
 
     def published(self):
         """Return only published blogs."""
         return self.filter(status='published')
 
     def published_with_relations(self):
-        """Return published blogs with all relations."""
-        return self.published().select_related(
+        """Return published blogs with related objects and engagement counts."""
+        return with_counts(self.published().select_related(
             'author', 'category'
         ).prefetch_related(
-            'tags', 'likes', 'comments', 'bookmarks'
-        )
+            'tags'
+        ))
 
 
 class Category(models.Model):
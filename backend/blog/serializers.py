@@ -1,3 +1,4 @@
+from django.db import models
 from rest_framework import serializers
 from .models import Category, Tag, Blog, Comment, Like, Bookmark
 from accounts.serializers import UserSerializer
@@ -32,6 +33,31 @@ class CommentSerializer(serializers.ModelSerializer):
         return []
 
 
+def resolve_user_engagement(context, blog_ids):
+    """
+    Look up which of blog_ids the requesting user liked and bookmarked, once for
+    a whole page, and store the id sets in the serializer context.
+    """
+    request = context.get('request')
+    if not (request and request.user.is_authenticated):
+        return
+    context['liked_blog_ids'] = set(
+        Like.objects.filter(user=request.user, blog_id__in=blog_ids).values_list('blog_id', flat=True)
+    )
+    context['bookmarked_blog_ids'] = set(
+        Bookmark.objects.filter(user=request.user, blog_id__in=blog_ids).values_list('blog_id', flat=True)
+    )
+
+
+class BlogPageSerializer(serializers.ListSerializer):
+    """Serializes a page of blogs with the user's likes and bookmarks resolved up front."""
+
+    def to_representation(self, data):
+        blogs = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        resolve_user_engagement(self.context, [blog.pk for blog in blogs])
+        return super().to_representation(blogs)
+
+
 class BlogListSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
@@ -48,22 +74,32 @@ class BlogListSerializer(serializers.ModelSerializer):
             'category', 'tags', 'status', 'views_count', 'likes_count',
             'comments_count', 'is_liked', 'is_bookmarked', 'created_at', 'published_at'
         ]
+        list_serializer_class = BlogPageSerializer
 
     def get_likes_count(self, obj):
+        # Annotated by the Blog manager's *_relations() querysets
+        if hasattr(obj, 'likes_count'):
+            return obj.likes_count
         return obj.likes.count()
 
     def get_comments_count(self, obj):
+        if hasattr(obj, 'comments_count'):
+            return obj.comments_count
         return obj.comments.count()
 
     def get_is_liked(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if 'liked_blog_ids' in self.context:
+                return obj.pk in self.context['liked_blog_ids']
             return obj.likes.filter(user=request.user).exists()
         return False
 
     def get_is_bookmarked(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if 'bookmarked_blog_ids' in self.context:
+                return obj.pk in self.context['bookmarked_blog_ids']
             return obj.bookmarks.filter(user=request.user).exists()
         return False
 
@@ -115,6 +151,15 @@ class LikeSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'created_at']
 
 
+class BookmarkPageSerializer(serializers.ListSerializer):
+    """Serializes a page of bookmarks with the user's likes and bookmarks resolved up front."""
+
+    def to_representation(self, data):
+        bookmarks = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        resolve_user_engagement(self.context, [bookmark.blog_id for bookmark in bookmarks])
+        return super().to_representation(bookmarks)
+
+
 class BookmarkSerializer(serializers.ModelSerializer):
     blog = BlogListSerializer(read_only=True)
 
@@ -122,3 +167,4 @@ class BookmarkSerializer(serializers.ModelSerializer):
         model = Bookmark
         fields = ['id', 'blog', 'created_at']
         read_only_fields = ['created_at']
+        list_serializer_class = BookmarkPageSerializer
@@ -1,7 +1,11 @@
 """
 Blog service layer for business logic and helper functions.
 """
-from recommendations.models import UserInteraction
+from recommendations.engine import get_recommendation_engine
+from recommendations.ingest import interaction_writer
+from recommendations.jobs import maybe_schedule_rebuild
+from recommendations.popularity import record_engagement
+from .counters import view_counts
 
 
 # Interaction rating constants
@@ -22,17 +26,53 @@ def track_user_interaction(user, blog, interaction_type):
         blog: The blog being interacted with
         interaction_type: One of 'view', 'comment', 'like', 'bookmark'
 
+    The UserInteraction row is written in the background by the ingestion
+    pipeline (see recommendations/ingest.py), which bumps the blog's
+    popularity and trending counters in the same batch and invalidates the
+    user's cached vector and recommendations once it is stored.
+
     Returns:
-        The created UserInteraction instance
+        True if the interaction was queued, False if it was skipped (anonymous
+        user, or a repeat view collapsed into an earlier one)
     """
     if not user or not user.is_authenticated:
-        return None
+        return False
 
     rating = INTERACTION_RATINGS.get(interaction_type, 1.0)
+    return interaction_writer.submit(user.id, blog.id, interaction_type, rating)
+
+
+def record_blog_view(blog):
+    """
+    Count a page view of a blog, from any visitor.
+
+    The view is buffered in memory and flushed in batches to views_count and
+    the trending rollups (see counters.py).
+    """
+    view_counts.increment(blog.id)
+
+
+def untrack_engagement(blog, interaction_type):
+    """Take back the popularity a removed like or bookmark contributed."""
+    record_engagement(blog.id, interaction_type, delta=-1)
+
+
+def sync_blog_recommendations(blog):
+    """
+    Reflect a saved blog in the live content index.
+
+    Publishing or editing adds/replaces the post's vector, unpublishing removes
+    it, so changes are recommendable without waiting for a full rebuild. The
+    change is logged for other workers to replay; only rebuilds save the index.
+    """
+    engine = get_recommendation_engine()
+    engine.upsert_blog(blog)
+    engine.record_blog_change(blog.id)
+    maybe_schedule_rebuild()
+
 
-    return UserInteraction.objects.create(
-        user=user,
-        blog=blog,
-        interaction_type=interaction_type,
-        rating=rating
-    )
+def remove_blog_recommendations(blog_id):
+    """Remove a deleted blog from the live recommendation indexes."""
+    engine = get_recommendation_engine()
+    engine.remove_blog(blog_id)
+    engine.record_blog_change(blog_id)
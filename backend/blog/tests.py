@@ -1,3 +1,140 @@
+import io
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from recommendations.models import EngagementRollup, UserInteraction, UserItemAggregate
+from .counters import ViewCountBuffer
+from .models import Blog, Bookmark, Category, Comment, Like, Tag
+
+
+class ListQueryCountTests(TestCase):
+    """Listing endpoints run a fixed number of queries however many blogs a page holds."""
+
+    def setUp(self):
+        self.reader = get_user_model().objects.create_user(username='reader', password='x')
+        self.category = Category.objects.create(name='Python')
+        self.tags = [Tag.objects.create(name='django'), Tag.objects.create(name='faiss')]
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def add_blogs(self, n):
+        for _ in range(n):
+            author = get_user_model().objects.create_user(
+                username=f'author{Blog.objects.count()}', password='x'
+            )
+            blog = Blog.objects.create(
+                title=f'Post {Blog.objects.count()}', author=author, content='text',
+                category=self.category, status='published'
+            )
+            blog.tags.set(self.tags)
+            Like.objects.create(blog=blog, user=self.reader)
+            Bookmark.objects.create(blog=blog, user=self.reader)
+            Comment.objects.create(blog=blog, author=author, content='first')
+
+    def assertConstantQueries(self, url):
+        self.add_blogs(2)
+        with CaptureQueriesContext(connection) as queries:
+            small = self.client.get(url)
+        self.add_blogs(5)
+        with self.assertNumQueries(len(queries)):
+            large = self.client.get(url)
+        self.assertEqual(len(self.results(large)), len(self.results(small)) + 5)
+        return self.results(large)
+
+    def results(self, response):
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return data['results'] if isinstance(data, dict) else data
+
+    def test_blog_list(self):
+        blogs = self.assertConstantQueries(reverse('blog-list'))
+        self.assertTrue(all(blog['is_liked'] and blog['is_bookmarked'] for blog in blogs))
+        self.assertTrue(all(blog['likes_count'] == 1 and blog['comments_count'] == 1 for blog in blogs))
+
+    def test_bookmarks(self):
+        bookmarks = self.assertConstantQueries(reverse('user-bookmarks'))
+        self.assertTrue(all(bookmark['blog']['is_liked'] for bookmark in bookmarks))
+
+    def test_trending(self):
+        blogs = self.assertConstantQueries(reverse('trending') + '?limit=20')
+        self.assertTrue(all(len(blog['tags']) == 2 for blog in blogs))
+
+
+class ViewCountBufferTests(TestCase):
+    def setUp(self):
+        author = get_user_model().objects.create_user(username='author', password='x')
+        self.blogs = [
+            Blog.objects.create(title=f'Post {i}', author=author, content='text', status='published')
+            for i in range(3)
+        ]
+        self.buffer = ViewCountBuffer(interval=3600)
+
+    def views(self):
+        return [blog.views_count for blog in Blog.objects.order_by('pk')]
+
+    def test_flush_writes_counts_and_rollups(self):
+        for blog, n in zip(self.blogs, (2, 2, 5)):
+            self.buffer.increment(blog.pk, n)
+        self.assertEqual(self.views(), [0, 0, 0])
+
+        self.assertEqual(self.buffer.flush(), 9)
+        self.assertEqual(self.views(), [2, 2, 5])
+        self.assertEqual(
+            sorted(EngagementRollup.objects.values_list('blog_id', 'views')),
+            [(self.blogs[0].pk, 2), (self.blogs[1].pk, 2), (self.blogs[2].pk, 5)]
+        )
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_failed_flush_is_retried(self):
+        self.buffer.increment(self.blogs[0].pk, 3)
+        with mock.patch('recommendations.trending.record_event', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.buffer.flush()
+        # Rolled back, and still pending
+        self.assertEqual(self.views(), [0, 0, 0])
+
+        self.buffer.increment(self.blogs[0].pk)
+        self.assertEqual(self.buffer.flush(), 4)
+        self.assertEqual(self.views(), [4, 0, 0])
+        self.assertEqual(EngagementRollup.objects.get().views, 4)
+
+
+class GenerateDataTests(TestCase):
+    def generate(self, prefix):
+        call_command(
+            'generate_data', users=20, posts=30, tags=5, categories=3, interactions=400, words=20,
+            days=10, prefix=prefix, skip_index=True, stdout=io.StringIO()
+        )
+        interactions = UserInteraction.objects.filter(user__username__startswith=f'{prefix}-')
+        return list(interactions.order_by('pk').values_list(
+            'user__username', 'blog__slug', 'interaction_type', 'rating'
+        ))
+
+    def test_seeded_runs_match(self):
+        first = self.generate('first')
+        second = self.generate('second')
+        self.assertEqual(len(first), 400)
+        self.assertEqual(
+            [(user[6:], blog[6:], *rest) for user, blog, *rest in first],
+            [(user[7:], blog[7:], *rest) for user, blog, *rest in second]
+        )
 
-# Create your tests here.
+    def test_derived_rows_match_the_interactions(self):
+        interactions = self.generate('synthetic')
+        self.assertEqual(Blog.objects.count(), 30)
+        self.assertEqual(
+            UserItemAggregate.objects.count(), len({(user, blog) for user, blog, *_ in interactions})
+        )
+        self.assertEqual(
+            Like.objects.count(),
+            len({(user, blog) for user, blog, kind, _ in interactions if kind == 'like'})
+        )
+        views = sum(1 for *_, kind, _ in interactions if kind == 'view')
+        self.assertEqual(sum(Blog.objects.values_list('views_count', flat=True)), views)
@@ -2,6 +2,7 @@ from rest_framework import generics, status, filters
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
@@ -11,7 +12,10 @@ from .serializers import (
     BlogDetailSerializer, BlogCreateUpdateSerializer,
     CommentSerializer, BookmarkSerializer
 )
-from .services import track_user_interaction
+from .services import (
+    track_user_interaction, record_blog_view, untrack_engagement,
+    sync_blog_recommendations, remove_blog_recommendations
+)
 from .permissions import IsAuthorOrReadOnly
 
 
@@ -65,6 +69,7 @@ class BlogListView(generics.ListCreateAPIView):
         if blog.status == 'published':
             blog.published_at = timezone.now()
             blog.save()
+            sync_blog_recommendations(blog)
 
 
 class BlogDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -79,8 +84,8 @@ class BlogDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        # Increment view count
-        Blog.objects.filter(pk=instance.pk).update(views_count=instance.views_count + 1)
+        # Increment view count (buffered, flushed in batches)
+        record_blog_view(instance)
 
         # Track user interaction
         track_user_interaction(request.user, instance, 'view')
@@ -93,6 +98,12 @@ class BlogDetailView(generics.RetrieveUpdateDestroyAPIView):
         if blog.status == 'published' and not blog.published_at:
             blog.published_at = timezone.now()
             blog.save()
+        sync_blog_recommendations(blog)
+
+    def perform_destroy(self, instance):
+        blog_id = instance.id
+        instance.delete()
+        remove_blog_recommendations(blog_id)
 
 
 class UserBlogsView(generics.ListAPIView):
@@ -100,7 +111,7 @@ class UserBlogsView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Blog.objects.filter(author=self.request.user)
+        return Blog.objects.with_relations().filter(author=self.request.user)
 
 
 class CommentListCreateView(generics.ListCreateAPIView):
@@ -141,6 +152,7 @@ class LikeToggleView(APIView):
             return Response({'liked': True, 'likes_count': blog.likes.count()})
         else:
             like.delete()
+            untrack_engagement(blog, 'like')
             return Response({'liked': False, 'likes_count': blog.likes.count()})
 
 
@@ -156,6 +168,7 @@ class BookmarkToggleView(APIView):
             return Response({'bookmarked': True})
         else:
             bookmark.delete()
+            untrack_engagement(blog, 'bookmark')
             return Response({'bookmarked': False})
 
 
@@ -164,4 +177,6 @@ class UserBookmarksView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Bookmark.objects.filter(user=self.request.user)
+        return Bookmark.objects.filter(user=self.request.user).prefetch_related(
+            Prefetch('blog', queryset=Blog.objects.with_relations())
+        )
@@ -110,3 +110,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
 }
+
+# Seconds between flushes of buffered blog view counts (see blog/counters.py)
+VIEW_COUNT_FLUSH_INTERVAL = 5
+
+# Recommendation engine settings (see recommendations/conf.py for defaults)
+RECOMMENDATIONS = {}
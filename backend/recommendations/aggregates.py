@@ -0,0 +1,114 @@
+"""
+Per-(user, blog) aggregates of the interaction log.
+
+The collaborative model only needs the maximum rating per user and blog, so
+UserItemAggregate keeps exactly that (plus an interaction count and when the
+pair was last seen). The ingestion writer folds every batch into it in the
+same transaction that stores the raw rows; rebuilds and fold-ins read the
+aggregate, whose size grows with distinct pairs rather than total events.
+
+Raw UserInteraction rows are then only needed for recent-activity queries and
+can be pruned past INTERACTION_RETENTION_DAYS with prune_interactions(). When
+training reads the interaction snapshot, rows not yet copied into it are kept.
+"""
+
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .conf import get_setting
+from .models import UserInteraction, UserItemAggregate
+from .snapshot import InteractionSnapshot
+
+
+def record_interactions(events):
+    """
+    Fold (user_id, blog_id, interaction_type, rating) events into the aggregates.
+
+    Existing rows are locked and merged, new pairs are inserted. If another
+    writer inserts one of the new pairs first, the merge is retried.
+    """
+    merged = {}
+    for user_id, blog_id, _, rating in events:
+        max_rating, count = merged.get((user_id, blog_id), (rating, 0))
+        merged[user_id, blog_id] = (max(max_rating, rating), count + 1)
+    if not merged:
+        return
+
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                _merge(merged)
+            return
+        except IntegrityError:
+            if attempt:
+                raise
+
+
+def _merge(merged):
+    now = timezone.now()
+    user_ids = {user_id for user_id, _ in merged}
+    blog_ids = {blog_id for _, blog_id in merged}
+    existing = {
+        (row.user_id, row.blog_id): row
+        for row in UserItemAggregate.objects.select_for_update().filter(
+            user_id__in=user_ids, blog_id__in=blog_ids
+        )
+        if (row.user_id, row.blog_id) in merged
+    }
+
+    created = []
+    for (user_id, blog_id), (max_rating, count) in merged.items():
+        row = existing.get((user_id, blog_id))
+        if row is None:
+            created.append(UserItemAggregate(
+                user_id=user_id, blog_id=blog_id, max_rating=max_rating,
+                interaction_count=count, last_seen=now
+            ))
+        else:
+            row.max_rating = max(row.max_rating, max_rating)
+            row.interaction_count += count
+            row.last_seen = now
+
+    UserItemAggregate.objects.bulk_update(
+        existing.values(), ['max_rating', 'interaction_count', 'last_seen'], batch_size=500
+    )
+    UserItemAggregate.objects.bulk_create(created, batch_size=500)
+
+
+def rebuild_aggregates():
+    """
+    Recompute every aggregate from the raw log. Pairs whose raw rows were
+    already pruned are lost, so run this before the first prune. Returns rows written.
+    """
+    pairs = UserInteraction.objects.order_by().values('user_id', 'blog_id').annotate(
+        max_rating=Max('rating'), interaction_count=Count('id'), last_seen=Max('created_at')
+    )
+    rows = [UserItemAggregate(**pair) for pair in pairs.iterator()]
+    with transaction.atomic():
+        UserItemAggregate.objects.all().delete()
+        UserItemAggregate.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def prune_interactions(days=None, chunk_size=10000):
+    """
+    Delete raw interactions older than days (default INTERACTION_RETENTION_DAYS),
+    chunk by chunk to keep write transactions short. Returns rows deleted.
+    """
+    days = get_setting('INTERACTION_RETENTION_DAYS') if days is None else days
+    expired = UserInteraction.objects.filter(created_at__lt=timezone.now() - timedelta(days=days))
+    if get_setting('TRAINING_SOURCE') == 'snapshot':
+        expired = expired.filter(id__lte=InteractionSnapshot().watermark)
+
+    deleted = 0
+    while True:
+        ids = list(
+            expired.order_by()
+            .values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return deleted
+        deleted += UserInteraction.objects.filter(id__in=ids).delete()[0]
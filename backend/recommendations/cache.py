@@ -0,0 +1,87 @@
+"""
+Read-through cache of per-user recommendation lists.
+
+Lists are stored in RecommendationCache rows keyed by user, recommendation
+type and the index version they were computed against. A row is served only
+while it is unexpired, matches the engine's current version and holds at
+least as many recommendations as requested; otherwise the list is computed,
+stored and the user's older rows of that type are replaced.
+
+Rows for a user are dropped as soon as they record a new interaction, and
+evict_stale() clears expired rows and rows left behind by older indexes.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .conf import get_setting
+from .engine import get_recommendation_engine
+from .models import RecommendationCache
+
+
+def get_or_compute(user_id, recommendation_type, n, compute):
+    """
+    Return up to n cached recommendations for a user, computing them on a miss.
+
+    compute(size) is called with the number of recommendations to produce;
+    at least CACHE_LIST_SIZE are stored so smaller later requests also hit.
+    """
+    version = get_recommendation_engine().version or ''
+    cached = RecommendationCache.objects.filter(
+        user_id=user_id,
+        recommendation_type=recommendation_type,
+        index_version=version,
+        list_size__gte=n,
+        expires_at__gt=timezone.now(),
+    ).values_list('recommended_blogs', flat=True).first()
+    if cached is not None:
+        return cached[:n]
+
+    size = max(n, get_setting('CACHE_LIST_SIZE'))
+    recommendations = compute(size)
+    store_recommendations({user_id: recommendations}, recommendation_type, size, version)
+    return recommendations[:n]
+
+
+def store_recommendations(results, recommendation_type, list_size, index_version, ttl=None):
+    """
+    Store {user_id: recommendations} lists, replacing the users' rows of that type.
+
+    ttl is in seconds and defaults to CACHE_TTL.
+    """
+    if ttl is None:
+        ttl = get_setting('CACHE_TTL')
+    expires_at = timezone.now() + timedelta(seconds=ttl)
+
+    with transaction.atomic():
+        RecommendationCache.objects.filter(
+            user_id__in=list(results), recommendation_type=recommendation_type
+        ).delete()
+        RecommendationCache.objects.bulk_create([
+            RecommendationCache(
+                user_id=user_id,
+                recommended_blogs=recommendations,
+                recommendation_type=recommendation_type,
+                index_version=index_version,
+                list_size=list_size,
+                expires_at=expires_at
+            )
+            for user_id, recommendations in results.items()
+        ])
+
+
+def invalidate_users(user_ids):
+    """Drop every cached list for several users at once."""
+    RecommendationCache.objects.filter(user_id__in=list(user_ids)).delete()
+
+
+def evict_stale():
+    """Delete expired rows and rows computed against an index other than the current one."""
+    version = get_recommendation_engine().version or ''
+    deleted, _ = RecommendationCache.objects.filter(
+        Q(expires_at__lte=timezone.now()) | ~Q(index_version=version)
+    ).delete()
+    return deleted
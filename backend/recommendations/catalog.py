@@ -0,0 +1,134 @@
+"""
+Id catalog shared by the content and collaborative indexes.
+
+Faiss addresses vectors by dense row number while the rest of the app talks
+in database ids. An IdCatalog owns that mapping in both directions: an int64
+array for row -> id and a dict for id -> row, so every lookup is O(1).
+
+Rows are never reused. Removing an id leaves a tombstone (-1) in its row so
+vectors already stored in an index stay aligned; adding an id appends a row.
+The ids array may be a read-only memory map; it is copied on first write,
+with spare capacity so further appends are amortized O(1). Bulk lookups use
+a sorted copy of the ids that is only rebuilt once enough ids were added
+since; until then the recent ones are looked up separately.
+"""
+
+import numpy as np
+
+
+MISSING = -1
+
+# Ids added since the sorted lookup was built before it is rebuilt
+MAX_UNSORTED = 1024
+
+
+class IdCatalog:
+    def __init__(self, ids=()):
+        self.ids = np.asanyarray(ids, dtype=np.int64).reshape(-1)
+        self._rows = dict(zip(self.ids.tolist(), range(len(self.ids))))
+        self._rows.pop(MISSING, None)
+        self._sorted = None  # Lazily built (sorted_ids, sorted_rows) for bulk lookups
+        self._unsorted = {}  # Id -> row for ids added since _sorted was built
+        self._buffer = None  # Writable storage behind ids, with room to append
+
+    def __len__(self):
+        """Number of live ids (tombstoned rows are not counted)."""
+        return len(self._rows)
+
+    def __contains__(self, id_):
+        return id_ in self._rows
+
+    @property
+    def size(self):
+        """Number of allocated rows, including tombstones."""
+        return len(self.ids)
+
+    def row(self, id_):
+        """Row for an id, or MISSING if the id is not in the catalog."""
+        return self._rows.get(id_, MISSING)
+
+    def id_at(self, row):
+        """Id stored at a row, or MISSING for tombstones and out-of-range rows."""
+        if 0 <= row < len(self.ids):
+            return int(self.ids[row])
+        return MISSING
+
+    def rows(self, ids):
+        """Vectorized id -> row lookup; unknown ids map to MISSING."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if self._sorted is None or len(self._unsorted) > MAX_UNSORTED:
+            self._sorted = _sorted_lookup(self.ids, np.arange(len(self.ids), dtype=np.int64))
+            self._unsorted = {}
+
+        result = _lookup(self._sorted, ids)
+        # Rows tombstoned since the lookup was built
+        result[self.ids_at(result) != ids] = MISSING
+        if self._unsorted:
+            missing = result == MISSING
+            recent = _sorted_lookup(
+                np.fromiter(self._unsorted, dtype=np.int64, count=len(self._unsorted)),
+                np.fromiter(self._unsorted.values(), dtype=np.int64, count=len(self._unsorted))
+            )
+            result[missing] = _lookup(recent, ids[missing])
+        return result
+
+    def ids_at(self, rows):
+        """Vectorized row -> id lookup; tombstones and invalid rows map to MISSING."""
+        rows = np.asarray(rows, dtype=np.int64)
+        valid = (rows >= 0) & (rows < len(self.ids))
+        result = np.full(rows.shape, MISSING, dtype=np.int64)
+        result[valid] = self.ids[rows[valid]]
+        return result
+
+    def add(self, id_):
+        """Return the row for an id, appending a new row if it is unknown."""
+        row = self._rows.get(id_)
+        if row is None:
+            row = len(self.ids)
+            self._reserve(1)
+            self.ids = self._buffer[:row + 1]
+            self.ids[row] = id_
+            self._rows[id_] = row
+            if self._sorted is not None:
+                self._unsorted[id_] = row
+        return row
+
+    def discard(self, id_):
+        """Tombstone an id's row. Returns the freed row, or MISSING if unknown."""
+        row = self._rows.pop(id_, MISSING)
+        if row != MISSING:
+            self._reserve(0)
+            self.ids[row] = MISSING
+            self._unsorted.pop(id_, None)
+        return row
+
+    def _reserve(self, extra):
+        """Move ids to a writable buffer with room for extra more rows."""
+        size = len(self.ids)
+        if self._buffer is None or len(self._buffer) < size + extra:
+            # Grow geometrically so appends stay amortized O(1)
+            capacity = size + max(extra, size // 8) if extra else size
+            self._buffer = np.empty(capacity, dtype=np.int64)
+            self._buffer[:size] = self.ids
+            self.ids = self._buffer[:size]
+
+
+def _sorted_lookup(ids, rows):
+    """(sorted ids, their rows) over the live entries of parallel id and row arrays."""
+    live = ids != MISSING
+    ids, rows = ids[live], rows[live]
+    order = np.argsort(ids, kind='stable')
+    return ids[order], rows[order]
+
+
+def _lookup(sorted_lookup, ids):
+    """Rows of ids in a _sorted_lookup, MISSING where absent."""
+    sorted_ids, sorted_rows = sorted_lookup
+    result = np.full(ids.shape, MISSING, dtype=np.int64)
+    if not len(sorted_ids):
+        return result
+    pos = np.searchsorted(sorted_ids, ids)
+    pos[pos == len(sorted_ids)] = 0
+    found = sorted_ids[pos] == ids
+    result[found] = sorted_rows[pos[found]]
+    return result
@@ -0,0 +1,108 @@
+"""
+Append-only log of blog changes made to the live content index.
+
+Request handlers apply a publish, edit or removal to their own engine in
+memory but never save an index version: concurrent saves would each rewrite
+a whole version and the last one would win. Instead the change is appended
+to changes.log in INDEX_PATH as a line "<unix time> <blog id>", and only
+rebuild jobs save versions.
+
+Every worker replays the log on top of the version it loaded: on load, every
+entry logged since that version's content was read, and afterwards whatever
+was appended since its last check (see apply_logged_changes in engine.py).
+An entry only names the blog; replaying it re-reads the blog from the
+database, so entries replayed twice or out of order converge to the same
+index.
+
+users.log has the same format and lists users whose interactions were
+stored, so every worker knows whose trained collaborative vector is out of
+date without asking the database (see _user_profile in engine.py).
+
+Appends and compaction hold an exclusive flock on the log. Compaction
+rewrites it without entries older than every kept version, and appenders
+that opened the replaced file reopen it.
+"""
+
+import fcntl
+import os
+import time
+
+
+CHANGES_LOG = 'changes.log'
+USERS_LOG = 'users.log'
+
+
+class ChangeLog:
+    def __init__(self, index_path, name=CHANGES_LOG):
+        self.path = os.path.join(index_path, name)
+
+    def append(self, id_, position=None):
+        """
+        Log a change to id_. position is the caller's read position; if it
+        was at the end of the log (or the log was empty), the returned one
+        is past this entry.
+        """
+        return self.extend([id_], position)
+
+    def extend(self, ids, position=None):
+        """Log changes to several ids at once, as append does for one."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        logged_at = time.time()
+        line = ''.join(f'{logged_at:.6f} {int(id_)}\n' for id_ in ids).encode()
+        while True:
+            with open(self.path, 'ab') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                stat = os.fstat(f.fileno())
+                if not self._is_current(stat):
+                    continue  # Compacted while waiting for the lock
+                f.write(line)
+                if position == (stat.st_ino, stat.st_size) or (position is None and not stat.st_size):
+                    return stat.st_ino, stat.st_size + len(line)
+                return position
+
+    def read(self, position=None, since=None):
+        """
+        Ids logged after position (as returned by an earlier call), or from
+        the start at or after Unix time since if position is None or the log
+        was compacted meanwhile. Returns (ids, new position).
+        """
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return [], None
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            offset = 0
+            if position is not None and position[0] == inode:
+                offset = position[1]
+                since = None
+            f.seek(offset)
+            data = f.read()
+
+        # A line still being appended is picked up by the next read
+        data = data[:data.rfind(b'\n') + 1]
+        ids = []
+        for line in data.splitlines():
+            logged_at, id_ = line.split()
+            if since is None or float(logged_at) >= since:
+                ids.append(int(id_))
+        return ids, (inode, offset + len(data))
+
+    def compact(self, since):
+        """Drop entries logged before Unix time since."""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            kept = [line for line in f if float(line.split()[0]) >= since]
+            with open(f'{self.path}.tmp', 'wb') as tmp:
+                tmp.writelines(kept)
+            os.replace(f'{self.path}.tmp', self.path)
+
+    def _is_current(self, stat):
+        try:
+            return os.stat(self.path).st_ino == stat.st_ino
+        except FileNotFoundError:
+            return False
@@ -0,0 +1,116 @@
+"""
+Settings for the recommendation engine.
+
+Projects override any of these through a ``RECOMMENDATIONS`` dict in
+Django settings, e.g. ``RECOMMENDATIONS = {'CONTENT_DIMENSION': 128}``.
+"""
+
+from django.conf import settings
+
+
+DEFAULTS = {
+    # Directory holding the persisted indices (defaults to BASE_DIR/recommendation_index)
+    'INDEX_PATH': None,
+    'INDEX_KEEP_VERSIONS': 3,  # Saved index versions kept on disk
+    'INDEX_RELOAD_INTERVAL': 10,  # Seconds between checks for a newer on-disk version
+
+    # Content-based filtering: 'tfidf' (fitted vocabulary) or 'hashing'
+    # (stateless feature hashing with stored IDF, see featurizers.py)
+    'CONTENT_FEATURIZER': 'tfidf',
+    'TFIDF_MAX_FEATURES': 50000,
+    'TFIDF_MIN_DF': 1,
+    # Hashed columns, on par with TFIDF_MAX_FEATURES. The SVD basis is
+    # CONTENT_DIMENSION x this float32 (64 MB at 2 ** 16 and 256 dimensions),
+    # and fitting it slows down in proportion
+    'HASHING_FEATURES': 2 ** 16,
+    'CONTENT_WORKERS': None,  # Processes featurizing posts on rebuild (default: one per core)
+    'CONTENT_CHUNK_SIZE': 1000,  # Posts read and featurized per chunk
+    'CONTENT_DIMENSION': 256,  # Size of the low-rank projection fed to Faiss
+
+    # Incremental updates reuse the fitted vocabulary; a full refit is due once
+    # the out-of-vocabulary rate of updated posts exceeds the corpus baseline by
+    # CONTENT_DRIFT_THRESHOLD (after at least CONTENT_DRIFT_MIN_UPDATES posts)
+    'CONTENT_DRIFT_THRESHOLD': 0.1,
+    'CONTENT_DRIFT_MIN_UPDATES': 50,
+    'CONTENT_DRIFT_SAMPLE_SIZE': 500,
+
+    # Collaborative fold-in: vectors computed on demand for users new or active
+    # since the last SVD, cached per process until their next interaction
+    'FOLD_IN_CACHE_SIZE': 10000,
+
+    # Faiss index types: 'flat', 'ivf_flat', 'ivf_pq' or 'hnsw' (see indexes.py)
+    'CONTENT_INDEX': {
+        'type': 'flat',
+        'nlist': 1024,  # IVF cells (capped by catalogue size)
+        'pq_m': 32,  # PQ sub-quantizers (rounded down to a divisor of the dimension)
+        'pq_nbits': 8,
+        'hnsw_m': 32,
+        'ef_construction': 200,
+    },
+    'COLLAB_INDEX': {
+        'type': 'flat',
+        'nlist': 1024,
+        'pq_m': 10,
+        'pq_nbits': 8,
+        'hnsw_m': 32,
+        'ef_construction': 200,
+    },
+
+    # Search-time knobs per request class; unknown classes use 'default'
+    'SEARCH_PARAMS': {
+        'default': {'nprobe': 16, 'efSearch': 64},
+        'similar': {'nprobe': 8, 'efSearch': 48},
+        'recommendations': {'nprobe': 16, 'efSearch': 64},
+        'batch': {'nprobe': 32, 'efSearch': 128},
+    },
+    'BATCH_SEARCH_SIZE': 1024,  # Queries per vectorized Faiss search in batch calls
+    'PRECOMPUTE_TTL_HOURS': 24,  # Lifetime of precomputed recommendation lists
+
+    'SIMILAR_CACHE_SIZE': 10000,  # Similar-blog lists kept in each process's LRU cache
+
+    # Read-through cache of per-user lists in RecommendationCache (see cache.py)
+    'CACHE_TTL': 3600,  # Seconds a computed list is served
+    'CACHE_LIST_SIZE': 20,  # Minimum list length stored, so smaller requests also hit
+
+    # Background rebuild jobs
+    'REBUILD_JOB_TIMEOUT': 3600,  # Seconds after which a queued/running job is presumed dead
+    'AUTO_REBUILD': True,  # Trigger rebuilds as interactions and posts accumulate
+    'REBUILD_DEBOUNCE_SECONDS': 300,  # Minimum gap between automatic trigger checks
+    'REBUILD_INTERACTION_THRESHOLD': 1000,  # New interactions that warrant a collaborative rebuild
+    'REBUILD_POST_THRESHOLD': 200,  # New posts that warrant a content refit
+
+    # Trending: hourly engagement rollups weighted per event and decayed by age
+    'TRENDING_WEIGHTS': {'likes': 2, 'comments': 3, 'bookmarks': 2, 'views': 0.1},
+    'TRENDING_HALF_LIFE_HOURS': 24,
+    'TRENDING_RETENTION_DAYS': 90,  # Rollups older than this are pruned
+
+    # Interaction ingestion: events are queued and bulk-written by a writer thread
+    'INGEST_ASYNC': True,  # False writes every interaction inline
+    'INGEST_QUEUE_SIZE': 10000,  # Bounded queue; a full queue makes callers write inline
+    'INGEST_ENQUEUE_TIMEOUT': 0.05,  # Seconds to wait for queue space before writing inline
+    'INGEST_BATCH_SIZE': 500,
+    'INGEST_FLUSH_INTERVAL': 1.0,  # Max seconds an event waits in the queue
+    'INGEST_VIEW_COLLAPSE_SECONDS': 1800,  # Repeat views by a user of a post within this are dropped
+
+    # Raw interactions older than this are pruned by compact_interactions;
+    # the per-(user, blog) aggregates the models train on are kept
+    'INTERACTION_RETENTION_DAYS': 180,
+
+    # Training reads interactions from 'snapshot' (columnar, append-only copy of
+    # the log, see snapshot.py) or 'aggregates' (UserItemAggregate rows)
+    'TRAINING_SOURCE': 'snapshot',
+    'SNAPSHOT_PATH': None,  # Defaults to BASE_DIR/interaction_snapshot
+    'SNAPSHOT_SEGMENT_ROWS': 1000000,  # Rows per appended segment
+    'SNAPSHOT_CHUNK_ROWS': 1000000,  # Rows held in memory at once while training
+    'SNAPSHOT_SETTLE_SECONDS': 60,  # Rows younger than this wait for the next append
+
+    # Recall@k of approximate indexes is measured against exact search on rebuild
+    'RECALL_AT_K': 10,
+    'RECALL_SAMPLE_SIZE': 500,
+}
+
+
+def get_setting(name):
+    """Return a recommendation setting, falling back to the default."""
+    user_settings = getattr(settings, 'RECOMMENDATIONS', {})
+    return user_settings.get(name, DEFAULTS[name])
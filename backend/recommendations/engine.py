@@ -2,187 +2,807 @@
 Hybrid Recommendation Engine using Faiss + TF-IDF
 
 This engine combines:
-1. Content-based filtering: TF-IDF vectors of blog content + Faiss similarity search
+1. Content-based filtering: sparse TF-IDF vectors of blog content, projected to a
+   fixed low-rank space with truncated SVD + Faiss similarity search
 2. Collaborative filtering: User-item interaction embeddings + Faiss search
 3. Hybrid: Weighted combination of both approaches
 """
 
 import numpy as np
 import faiss
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import svds
+from sklearn.decomposition import TruncatedSVD
 from sklearn.preprocessing import normalize
-from django.db.models import Avg, Count
+from django.db import connection
 from django.conf import settings
+import json
 import os
-import pickle
+import shutil
+import itertools
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from .catalog import IdCatalog, MISSING
+from .changelog import USERS_LOG, ChangeLog
+from .conf import get_setting
+from .featurizers import featurize_chunks, load_featurizer, make_featurizer
+from .filters import ItemAttributes, filter_key, mask_selector
+from .lru import LRUCache
+from .popularity import top_blog_ids
+from .snapshot import InteractionSnapshot
+from .indexes import (
+    build_index, exclude_labels, index_type_of, measure_recall, remove_labels, search_params
+)
+
+
+REBUILD_MODES = ('full', 'content', 'collab')
+
+# Arrays persisted as raw .npy files so workers can memory-map one shared copy
+INDEX_ARRAYS = (
+    'blog_vectors', 'content_components', 'user_vectors', 'item_factors', 'seen_indptr', 'seen_items'
+)
+INDEX_FORMAT = 2
+
+
+@contextmanager
+def _timed(timings, stage):
+    """Record the wall-clock seconds of a rebuild stage into timings."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round(time.perf_counter() - start, 4)
 
 
 class HybridRecommendationEngine:
     def __init__(self):
-        self.tfidf_vectorizer = TfidfVectorizer(
-            max_features=1000,  # Limit features for memory efficiency
-            stop_words='english',
-            ngram_range=(1, 2)
-        )
+        self.featurizer = make_featurizer()  # Post text -> sparse term weights (see featurizers.py)
+        # SVD basis (CONTENT_DIMENSION x terms) projecting term weights, applied with a matmul
+        self.content_components = None
         self.content_index = None
         self.collab_index = None
-        self.blog_ids = []
-        self.user_ids = []
+        self.items = IdCatalog()  # Blog id <-> row, shared by both indexes
+        self.attributes = ItemAttributes()  # Category/author/tags by row, for filtered search
+        self.users = IdCatalog()  # User id <-> row of user_vectors
         self.blog_vectors = None
+        # Posts published or edited since content_index was built live in a small
+        # in-memory overlay, so the mapped base stays shared (see upsert_blog)
+        self.content_delta = None  # Flat Faiss index of overlay vectors, labelled by row
+        self.delta_vectors = {}  # Row -> overlay vector, superseding blog_vectors
         self.user_vectors = None
-        self.index_path = os.path.join(settings.BASE_DIR, 'recommendation_index')
+        self.item_factors = None  # Raw SVD item factors (Vt.T), used to fold in users
+        # Item rows each user had interacted with at the last build, as CSR arrays
+        # (user row r saw seen_items[seen_indptr[r]:seen_indptr[r+1]])
+        self.seen_indptr = None
+        self.seen_items = None
+        self._folded_users = {}  # User id -> folded-in (vector or None, seen item rows, activity stamp)
+        self.trained_until = None  # Unix time the collaborative training data ends
+        # User id -> stamp of their latest interaction logged since training; a
+        # fold-in is current while the stamp is unchanged
+        self._active_users = {}
+        self.users_position = None  # How far users.log has been replayed
+        self._users_lock = threading.Lock()
+        self.build_stats = {}  # Per-index type, size and measured recall@k from the last build
+        self.content_drift = self._empty_drift()
+        # (blog_id, n, request_class, version) -> similar blogs; a new engine starts empty
+        self.similar_cache = LRUCache(get_setting('SIMILAR_CACHE_SIZE'))
+        self._lock = threading.RLock()  # Guards index mutation against concurrent searches
+        self._mapped_indexes = {}  # Name -> Faiss index as memory-mapped from version_path
+        self.index_path = default_index_path()
+        self.content_as_of = None  # Unix time the indexed blog content was read
+        self.changes_position = None  # How far changes.log has been replayed (see changelog.py)
+        self._changes_lock = threading.Lock()
+        self.version = None  # On-disk version this engine was loaded from or saved as
+        self.version_path = None
 
     def _prepare_blog_content(self, blogs):
         """Combine blog title, content, tags, and category for TF-IDF."""
-        contents = []
-        for blog in blogs:
-            tags = ' '.join([tag.name for tag in blog.tags.all()])
-            category = blog.category.name if blog.category else ''
-            combined = f"{blog.title} {blog.title} {category} {tags} {blog.content}"
-            contents.append(combined)
-        return contents
-
-    def build_content_index(self, blogs):
-        """Build Faiss index from blog content using TF-IDF vectors."""
-        if not blogs:
+        return [
+            _content_text(
+                blog.title, blog.content, blog.category.name if blog.category else '',
+                [tag.name for tag in blog.tags.all()]
+            )
+            for blog in blogs
+        ]
+
+    def build_content_index(self, queryset=None, timings=None):
+        """
+        Build Faiss index from blog content using TF-IDF vectors.
+
+        Indexes queryset, by default every published blog. Blogs are read
+        CONTENT_CHUNK_SIZE at a time as plain values and featurized across a
+        process pool (see featurize_chunks), so neither model instances nor the
+        whole corpus text are held at once.
+
+        The TF-IDF matrix stays sparse and is projected to CONTENT_DIMENSION
+        with a truncated SVD before it reaches Faiss, so memory grows with the
+        number of non-zeros rather than posts x vocabulary.
+        """
+        from blog.models import Blog
+
+        if queryset is None:
+            queryset = Blog.objects.filter(status='published')
+        if not queryset.exists():
             return
+        # Changes logged from here on are replayed on top of this build
+        self.content_as_of = time.time()
+        self.changes_position = None
+        self.fit_content(_blog_content_chunks(queryset, get_setting('CONTENT_CHUNK_SIZE')), timings)
+
+    def fit_content(self, chunks, timings=None):
+        """
+        Fit the featurizer, projection and content index to an iterable of
+        chunks, each a list of (blog id, category id or None, author id,
+        tag ids, content text) tuples. Stage timings are added to timings.
+        """
+        timings = {} if timings is None else timings
+        ids, categories, authors, blog_tags = [], [], [], []
+        sample = []  # Leading posts, for the drift baseline
 
-        self.blog_ids = [blog.id for blog in blogs]
-        contents = self._prepare_blog_content(blogs)
+        def content_chunks():
+            for chunk in chunks:
+                contents = []
+                for blog_id, category_id, author_id, tag_ids, content in chunk:
+                    ids.append(blog_id)
+                    categories.append(category_id)
+                    authors.append(author_id)
+                    blog_tags.append(tag_ids)
+                    contents.append(content)
+                sample.extend(contents[:get_setting('CONTENT_DRIFT_SAMPLE_SIZE') - len(sample)])
+                yield contents
 
-        # Create TF-IDF vectors
-        tfidf_matrix = self.tfidf_vectorizer.fit_transform(contents)
-        self.blog_vectors = normalize(tfidf_matrix.toarray()).astype('float32')
+        # Create sparse TF-IDF vectors
+        with _timed(timings, 'featurize'):
+            self.featurizer = make_featurizer()
+            tfidf_matrix = featurize_chunks(self.featurizer, content_chunks())
+        self.items = IdCatalog(ids)
+        self.attributes = ItemAttributes.from_columns(categories, authors, blog_tags)
+
+        # Latent dimension is bounded by the rank of the TF-IDF matrix
+        n_components = min(
+            get_setting('CONTENT_DIMENSION'),
+            tfidf_matrix.shape[0] - 1,
+            tfidf_matrix.shape[1] - 1
+        )
+        if n_components < 1:
+            return
 
-        # Build Faiss index (using L2 distance on normalized vectors = cosine similarity)
-        dimension = self.blog_vectors.shape[1]
-        self.content_index = faiss.IndexFlatIP(dimension)  # Inner product for cosine sim
-        self.content_index.add(self.blog_vectors)
+        with _timed(timings, 'content_svd'):
+            svd = TruncatedSVD(n_components=n_components, random_state=42)
+            self.blog_vectors = self._project_content(svd.fit_transform(tfidf_matrix))
+            self.content_components = svd.components_.astype('float32')
 
-    def build_collaborative_index(self, interactions):
+        # Build Faiss index (inner product on normalized vectors = cosine similarity)
+        with _timed(timings, 'content_index'):
+            self.content_index = build_index(self.blog_vectors, get_setting('CONTENT_INDEX'))
+        self.content_delta = None
+        self.delta_vectors = {}
+        self.similar_cache.clear()
+        self.build_stats['content'] = self._index_stats(
+            self.content_index, self.blog_vectors, self.blog_vectors
+        )
+
+        # Baseline out-of-vocabulary rate, to compare incremental updates against
+        oov_tokens, tokens = self._count_oov(sample)
+        self.content_drift = self._empty_drift()
+        self.content_drift['baseline_oov'] = oov_tokens / tokens if tokens else 0.0
+
+    def _project_content(self, reduced):
+        """Normalize SVD output into contiguous float32 rows for Faiss."""
+        return np.ascontiguousarray(normalize(reduced), dtype='float32')
+
+    def transform_content(self, contents):
+        """Embed raw content strings with the fitted featurizer and projection."""
+        tfidf_matrix = self.featurizer.transform(contents)
+        return self._project_content(tfidf_matrix @ self.content_components.T)
+
+    def upsert_blog(self, blog):
         """
-        Build collaborative filtering index using user-item interaction matrix.
-        Uses matrix factorization approach with SVD.
+        Add or replace one blog's vector in the live content index.
+
+        Uses the already-fitted featurizer and projection, so a newly published
+        or edited post is recommendable without a rebuild. A new post is added
+        to the featurizer's IDF statistics where it keeps any (hashing). A blog that is no
+        longer published is removed instead. Returns True if the index changed.
+
+        The vector goes into the content_delta overlay; content_index and
+        blog_vectors, memory-mapped and shared between workers, are never
+        copied or rewritten, so an update costs O(1) whatever the catalogue size.
+        """
+        if blog.status != 'published':
+            return self.remove_blog(blog.id)
+        if self.content_index is None or self.content_components is None:
+            return False
+
+        contents = self._prepare_blog_content([blog])
+        self._record_drift(contents)
+        if blog.id not in self.items:
+            self.featurizer.partial_fit(contents)
+        vector = self.transform_content(contents)
+
+        with self._lock:
+            self.similar_cache.clear()
+            row = self.items.add(blog.id)
+            self.attributes.set(row, blog)
+            labels = np.array([row], dtype=np.int64)
+            if self.content_delta is None:
+                self.content_delta = build_index(vector, {'type': 'flat'}, labels=labels)
+            else:
+                remove_labels(self.content_delta, labels)
+                self.content_delta.add_with_ids(vector, labels)
+            self.delta_vectors[row] = vector[0]
+        return True
+
+    def remove_blog(self, blog_id):
+        """Drop a blog from both live indexes. Returns True if it was indexed."""
+        with self._lock:
+            row = self.items.discard(blog_id)
+            if row == MISSING:
+                return False
+            self.similar_cache.clear()
+            # Vectors in the mapped indexes stay put; the catalog tombstone hides them
+            if self.delta_vectors.pop(row, None) is not None:
+                remove_labels(self.content_delta, [row])
+        return True
+
+    def record_blog_change(self, blog_id):
+        """Log a blog change applied in memory, for every worker to replay."""
+        with self._changes_lock:
+            self.changes_position = ChangeLog(self.index_path).append(blog_id, self.changes_position)
+
+    def apply_logged_changes(self):
+        """
+        Replay blog changes logged since this engine's content was read or
+        last replayed. Returns the number of blogs updated; 0 if another
+        thread is already replaying.
         """
         from blog.models import Blog
-        from django.contrib.auth import get_user_model
 
-        User = get_user_model()
+        if not self._changes_lock.acquire(blocking=False):
+            return 0
+        try:
+            blog_ids, position = ChangeLog(self.index_path).read(
+                self.changes_position, self.content_as_of
+            )
+            blog_ids = set(blog_ids)
+            replayed = len(blog_ids)
+            for blog in Blog.objects.filter(id__in=blog_ids).select_related(
+                    'category').prefetch_related('tags'):
+                self.upsert_blog(blog)
+                blog_ids.discard(blog.id)
+            for blog_id in blog_ids:
+                self.remove_blog(blog_id)
+            self.changes_position = position
+            return replayed
+        finally:
+            self._changes_lock.release()
 
-        if not interactions:
+    def record_user_activity(self, user_ids):
+        """Log users whose interactions were just stored, marking them active here too."""
+        with self._users_lock:
+            self.users_position = ChangeLog(self.index_path, USERS_LOG).extend(
+                user_ids, self.users_position
+            )
+            for user_id in user_ids:
+                self._active_users[user_id] = next(_activity_stamps)
+
+    def apply_logged_interactions(self):
+        """
+        Note users logged as active since the collaborative training data
+        ends or since the last replay. Returns the number of entries read;
+        0 if another thread is already replaying.
+        """
+        if not self._users_lock.acquire(blocking=False):
+            return 0
+        try:
+            user_ids, self.users_position = ChangeLog(self.index_path, USERS_LOG).read(
+                self.users_position, self.trained_until
+            )
+            for user_id in user_ids:
+                self._active_users[user_id] = next(_activity_stamps)
+            return len(user_ids)
+        finally:
+            self._users_lock.release()
+
+    def _superseded_rows(self):
+        """Rows of content_index whose vector the overlay replaces."""
+        n = len(self.blog_vectors)
+        return np.array([row for row in self.delta_vectors if row < n], dtype=np.int64)
+
+    def _content_vectors(self, rows):
+        """Content vectors of catalog rows, from the overlay where it has them."""
+        rows = np.asarray(rows, dtype=np.int64)
+        vectors = np.zeros((len(rows), self.blog_vectors.shape[1]), dtype='float32')
+        base = rows < len(self.blog_vectors)
+        vectors[base] = self.blog_vectors[rows[base]]
+        if self.delta_vectors:
+            for i, row in enumerate(rows.tolist()):
+                if row in self.delta_vectors:
+                    vectors[i] = self.delta_vectors[row]
+        return vectors
+
+    def _merge_content_delta(self):
+        """
+        Fold the overlay into blog_vectors and content_index, so a saved
+        index holds every vector. Copies both; only for engines about to save.
+        """
+        if not self.delta_vectors:
             return
+        rows = np.fromiter(self.delta_vectors, dtype=np.int64, count=len(self.delta_vectors))
+        vectors = np.vstack(list(self.delta_vectors.values()))
+
+        blog_vectors = np.zeros((self.items.size, self.blog_vectors.shape[1]), dtype='float32')
+        blog_vectors[:len(self.blog_vectors)] = self.blog_vectors
+        blog_vectors[rows] = vectors
+
+        # HNSW cannot delete; the stale copy shares the label, so searches
+        # drop it as a duplicate and widen to refill the list
+        content_index = self._mutable_index('content_index')
+        remove_labels(content_index, rows[rows < len(self.blog_vectors)])
+        content_index.add_with_ids(vectors, rows)
+
+        self.blog_vectors = blog_vectors
+        self.content_delta = None
+        self.delta_vectors = {}
 
-        # Get unique users and blogs
-        users = list(User.objects.filter(interactions__isnull=False).distinct())
-        blogs = list(Blog.objects.filter(status='published'))
+    def _mutable_index(self, name):
+        """
+        Return the named Faiss index, first swapping a memory-mapped one for a
+        private in-memory copy (writing to a mapped index aborts the process).
+        """
+        if self._is_index_mapped(name):
+            index = getattr(self, name)
+            setattr(self, name, faiss.deserialize_index(faiss.serialize_index(index)))
+        return getattr(self, name)
+
+    def _is_index_mapped(self, name):
+        """True if the named index is still the one mapped from the loaded version."""
+        index = getattr(self, name)
+        return index is not None and self._mapped_indexes.get(name) is index
+
+    def _empty_drift(self):
+        return {'baseline_oov': 0.0, 'updates': 0, 'tokens': 0, 'oov_tokens': 0}
+
+    def _count_oov(self, contents):
+        """Count (out-of-vocabulary, total) analyzed terms in contents."""
+        return self.featurizer.count_oov(contents)
+
+    def _record_drift(self, contents):
+        oov_tokens, tokens = self._count_oov(contents)
+        self.content_drift['updates'] += len(contents)
+        self.content_drift['oov_tokens'] += oov_tokens
+        self.content_drift['tokens'] += tokens
+
+    def needs_content_refit(self):
+        """
+        True once incrementally indexed posts use noticeably more terms unknown
+        to the fitted vocabulary than the corpus it was fitted on.
+        """
+        drift = self.content_drift
+        if not drift['tokens'] or drift['updates'] < get_setting('CONTENT_DRIFT_MIN_UPDATES'):
+            return False
+        oov_rate = drift['oov_tokens'] / drift['tokens']
+        return oov_rate - drift['baseline_oov'] > get_setting('CONTENT_DRIFT_THRESHOLD')
+
+    def _interaction_matrix(self, user_ids, blog_ids, ratings):
+        """
+        Build the sparse user-item matrix straight from interaction arrays.
+
+        Rows follow self.users and columns the shared item catalog. Repeated
+        (user, blog) pairs keep their maximum rating. Everything is vectorized,
+        so peak memory grows with the interaction count, not users x items.
+        """
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        item_rows = self.items.rows(blog_ids)
+        ratings = np.asarray(ratings, dtype=np.float32)
 
-        if not users or not blogs:
+        # Drop interactions with blogs outside the catalog (drafts, deleted posts)
+        known = item_rows != MISSING
+        user_ids, item_rows, ratings = user_ids[known], item_rows[known], ratings[known]
+
+        self.users = IdCatalog(np.unique(user_ids))
+        user_rows = self.users.rows(user_ids)
+        n_users, n_items = self.users.size, self.items.size
+
+        # Max-rating aggregation: sort by (pair, rating) and keep each pair's last entry
+        pair_keys = user_rows * n_items + item_rows
+        order = np.lexsort((ratings, pair_keys))
+        pair_keys, ratings = pair_keys[order], ratings[order]
+        last = np.ones(len(pair_keys), dtype=bool)
+        last[:-1] = pair_keys[1:] != pair_keys[:-1]
+        pair_keys, ratings = pair_keys[last], ratings[last]
+
+        return csr_matrix(
+            (ratings, (pair_keys // n_items, pair_keys % n_items)),
+            shape=(n_users, n_items)
+        )
+
+    def build_collaborative_index(self, user_ids, blog_ids, ratings, trained_until=None):
+        """
+        Build collaborative filtering index using user-item interaction matrix.
+        Uses matrix factorization approach with SVD.
+
+        Takes parallel arrays of interaction user ids, blog ids and ratings.
+        Item columns follow the shared item catalog built by the content index,
+        so collaborative results map back through the same rows. trained_until
+        is the Unix time the interactions were read as of (default: now); users
+        who interacted later are folded in instead of served from the build.
+        """
+        trained_until = time.time() if trained_until is None else trained_until
+        if not len(user_ids) or not len(self.items):
             return
 
-        self.user_ids = [u.id for u in users]
-        blog_id_to_idx = {b.id: idx for idx, b in enumerate(blogs)}
-        user_id_to_idx = {u.id: idx for idx, u in enumerate(users)}
-
-        # Create user-item matrix
-        n_users = len(users)
-        n_items = len(blogs)
-        interaction_matrix = np.zeros((n_users, n_items), dtype='float32')
-
-        for interaction in interactions:
-            if interaction.user_id in user_id_to_idx and interaction.blog_id in blog_id_to_idx:
-                u_idx = user_id_to_idx[interaction.user_id]
-                i_idx = blog_id_to_idx[interaction.blog_id]
-                interaction_matrix[u_idx, i_idx] = max(
-                    interaction_matrix[u_idx, i_idx],
-                    interaction.rating
-                )
+        sparse_matrix = self._interaction_matrix(user_ids, blog_ids, ratings)
+        n_users, n_items = sparse_matrix.shape
 
-        # Simple SVD for dimensionality reduction
-        from scipy.sparse.linalg import svds
-        from scipy.sparse import csr_matrix
+        if not n_users:
+            return
 
-        sparse_matrix = csr_matrix(interaction_matrix)
+        # Simple SVD for dimensionality reduction
         k = min(50, min(n_users, n_items) - 1)  # Number of latent factors
 
         if k < 1:
             return
 
         try:
-            U, sigma, Vt = svds(sparse_matrix, k=k)
+            # Fixed start vector, so the same snapshot always yields the same factors
+            v0 = np.random.default_rng(42).uniform(-1, 1, min(n_users, n_items))
+            U, sigma, Vt = svds(sparse_matrix, k=k, v0=v0)
             # User embeddings
             self.user_vectors = normalize(U * sigma).astype('float32')
+            # Since U * sigma = R @ Vt.T, any interaction row can be projected the same way
+            self.item_factors = np.ascontiguousarray(Vt.T, dtype='float32')
+            self.seen_indptr = sparse_matrix.indptr.astype(np.int64)
+            self.seen_items = sparse_matrix.indices.astype(np.int64)
+            self._folded_users = {}
+            self.trained_until = trained_until
+            # Activity logged since the training data was read is replayed anew
+            self._active_users = {}
+            self.users_position = None
             # Item embeddings (for finding similar items)
-            item_vectors = normalize(Vt.T).astype('float32')
+            item_vectors = np.ascontiguousarray(normalize(Vt.T), dtype='float32')
 
             # Build index for item similarity
-            dimension = item_vectors.shape[1]
-            self.collab_index = faiss.IndexFlatIP(dimension)
-            self.collab_index.add(item_vectors)
+            self.collab_index = build_index(item_vectors, get_setting('COLLAB_INDEX'))
+            self.build_stats['collab'] = self._index_stats(
+                self.collab_index, item_vectors, self.user_vectors
+            )
         except Exception:
             # Fallback if SVD fails (e.g., not enough data)
             pass
 
-    def get_content_recommendations(self, blog_id, n_recommendations=10):
-        """Get similar blogs based on content."""
-        if self.content_index is None or blog_id not in self.blog_ids:
+    def _index_stats(self, index, vectors, queries):
+        """Describe a freshly built index, including recall@k against exact search."""
+        k = min(get_setting('RECALL_AT_K'), index.ntotal)
+        recall = measure_recall(
+            index, vectors, queries, k,
+            params=self._search_params(index, 'default'),
+            sample_size=get_setting('RECALL_SAMPLE_SIZE')
+        )
+        return {
+            'built_at': time.time(),
+            'index_type': index_type_of(index),
+            'ntotal': int(index.ntotal),
+            'dimension': int(index.d),
+            'recall_k': k,
+            'recall': recall,
+        }
+
+    def _search_params(self, index, request_class, sel=None, widen=1):
+        """Faiss search parameters (nprobe/efSearch) for a request class."""
+        classes = get_setting('SEARCH_PARAMS')
+        return search_params(
+            index, classes.get(request_class, classes.get('default', {})), sel=sel, widen=widen
+        )
+
+    def get_content_recommendations(self, blog_id, n_recommendations=10, request_class='similar',
+                                    filters=None):
+        """
+        Get similar blogs based on content.
+
+        filters is an optional spec (see filters.py) enforced inside the search.
+        Results are served from similar_cache until the content index changes.
+        """
+        key = (blog_id, n_recommendations, request_class, filter_key(filters), self.version)
+        cached = self.similar_cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        recommendations = self._search_similar(blog_id, n_recommendations, request_class, filters)
+        self.similar_cache.set(key, recommendations)
+        return list(recommendations)
+
+    def _search_similar(self, blog_id, n_recommendations, request_class, filters=None):
+        idx = self.items.row(blog_id)
+        if self.content_index is None or idx == MISSING:
             return []
 
-        idx = self.blog_ids.index(blog_id)
-        query_vector = self.blog_vectors[idx:idx+1]
+        query_vector = self._content_vectors([idx])
 
-        # Search for similar blogs
-        distances, indices = self.content_index.search(query_vector, n_recommendations + 1)
+        # The query blog itself is excluded inside the search, and so are base
+        # vectors the overlay replaces; the overlay is searched alongside
+        superseded = self._superseded_rows()
+        if filter_key(filters):
+            mask = self._filter_mask(filters)
+            mask[idx] = False
+            delta_sel = mask_selector(mask)
+            mask[superseded] = False
+            sel = mask_selector(mask)
+        else:
+            delta_sel = exclude_labels([idx])
+            sel = exclude_labels(np.append(superseded, idx))
+        recommendations = self._search_selected(
+            self.content_index, query_vector, sel, n_recommendations, request_class, 'content'
+        )
+        if self.content_delta is not None and self.content_delta.ntotal:
+            recommendations = _merge_recommendations(
+                recommendations,
+                self._search_selected(
+                    self.content_delta, query_vector, delta_sel, n_recommendations, request_class,
+                    'content'
+                ),
+                n_recommendations
+            )
+        return recommendations
 
-        # Exclude the query blog itself
+    def _to_recommendations(self, rows, distances, exclude, rec_type, n):
+        """Map one row of Faiss results to recommendation dicts, skipping excluded ids."""
         recommendations = []
-        for i, dist in zip(indices[0], distances[0]):
-            if self.blog_ids[i] != blog_id:
+        # Tombstones and stale copies of replaced vectors are skipped too
+        seen = set(exclude)
+        seen.add(MISSING)
+        for rec_id, dist in zip(self.items.ids_at(rows).tolist(), distances.tolist()):
+            if rec_id not in seen:
+                seen.add(rec_id)
                 recommendations.append({
-                    'blog_id': self.blog_ids[i],
-                    'score': float(dist),
-                    'type': 'content'
+                    'blog_id': rec_id,
+                    'score': dist,
+                    'type': rec_type
                 })
+                if len(recommendations) == n:
+                    break
+        return recommendations
 
-        return recommendations[:n_recommendations]
-
-    def get_collaborative_recommendations(self, user_id, n_recommendations=10):
-        """Get recommendations based on user's interaction history."""
-        from .models import UserInteraction
+    def get_collaborative_recommendations(self, user_id, n_recommendations=10,
+                                          request_class='recommendations', filters=None):
+        """
+        Get recommendations based on user's interaction history.
 
-        if self.collab_index is None or not self.user_ids:
+        Blogs the user has already seen, and blogs outside the optional filter
+        spec, are excluded inside the Faiss search, so the list is only short
+        when fewer eligible blogs exist.
+        """
+        if self.collab_index is None or not len(self.users):
             return []
 
-        if user_id not in self.user_ids:
+        user_vector, seen_rows = self._user_profile(user_id)
+        if user_vector is None:
             # Cold start - return popular items
-            return self._get_popular_blogs(n_recommendations)
+            return self._get_popular_blogs(n_recommendations, filters)
+
+        return self._search_unseen(user_vector, seen_rows, n_recommendations, request_class, filters)
 
-        # Get user's interacted blogs to exclude
-        interacted_blogs = set(
-            UserInteraction.objects.filter(user_id=user_id)
-            .values_list('blog_id', flat=True)
+    def _search_unseen(self, user_vector, seen_rows, n_recommendations, request_class,
+                       filters=None):
+        """Search the collaborative index for the best items outside seen_rows."""
+        if filter_key(filters):
+            mask = self._filter_mask(filters)
+            mask[seen_rows[seen_rows < len(mask)]] = False
+            sel = mask_selector(mask)
+        else:
+            sel = exclude_labels(seen_rows) if len(seen_rows) else None
+        return self._search_selected(
+            self.collab_index, user_vector, sel, n_recommendations, request_class, 'collaborative'
         )
 
-        u_idx = self.user_ids.index(user_id)
-        user_vector = self.user_vectors[u_idx:u_idx+1]
+    def _filter_mask(self, filters):
+        """Row mask of catalog items matching a filter spec."""
+        return self.attributes.mask(filters, self.items.size)
 
-        # Search for similar items based on user preference
-        distances, indices = self.collab_index.search(user_vector, n_recommendations * 2)
+    def _search_selected(self, index, query_vector, sel, n_recommendations, request_class,
+                         rec_type):
+        """
+        Search for the best items among those an ID selector admits.
 
-        recommendations = []
-        for i, dist in zip(indices[0], distances[0]):
-            if i < len(self.blog_ids):
-                blog_id = self.blog_ids[i]
-                if blog_id not in interacted_blogs:
-                    recommendations.append({
-                        'blog_id': blog_id,
-                        'score': float(dist),
-                        'type': 'collaborative'
-                    })
-
-        return recommendations[:n_recommendations]
+        The selector is applied inside the search. If approximate search or
+        tombstoned rows leave the list short, k and nprobe/efSearch are doubled
+        until it is full or the index is exhausted.
+        """
+        ntotal = index.ntotal
+        k = n_recommendations
+        while ntotal and k:
+            k = min(k, ntotal)
+            # The last pass probes every IVF cell
+            widen = ntotal if k == ntotal else k // n_recommendations
+            with self._lock:
+                distances, indices = index.search(
+                    query_vector, k,
+                    params=self._search_params(index, request_class, sel, widen)
+                )
+            recommendations = self._to_recommendations(
+                indices[0], distances[0], (), rec_type, n_recommendations
+            )
+            if len(recommendations) == n_recommendations or k == ntotal:
+                return recommendations
+            k *= 2
+        return []
+
+    def batch_content_recommendations(self, blog_ids, n_recommendations=10, request_class='batch'):
+        """
+        Similar blogs for many blogs at once.
+
+        Query vectors are stacked and searched as one matrix per
+        BATCH_SEARCH_SIZE blogs, in content_index (over-fetching by the base
+        vectors the overlay replaces, which are dropped) and in the overlay; a
+        blog whose list comes back short (tombstones took its slots) is
+        searched on its own. Returns {blog_id: [recommendation, ...]}; blogs
+        missing from the index map to an empty list.
+        """
+        results = {int(blog_id): [] for blog_id in blog_ids}
+        if self.content_index is None or not results:
+            return results
+
+        blog_ids = np.fromiter(results, dtype=np.int64)
+        rows = self.items.rows(blog_ids)
+        blog_ids, rows = blog_ids[rows != MISSING], rows[rows != MISSING]
+        params = self._search_params(self.content_index, request_class)
+        superseded = self._superseded_rows()
+        k = min(n_recommendations + 1 + len(superseded), self.content_index.ntotal)
+
+        batch_size = get_setting('BATCH_SEARCH_SIZE')
+        for start in range(0, len(rows), batch_size):
+            chunk_ids = blog_ids[start:start + batch_size]
+            queries = self._content_vectors(rows[start:start + batch_size])
+            with self._lock:
+                distances, indices = self.content_index.search(queries, k, params=params)
+                delta = None
+                if self.content_delta is not None and self.content_delta.ntotal:
+                    delta = self.content_delta.search(
+                        queries, min(n_recommendations + 1, self.content_delta.ntotal)
+                    )
+            indices[np.isin(indices, superseded)] = MISSING
+            for i, blog_id in enumerate(chunk_ids.tolist()):
+                results[blog_id] = self._to_recommendations(
+                    indices[i], distances[i], {blog_id}, 'content', n_recommendations
+                )
+                if delta is not None:
+                    results[blog_id] = _merge_recommendations(
+                        results[blog_id],
+                        self._to_recommendations(
+                            delta[1][i], delta[0][i], {blog_id}, 'content', n_recommendations
+                        ),
+                        n_recommendations
+                    )
+                if len(results[blog_id]) < n_recommendations:
+                    results[blog_id] = self._search_similar(
+                        blog_id, n_recommendations, request_class
+                    )
+        return results
+
+    def batch_collaborative_recommendations(self, user_ids, n_recommendations=10,
+                                            request_class='batch'):
+        """
+        Collaborative recommendations for many users at once.
+
+        User vectors are stacked and searched as one matrix per
+        BATCH_SEARCH_SIZE users, over-fetching by the largest seen set in the
+        chunk; the rare user still left short is searched on their own with
+        in-search exclusion. Users without a usable vector get the popular
+        fallback, as for single calls. Returns {user_id: [recommendation, ...]}.
+        """
+        results = {int(user_id): [] for user_id in user_ids}
+        if self.collab_index is None or not len(self.users) or not results:
+            return results
+
+        queried, vectors, seen = [], [], []
+        popular = None
+        for user_id in results:
+            vector, seen_rows = self._user_profile(user_id)
+            if vector is None:
+                if popular is None:
+                    popular = self._get_popular_blogs(n_recommendations)
+                results[user_id] = popular
+            else:
+                queried.append(user_id)
+                vectors.append(vector)
+                seen.append(seen_rows)
+
+        params = self._search_params(self.collab_index, request_class)
+        batch_size = get_setting('BATCH_SEARCH_SIZE')
+        for start in range(0, len(queried), batch_size):
+            chunk = queried[start:start + batch_size]
+            chunk_seen = seen[start:start + batch_size]
+
+            # Over-fetch enough to cover the heaviest reader's seen set
+            k = min(
+                n_recommendations + max(len(seen_rows) for seen_rows in chunk_seen),
+                self.collab_index.ntotal
+            )
+            with self._lock:
+                distances, indices = self.collab_index.search(
+                    np.vstack(vectors[start:start + batch_size]), k, params=params
+                )
+            for i, (user_id, seen_rows) in enumerate(zip(chunk, chunk_seen)):
+                recommendations = self._to_recommendations(
+                    indices[i], distances[i], set(self.items.ids_at(seen_rows).tolist()),
+                    'collaborative', n_recommendations
+                )
+                if len(recommendations) < n_recommendations:
+                    recommendations = self._search_unseen(
+                        vectors[start + i], seen_rows, n_recommendations, request_class
+                    )
+                results[user_id] = recommendations
+        return results
+
+    def _user_profile(self, user_id):
+        """
+        Query vector and seen item rows for a user.
+
+        users.log, where whichever worker stored an interaction logs its user
+        (see record_user_activity), decides which profile is current. Users
+        who have not interacted since the training data was read are served
+        from user_vectors and the seen CSR. New users, and users who have
+        interacted since, are folded in from their current interactions,
+        which also refreshes their seen rows; a fold-in is cached until the
+        user interacts again, in any process. The vector is None without
+        usable history.
+        """
+        stamp = self._active_users.get(user_id)
+
+        profile = self._folded_users.get(user_id)
+        if profile is not None and profile[2] == stamp:
+            return profile[:2]
+
+        row = self.users.row(user_id)
+        if row != MISSING and self.seen_indptr is not None and stamp is None:
+            seen_rows = self.seen_items[self.seen_indptr[row]:self.seen_indptr[row + 1]]
+            return self.user_vectors[row:row+1], seen_rows
+
+        if (user_id not in self._folded_users
+                and len(self._folded_users) >= get_setting('FOLD_IN_CACHE_SIZE')):
+            self._folded_users.pop(next(iter(self._folded_users)), None)
+        vector, seen_rows = self._fold_in_user(user_id)
+        self._folded_users[user_id] = (vector, seen_rows, stamp)
+        return vector, seen_rows
+
+    def _fold_in_user(self, user_id):
+        """
+        Project a user's current interaction row onto the stored item factors.
+        Returns (vector or None, seen item rows).
+        """
+        from .models import UserItemAggregate
+
+        interactions = np.array(
+            UserItemAggregate.objects.filter(user_id=user_id).values_list('blog_id', 'max_rating'),
+            dtype=np.float64
+        ).reshape(-1, 2)
+        rows = self.items.rows(interactions[:, 0].astype(np.int64))
+        seen_rows = np.unique(rows[rows != MISSING])
+
+        if self.item_factors is None:
+            return None, seen_rows
+
+        # Items published after the build have no factors yet
+        known = (rows != MISSING) & (rows < len(self.item_factors))
+        if not known.any():
+            return None, seen_rows
+
+        # Max rating per item, as in the training matrix
+        item_rows, inverse = np.unique(rows[known], return_inverse=True)
+        ratings = np.zeros(len(item_rows))
+        np.maximum.at(ratings, inverse, interactions[known, 1])
+
+        vector = ratings @ self.item_factors[item_rows]
+        if not np.any(vector):
+            return None, seen_rows
+        return normalize(vector.reshape(1, -1)).astype('float32'), seen_rows
 
     def get_hybrid_recommendations(self, user_id=None, blog_id=None, n_recommendations=10,
-                                    content_weight=0.5, collab_weight=0.5):
+                                    content_weight=0.5, collab_weight=0.5,
+                                    request_class='recommendations', filters=None):
         """
         Get hybrid recommendations combining content and collaborative filtering.
 
@@ -192,12 +812,16 @@ class HybridRecommendationEngine:
             n_recommendations: Number of recommendations to return
             content_weight: Weight for content-based scores (0-1)
             collab_weight: Weight for collaborative scores (0-1)
+            request_class: Key into SEARCH_PARAMS selecting nprobe/efSearch
+            filters: Optional filter spec applied to both searches (see filters.py)
         """
         recommendations = {}
 
         # Get content-based recommendations
         if blog_id and self.content_index:
-            content_recs = self.get_content_recommendations(blog_id, n_recommendations * 2)
+            content_recs = self.get_content_recommendations(
+                blog_id, n_recommendations * 2, request_class=request_class, filters=filters
+            )
             for rec in content_recs:
                 recommendations[rec['blog_id']] = {
                     'content_score': rec['score'] * content_weight,
@@ -207,7 +831,9 @@ class HybridRecommendationEngine:
 
         # Get collaborative recommendations
         if user_id and self.collab_index:
-            collab_recs = self.get_collaborative_recommendations(user_id, n_recommendations * 2)
+            collab_recs = self.get_collaborative_recommendations(
+                user_id, n_recommendations * 2, request_class=request_class, filters=filters
+            )
             for rec in collab_recs:
                 if rec['blog_id'] in recommendations:
                     recommendations[rec['blog_id']]['collab_score'] = rec['score'] * collab_weight
@@ -233,101 +859,427 @@ class HybridRecommendationEngine:
 
         return final_recs[:n_recommendations]
 
-    def _get_popular_blogs(self, n):
-        """Fallback: Get popular blogs for cold start users."""
-        from blog.models import Blog
-
-        popular = Blog.objects.filter(status='published').annotate(
-            engagement=Count('likes') + Count('comments') + Count('bookmarks')
-        ).order_by('-engagement', '-views_count')[:n]
-
+    def _get_popular_blogs(self, n, filters=None):
+        """Fallback: Get popular blogs for cold start users (from the popularity table)."""
         return [{
-            'blog_id': blog.id,
+            'blog_id': blog_id,
             'score': 1.0,
             'type': 'popular'
-        } for blog in popular]
+        } for blog_id in top_blog_ids(n, filters)]
 
     def save_index(self):
-        """Save the indices to disk."""
-        os.makedirs(self.index_path, exist_ok=True)
+        """
+        Save the indices to disk as a new version.
 
-        if self.content_index:
-            faiss.write_index(
-                self.content_index,
-                os.path.join(self.index_path, 'content.index')
-            )
+        Each save writes a fresh v<version>/ directory and then atomically
+        points CURRENT at it, so other workers never see a half-written index
+        and can notice the newer version cheaply (see get_recommendation_engine).
 
-        if self.collab_index:
-            faiss.write_index(
-                self.collab_index,
-                os.path.join(self.index_path, 'collab.index')
-            )
+        Vectors, the content projection and id catalogs go to raw .npy files
+        and small state to metadata.json, so load_index can memory-map them
+        instead of unpickling a private copy in every worker. Files still
+        mapped unchanged from the loaded version are hard-linked rather than
+        rewritten.
+        """
+        self._merge_content_delta()
+        version = str(time.time_ns())
+        path = os.path.join(self.index_path, f'v{version}')
+        os.makedirs(path)
+
+        for name, filename in (('content_index', 'content.index'), ('collab_index', 'collab.index')):
+            index = getattr(self, name)
+            if index is None:
+                continue
+            if self._is_index_mapped(name) and self._link(filename, path):
+                continue
+            faiss.write_index(index, os.path.join(path, filename))
+
+        arrays = {'blog_ids': self.items.ids, 'user_ids': self.users.ids}
+        arrays.update(self.attributes.arrays())
+        arrays.update(
+            (name, getattr(self, name)) for name in INDEX_ARRAYS if getattr(self, name) is not None
+        )
+        for name, array in arrays.items():
+            filename = f'{name}.npy'
+            if self._is_mapped_from_version(array, filename) and self._link(filename, path):
+                continue
+            np.save(os.path.join(path, filename), np.ascontiguousarray(array))
 
         # Save metadata
         metadata = {
-            'blog_ids': self.blog_ids,
-            'user_ids': self.user_ids,
-            'blog_vectors': self.blog_vectors,
-            'user_vectors': self.user_vectors,
+            'format': INDEX_FORMAT,
+            'version': version,
+            'arrays': [name for name in INDEX_ARRAYS if name in arrays],
+            'build_stats': self.build_stats,
+            'content_drift': self.content_drift,
+            'featurizer': self.featurizer.name,
+            'trained_until': self.trained_until,
+            'content_as_of': self.content_as_of,
         }
-        with open(os.path.join(self.index_path, 'metadata.pkl'), 'wb') as f:
-            pickle.dump(metadata, f)
+        with open(os.path.join(path, 'metadata.json'), 'w') as f:
+            json.dump(metadata, f, indent=2)
+
+        self.featurizer.save(path)
 
-        # Save vectorizer
-        with open(os.path.join(self.index_path, 'vectorizer.pkl'), 'wb') as f:
-            pickle.dump(self.tfidf_vectorizer, f)
+        # Publish the new version atomically, then prune old ones
+        current = os.path.join(self.index_path, 'CURRENT')
+        with open(f'{current}.tmp', 'w') as f:
+            f.write(version)
+        os.replace(f'{current}.tmp', current)
+
+        self.version = version
+        self.version_path = path
+        self._prune_versions()
+
+    def _is_mapped_from_version(self, array, filename):
+        """True if array is still the unmodified memory map of the loaded version's file."""
+        return (
+            isinstance(array, np.memmap) and self.version_path is not None
+            and array.filename == os.path.abspath(os.path.join(self.version_path, filename))
+        )
+
+    def _link(self, filename, path):
+        """Hard-link an unchanged file from the loaded version into path."""
+        try:
+            os.link(os.path.join(self.version_path, filename), os.path.join(path, filename))
+        except (OSError, TypeError):
+            return False
+        return True
+
+    def _prune_versions(self):
+        """
+        Delete all but the newest INDEX_KEEP_VERSIONS versions. Workers still
+        mapping a deleted file keep a valid view until they reload. The change
+        logs are compacted to what the kept versions still replay.
+        """
+        versions = sorted(
+            (name for name in os.listdir(self.index_path)
+             if name.startswith('v') and name[1:].isdigit()),
+            key=lambda name: int(name[1:])
+        )
+        keep = get_setting('INDEX_KEEP_VERSIONS')
+        for name in versions[:-keep]:
+            shutil.rmtree(os.path.join(self.index_path, name), ignore_errors=True)
+
+        # Kept versions only replay entries logged since their content and
+        # interactions were read
+        content_read, trained_until = [], []
+        for name in versions[-keep:]:
+            try:
+                with open(os.path.join(self.index_path, name, 'metadata.json')) as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                metadata = {}
+            content_read.append(metadata.get('content_as_of'))
+            trained_until.append(metadata.get('trained_until'))
+        if content_read and None not in content_read:
+            ChangeLog(self.index_path).compact(min(content_read))
+        if trained_until and None not in trained_until:
+            ChangeLog(self.index_path, USERS_LOG).compact(min(trained_until))
+
+    def load_index(self, version=None):
+        """
+        Load indices from disk (the CURRENT version unless one is given).
 
-    def load_index(self):
-        """Load indices from disk."""
+        Faiss indexes and vector arrays are memory-mapped read-only, so every
+        worker process shares the same page-cached copy and startup does not
+        deserialize the catalogue.
+        """
         try:
-            content_path = os.path.join(self.index_path, 'content.index')
-            collab_path = os.path.join(self.index_path, 'collab.index')
-            metadata_path = os.path.join(self.index_path, 'metadata.pkl')
-            vectorizer_path = os.path.join(self.index_path, 'vectorizer.pkl')
+            version = version or current_index_version(self.index_path)
+            if version is None:
+                return False
+            path = os.path.join(self.index_path, f'v{version}')
+
+            with open(os.path.join(path, 'metadata.json')) as f:
+                metadata = json.load(f)
+            if metadata.get('format') != INDEX_FORMAT:
+                return False
 
-            if os.path.exists(content_path):
-                self.content_index = faiss.read_index(content_path)
+            mmap_flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+            for name in ('content_index', 'collab_index'):
+                index_file = os.path.join(path, name.replace('_index', '.index'))
+                if os.path.exists(index_file):
+                    setattr(self, name, faiss.read_index(index_file, mmap_flags))
+                    self._mapped_indexes[name] = getattr(self, name)
 
-            if os.path.exists(collab_path):
-                self.collab_index = faiss.read_index(collab_path)
+            def load_array(name):
+                return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
 
-            if os.path.exists(metadata_path):
-                with open(metadata_path, 'rb') as f:
-                    metadata = pickle.load(f)
-                    self.blog_ids = metadata['blog_ids']
-                    self.user_ids = metadata['user_ids']
-                    self.blog_vectors = metadata['blog_vectors']
-                    self.user_vectors = metadata['user_vectors']
+            self.items = IdCatalog(load_array('blog_ids'))
+            self.users = IdCatalog(load_array('user_ids'))
+            if os.path.exists(os.path.join(path, 'item_categories.npy')):
+                self.attributes = ItemAttributes.from_arrays(
+                    {name: load_array(name) for name in ItemAttributes.ARRAYS}
+                )
+            for name in metadata['arrays']:
+                setattr(self, name, load_array(name))
+            self.build_stats = metadata.get('build_stats', {})
+            self.content_drift = metadata.get('content_drift', self._empty_drift())
+            self.trained_until = metadata.get('trained_until')
+            self.content_as_of = metadata.get('content_as_of')
+            self.changes_position = None
+            self.users_position = None
 
-            if os.path.exists(vectorizer_path):
-                with open(vectorizer_path, 'rb') as f:
-                    self.tfidf_vectorizer = pickle.load(f)
+            self.featurizer = load_featurizer(metadata.get('featurizer', 'tfidf'), path)
 
+            self.version = version
+            self.version_path = path
             return True
         except Exception:
             return False
 
-    def rebuild_indices(self):
-        """Rebuild all indices from current database state."""
-        from blog.models import Blog
-        from .models import UserInteraction
+    def _realign_collab(self, old_items):
+        """
+        Re-key collaborative item factors after a content-only rebuild changed
+        the item catalog, so the existing SVD keeps serving without a refit.
+        """
+        if self.item_factors is None:
+            return
+
+        new_rows = self.items.rows(old_items.ids_at(np.arange(len(self.item_factors))))
+        kept = new_rows != MISSING
+
+        factors = np.zeros((self.items.size, self.item_factors.shape[1]), dtype='float32')
+        factors[new_rows[kept]] = self.item_factors[kept]
+        self.item_factors = factors
+
+        if self.seen_items is not None:
+            # Re-key seen rows too, dropping items that left the catalog
+            seen_rows = self.items.rows(old_items.ids_at(self.seen_items))
+            seen_kept = seen_rows != MISSING
+            user_rows = np.repeat(np.arange(len(self.seen_indptr) - 1), np.diff(self.seen_indptr))
+            counts = np.bincount(user_rows[seen_kept], minlength=len(self.seen_indptr) - 1)
+            self.seen_indptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+            self.seen_items = seen_rows[seen_kept]
+
+        item_vectors = np.ascontiguousarray(normalize(factors[new_rows[kept]]), dtype='float32')
+        self.collab_index = build_index(
+            item_vectors, get_setting('COLLAB_INDEX'), labels=new_rows[kept]
+        )
+
+    def rebuild_indices(self, mode='full', timings=None, snapshot_watermark=None):
+        """
+        Rebuild indices from current database state.
+
+        Args:
+            mode: 'full', 'content' (refit TF-IDF/SVD, keep collaborative factors)
+                or 'collab' (re-run the SVD against the existing item catalog)
+            timings: Optional dict filled with seconds spent per stage, so a
+                caller can report progress even if a later stage fails
+            snapshot_watermark: Train on the interaction snapshot only up to
+                this interaction id, reproducing an earlier build; by default
+                the snapshot is brought up to date first
+
+        Approximate indexes are trained here. Returns build_stats so callers
+        can see the recall@k each index achieved against exact search.
+        """
+        from .models import UserItemAggregate
+
+        if mode not in REBUILD_MODES:
+            raise ValueError(f"Unknown rebuild mode '{mode}', expected one of {REBUILD_MODES}")
+        timings = {} if timings is None else timings
+
+        if mode in ('full', 'content'):
+            old_items = self.items
+            self.build_content_index(timings=timings)
+            if mode == 'content' and self.items is not old_items:
+                with _timed(timings, 'realign_collab'):
+                    self._realign_collab(old_items)
+
+        if mode in ('full', 'collab'):
+            if get_setting('TRAINING_SOURCE') == 'snapshot':
+                snapshot = InteractionSnapshot()
+                if snapshot_watermark is None:
+                    with _timed(timings, 'snapshot_append'):
+                        snapshot.append()
+                    snapshot_watermark = snapshot.watermark
+                with _timed(timings, 'load_interactions'):
+                    # Streamed from memory-mapped columns, reduced per (user, blog)
+                    user_ids, blog_ids, ratings = snapshot.max_ratings(snapshot_watermark)
+                trained_until = snapshot.timestamp(snapshot_watermark)
+            else:
+                trained_until = time.time()
+                with _timed(timings, 'load_interactions'):
+                    # One aggregated row per (user, blog), not the raw event log
+                    interactions = np.fromiter(
+                        UserItemAggregate.objects.values_list('user_id', 'blog_id', 'max_rating')
+                        .iterator(),
+                        dtype=[('user_id', np.int64), ('blog_id', np.int64), ('rating', np.float32)]
+                    )
+                user_ids, blog_ids, ratings = (
+                    interactions['user_id'], interactions['blog_id'], interactions['rating']
+                )
+            with _timed(timings, 'collab_index'):
+                self.build_collaborative_index(user_ids, blog_ids, ratings, trained_until)
+            if 'collab' in self.build_stats:
+                self.build_stats['collab']['training_source'] = get_setting('TRAINING_SOURCE')
+                self.build_stats['collab']['snapshot_watermark'] = snapshot_watermark
+
+        with _timed(timings, 'save'):
+            self.save_index()
+        return self.build_stats
+
+
+def _merge_recommendations(first, second, n):
+    """The n best-scored recommendations of two lists, each blog once."""
+    merged, seen = [], set()
+    for rec in sorted(first + second, key=lambda rec: rec['score'], reverse=True):
+        if rec['blog_id'] not in seen:
+            seen.add(rec['blog_id'])
+            merged.append(rec)
+    return merged[:n]
+
+
+def _content_text(title, content, category, tag_names):
+    return f"{title} {title} {category} {' '.join(tag_names)} {content}"
 
-        blogs = list(Blog.objects.filter(status='published').prefetch_related('tags', 'category'))
-        interactions = list(UserInteraction.objects.all())
 
-        self.build_content_index(blogs)
-        self.build_collaborative_index(interactions)
-        self.save_index()
+def _blog_content_chunks(queryset, chunk_size):
+    """
+    Yield lists of (id, category_id, author_id, tag_ids, content text) for the
+    blogs in queryset, chunk_size at a time in id order, read as plain values.
+    """
+    from blog.models import Blog
+
+    last_id = 0
+    while True:
+        rows = list(
+            queryset.filter(id__gt=last_id).order_by('id').values_list(
+                'id', 'title', 'content', 'category_id', 'category__name', 'author_id'
+            )[:chunk_size]
+        )
+        if not rows:
+            return
+        first_id, last_id = rows[0][0], rows[-1][0]
+
+        blog_tags = defaultdict(list)
+        for blog_id, tag_id, name in Blog.tags.through.objects.filter(
+            blog_id__gte=first_id, blog_id__lte=last_id
+        ).order_by('blog_id', 'tag__name').values_list('blog_id', 'tag_id', 'tag__name'):
+            blog_tags[blog_id].append((tag_id, name))
+
+        yield [
+            (
+                blog_id, category_id, author_id,
+                [tag_id for tag_id, _ in blog_tags[blog_id]],
+                _content_text(title, content, category or '', [name for _, name in blog_tags[blog_id]])
+            )
+            for blog_id, title, content, category_id, category, author_id in rows
+        ]
+
+
+def default_index_path():
+    return get_setting('INDEX_PATH') or os.path.join(settings.BASE_DIR, 'recommendation_index')
+
+
+def current_index_version(index_path):
+    """The version CURRENT points at, or None if no index has been saved."""
+    try:
+        with open(os.path.join(index_path, 'CURRENT')) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
 
 
 # Singleton instance
 _engine_instance = None
+_engine_lock = threading.Lock()
+_last_version_check = None
+_reloading = False
+_activity_stamps = itertools.count(1)  # Process-wide, so stamps never repeat across engines
 
 
 def get_recommendation_engine():
-    """Get or create the recommendation engine singleton."""
-    global _engine_instance
+    """
+    Get or create the recommendation engine singleton.
+
+    At most once per INDEX_RELOAD_INTERVAL seconds, checks whether another
+    process saved a newer index version. If so, it is loaded in a background
+    thread and swapped in, while requests keep using the current engine.
+    Otherwise blog changes and user activity other workers logged meanwhile
+    are replayed.
+    """
+    global _engine_instance, _last_version_check
     if _engine_instance is None:
-        _engine_instance = HybridRecommendationEngine()
-        _engine_instance.load_index()
+        with _engine_lock:
+            if _engine_instance is None:
+                engine = HybridRecommendationEngine()
+                if engine.load_index():
+                    engine.apply_logged_changes()
+                    engine.apply_logged_interactions()
+                _engine_instance = engine
+        return _engine_instance
+
+    now = time.monotonic()
+    if _last_version_check is None or now - _last_version_check >= get_setting('INDEX_RELOAD_INTERVAL'):
+        _last_version_check = now
+        if not _maybe_reload(_engine_instance):
+            _engine_instance.apply_logged_changes()
+            _engine_instance.apply_logged_interactions()
     return _engine_instance
+
+
+def _is_newer(version, than):
+    return version is not None and (than is None or int(version) > int(than))
+
+
+def _maybe_reload(engine):
+    global _reloading
+    version = current_index_version(engine.index_path)
+    if not _is_newer(version, engine.version):
+        return False
+
+    with _engine_lock:
+        if _reloading:
+            return True
+        _reloading = True
+    threading.Thread(
+        target=_reload_engine, args=(version,), name='index-reload', daemon=True
+    ).start()
+    return True
+
+
+def _reload_engine(version):
+    global _reloading
+    try:
+        engine = HybridRecommendationEngine()
+        if engine.load_index(version):
+            engine.apply_logged_changes()
+            engine.apply_logged_interactions()
+            set_recommendation_engine(engine)
+    finally:
+        _reloading = False
+        connection.close()
+
+
+def record_user_activity(user_ids):
+    """
+    Log users whose interactions were just stored, so every worker stops
+    serving their trained vectors; the live engine, if any, sees it at once.
+    """
+    engine = _engine_instance
+    if engine is not None:
+        engine.record_user_activity(user_ids)
+    else:
+        ChangeLog(default_index_path(), USERS_LOG).extend(user_ids)
+
+
+def set_recommendation_engine(engine):
+    """
+    Swap in a freshly built or loaded engine; requests already running keep
+    the old one. An engine older than the current one is ignored.
+    """
+    global _engine_instance
+    with _engine_lock:
+        current = _engine_instance
+        if current is not None and _is_newer(current.version, engine.version):
+            return
+        if current is not None and (
+                current.build_stats.get('collab', {}).get('built_at')
+                == engine.build_stats.get('collab', {}).get('built_at')):
+            # Same collaborative build: keep per-user fold-in state
+            engine._folded_users = current._folded_users
+            engine._active_users = current._active_users
+            engine.users_position = current.users_position
+        _engine_instance = engine
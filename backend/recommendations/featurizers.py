@@ -0,0 +1,296 @@
+"""
+Content featurizers: raw post text -> sparse term-weight matrix.
+
+The engine projects whatever a featurizer produces with a truncated SVD, so
+the two only differ in how terms become columns:
+
+- tfidf:   a fitted TfidfVectorizer. Its vocabulary is learned from the corpus,
+           so terms first seen after the fit are ignored until a full refit.
+- hashing: terms are hashed into HASHING_FEATURES columns, so vectorizing needs
+           no fitted state and any process (or chunk of the corpus) can do it
+           independently. IDF comes from stored per-column document
+           frequencies, which partial_fit() updates as posts are added.
+
+CONTENT_FEATURIZER selects the one used by the next content rebuild; a saved
+index records which one it was built with.
+
+Rebuilds featurize the corpus in chunks across a process pool with
+featurize_chunks(): workers turn each chunk into sparse term counts, and the
+featurizer merges them, fits its statistics and weights the result.
+"""
+
+import json
+import numbers
+import os
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from multiprocessing import get_context
+
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from .conf import get_setting
+
+
+class TfidfFeaturizer:
+    name = 'tfidf'
+
+    def __init__(self, vectorizer=None):
+        self.vectorizer = vectorizer or TfidfVectorizer(
+            max_features=get_setting('TFIDF_MAX_FEATURES'),
+            min_df=get_setting('TFIDF_MIN_DF'),
+            stop_words='english',
+            ngram_range=(1, 2),
+            dtype=np.float32
+        )
+
+    def fit_transform(self, contents):
+        matrix = self.vectorizer.fit_transform(contents)
+        # Pruned-term list is only for introspection and bloats the pickle
+        self.vectorizer.stop_words_ = None
+        return matrix
+
+    def transform(self, contents):
+        return self.vectorizer.transform(contents)
+
+    def partial_fit(self, contents):
+        """The vocabulary is fixed until the next fit."""
+
+    def chunk_task(self):
+        """Worker function and its first argument for featurize_chunks."""
+        params = self.vectorizer.get_params()
+        # Document-frequency limits need the whole corpus, so they apply in fit_chunks
+        for name in ('norm', 'use_idf', 'smooth_idf', 'sublinear_tf', 'min_df', 'max_df', 'max_features'):
+            params.pop(name)
+        return _count_terms, params
+
+    def fit_chunks(self, results):
+        """
+        Merge per-chunk (counts, terms) into one vocabulary and fit it, pruning
+        terms by min_df, max_df and max_features as TfidfVectorizer.fit would.
+
+        results may be a generator: each chunk's terms are merged into the
+        vocabulary as it arrives and then dropped, so only one copy of every
+        distinct term is held.
+        """
+        vocabulary = {}  # Term -> column, in order of first appearance
+        data, indices = [np.zeros(0, dtype=np.float32)], [np.zeros(0, dtype=np.int64)]
+        indptr, nnz = [np.zeros(1, dtype=np.int64)], 0
+        for chunk, chunk_terms in results:
+            columns = np.array(
+                [vocabulary.setdefault(term, len(vocabulary)) for term in chunk_terms],
+                dtype=np.int64
+            )
+            data.append(chunk.data)
+            indices.append(columns[chunk.indices])
+            indptr.append(chunk.indptr[1:] + nnz)
+            nnz += chunk.nnz
+        indptr = np.concatenate(indptr)
+        counts = csr_matrix(
+            (np.concatenate(data), np.concatenate(indices), indptr),
+            shape=(len(indptr) - 1, len(vocabulary))
+        )
+        terms = list(vocabulary)
+        del vocabulary
+
+        n_docs = counts.shape[0]
+        doc_freq = np.bincount(counts.indices, minlength=len(terms))
+        min_df, max_df = self.vectorizer.min_df, self.vectorizer.max_df
+        mask = doc_freq >= (min_df if isinstance(min_df, numbers.Integral) else min_df * n_docs)
+        mask &= doc_freq <= (max_df if isinstance(max_df, numbers.Integral) else max_df * n_docs)
+        limit = self.vectorizer.max_features
+        if limit is not None and mask.sum() > limit:
+            term_freq = np.asarray(counts.sum(axis=0)).ravel()
+            top = np.flatnonzero(mask)[(-term_freq[mask]).argsort()[:limit]]
+            mask = np.zeros(len(terms), dtype=bool)
+            mask[top] = True
+        # Columns in term order, as TfidfVectorizer numbers them
+        kept = sorted(np.flatnonzero(mask).tolist(), key=terms.__getitem__)
+        if not kept:
+            raise ValueError('empty vocabulary; perhaps the documents only contain stop words')
+
+        counts = counts[:, kept]
+        self.vectorizer.vocabulary_ = {terms[column]: i for i, column in enumerate(kept)}
+        self.vectorizer.idf_ = (
+            np.log((1 + n_docs) / (1 + doc_freq[kept])) + 1
+        ).astype(counts.dtype)
+        return normalize(counts.multiply(self.vectorizer.idf_).tocsr())
+
+    def count_oov(self, contents):
+        """Count (out-of-vocabulary, total) analyzed terms in contents."""
+        vocabulary = getattr(self.vectorizer, 'vocabulary_', None)
+        if not vocabulary:
+            return 0, 0
+        analyze = self.vectorizer.build_analyzer()
+        oov_tokens = tokens = 0
+        for content in contents:
+            terms = analyze(content)
+            tokens += len(terms)
+            oov_tokens += sum(1 for term in terms if term not in vocabulary)
+        return oov_tokens, tokens
+
+    def save(self, path):
+        with open(os.path.join(path, 'vectorizer.pkl'), 'wb') as f:
+            pickle.dump(self.vectorizer, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, 'vectorizer.pkl'), 'rb') as f:
+            return cls(pickle.load(f))
+
+
+class HashingFeaturizer:
+    """
+    Hashed term counts weighted by smoothed IDF, l2-normalized like TfidfVectorizer.
+
+    doc_freq[c] is the number of indexed posts with a term hashed to column c,
+    n_docs the number of posts counted. doc_freq may be a read-only memory map;
+    it is copied on first update.
+    """
+    name = 'hashing'
+
+    def __init__(self, n_features=None, doc_freq=None, n_docs=0):
+        n_features = n_features or get_setting('HASHING_FEATURES')
+        self.hasher = HashingVectorizer(
+            n_features=n_features,
+            alternate_sign=False,
+            norm=None,
+            stop_words='english',
+            ngram_range=(1, 2),
+            dtype=np.float32
+        )
+        self.doc_freq = np.zeros(n_features, dtype=np.int64) if doc_freq is None else doc_freq
+        self.n_docs = n_docs
+        self._idf = None  # Lazily computed from doc_freq and n_docs
+
+    @property
+    def n_features(self):
+        return len(self.doc_freq)
+
+    def counts(self, contents):
+        """Raw hashed term counts; needs no fitted state."""
+        return self.hasher.transform(contents)
+
+    def partial_fit(self, contents=None, counts=None):
+        """Add the documents (or their precomputed counts) to the IDF statistics."""
+        if counts is None:
+            counts = self.counts(contents)
+        columns, doc_counts = np.unique(counts.nonzero()[1], return_counts=True)
+        if not self.doc_freq.flags.writeable:
+            self.doc_freq = np.array(self.doc_freq)
+        self.doc_freq[columns] += doc_counts
+        self.n_docs += counts.shape[0]
+        self._idf = None
+
+    def weight(self, counts):
+        """Apply IDF weights and l2 normalization to hashed counts."""
+        if self._idf is None:
+            self._idf = (
+                np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1
+            ).astype(np.float32)
+        matrix = counts.multiply(self._idf).tocsr()
+        return normalize(matrix)
+
+    def chunk_task(self):
+        """Worker function and its first argument for featurize_chunks."""
+        return _hash_counts, self.hasher
+
+    def fit_chunks(self, results):
+        """Fit the IDF statistics to per-chunk hashed counts and weight them."""
+        counts = vstack(list(results), format='csr')
+        self.doc_freq = np.zeros(self.n_features, dtype=np.int64)
+        self.n_docs = 0
+        self.partial_fit(counts=counts)
+        return self.weight(counts)
+
+    def fit_transform(self, contents):
+        return self.fit_chunks([self.counts(contents)])
+
+    def transform(self, contents):
+        return self.weight(self.counts(contents))
+
+    def count_oov(self, contents):
+        """Count (unseen, total) term occurrences; a term is unseen if its column has no documents."""
+        counts = self.counts(contents)
+        return int(counts.multiply(self.doc_freq == 0).sum()), int(counts.sum())
+
+    def save(self, path):
+        np.save(os.path.join(path, 'hashing_doc_freq.npy'), np.ascontiguousarray(self.doc_freq))
+        with open(os.path.join(path, 'hashing.json'), 'w') as f:
+            json.dump({'n_features': self.n_features, 'n_docs': self.n_docs}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, 'hashing.json')) as f:
+            params = json.load(f)
+        doc_freq = np.load(os.path.join(path, 'hashing_doc_freq.npy'), mmap_mode='r')
+        return cls(params['n_features'], doc_freq, params['n_docs'])
+
+
+def _count_terms(params, contents):
+    """Counts of a chunk against its own vocabulary, as (csr matrix, list of terms)."""
+    vectorizer = CountVectorizer(**params)
+    try:
+        counts = vectorizer.fit_transform(contents)
+    except ValueError:
+        # Nothing but stop words in this chunk
+        return csr_matrix((len(contents), 0), dtype=params['dtype']), []
+    return counts, vectorizer.get_feature_names_out().tolist()
+
+
+def _hash_counts(hasher, contents):
+    return hasher.transform(contents)
+
+
+def featurize_chunks(featurizer, chunks, workers=None):
+    """
+    Fit featurizer to an iterable of content-string lists and return the
+    weighted matrix, rows in chunk order.
+
+    Chunks are counted in a pool of workers processes (default CONTENT_WORKERS,
+    else one per core) with at most two chunks per worker in flight, so the
+    corpus text is never held at once. A single chunk is counted inline.
+    Results are handed to the featurizer as they complete, in chunk order.
+    """
+    task, arg = featurizer.chunk_task()
+    workers = workers or get_setting('CONTENT_WORKERS') or os.cpu_count() or 1
+    chunks = iter(chunks)
+    first = list(islice(chunks, 2))
+
+    if workers == 1 or len(first) < 2:
+        return featurizer.fit_chunks(task(arg, chunk) for chunk in chain(first, chunks))
+
+    # Spawned rather than forked: the parent may be running writer threads
+    with ProcessPoolExecutor(workers, mp_context=get_context('spawn')) as pool:
+        return featurizer.fit_chunks(_pooled(pool, task, arg, chain(first, chunks), 2 * workers))
+
+
+def _pooled(pool, task, arg, chunks, in_flight):
+    """Yield task(arg, chunk) per chunk in order, keeping up to in_flight submitted."""
+    pending = deque()
+    for chunk in chunks:
+        if len(pending) >= in_flight:
+            yield pending.popleft().result()
+        pending.append(pool.submit(task, arg, chunk))
+    while pending:
+        yield pending.popleft().result()
+
+
+FEATURIZERS = {cls.name: cls for cls in (TfidfFeaturizer, HashingFeaturizer)}
+
+
+def make_featurizer(name=None):
+    """A new, unfitted featurizer (default CONTENT_FEATURIZER)."""
+    name = name or get_setting('CONTENT_FEATURIZER')
+    if name not in FEATURIZERS:
+        raise ValueError(f"Unknown content featurizer '{name}', expected one of {tuple(FEATURIZERS)}")
+    return FEATURIZERS[name]()
+
+
+def load_featurizer(name, path):
+    """The featurizer saved in an index version directory."""
+    return FEATURIZERS[name].load(path)
@@ -0,0 +1,169 @@
+"""
+Filtered vector search.
+
+A filter spec is a dict with any of these keys, all holding database ids:
+
+- category:       only blogs in this category
+- tag:            only blogs carrying this tag
+- author:         only blogs by this author
+- exclude_author: no blogs by this author (e.g. the requesting user)
+
+Indexes only ever hold published blogs, so status needs no filter. The engine
+keeps per-row item attributes next to the vectors; a spec becomes a boolean
+row mask that is handed to Faiss as an IDSelectorBitmap, so non-matching items
+are skipped during the search instead of being discarded afterwards.
+"""
+
+import numpy as np
+import faiss
+
+
+FILTER_KEYS = ('category', 'tag', 'author', 'exclude_author')
+
+NONE = -1  # Category id for uncategorised blogs
+
+
+class ItemAttributes:
+    """
+    Filterable attributes by catalog row: category and author ids as int64
+    arrays, tags as CSR arrays (row r has tags[tag_indptr[r]:tag_indptr[r+1]]).
+
+    Arrays may be read-only memory maps shared between workers. Rows set
+    afterwards (published or edited posts) are kept in a small overlay that
+    masks are patched from, and are only merged into the arrays on export.
+    """
+    ARRAYS = ('item_categories', 'item_authors', 'item_tag_indptr', 'item_tags')
+
+    def __init__(self, categories=(), authors=(), tag_indptr=(0,), tags=()):
+        self.categories = np.asanyarray(categories, dtype=np.int64)
+        self.authors = np.asanyarray(authors, dtype=np.int64)
+        self.tag_indptr = np.asanyarray(tag_indptr, dtype=np.int64)
+        self.tags = np.asanyarray(tags, dtype=np.int64)
+        self._tag_rows = None  # Lazily built row of every tags entry
+        self._changed = {}  # Row -> (category id, author id, tag ids) set since the arrays
+
+    def __len__(self):
+        return len(self.categories)
+
+    @classmethod
+    def from_columns(cls, categories, authors, blog_tags):
+        """Attributes from per-row category ids (or None), author ids and tag id lists."""
+        return cls(
+            categories=[category_id or NONE for category_id in categories],
+            authors=authors,
+            tag_indptr=np.concatenate([[0], np.cumsum([len(tags) for tags in blog_tags])]),
+            tags=[tag for tags in blog_tags for tag in tags],
+        )
+
+    def arrays(self):
+        if self._changed:
+            self._merge_changed()
+        return dict(zip(self.ARRAYS, (self.categories, self.authors, self.tag_indptr, self.tags)))
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(*(arrays[name] for name in cls.ARRAYS))
+
+    def set(self, row, blog):
+        """Record a blog's attributes at a row, which may lie past the arrays."""
+        self._changed[row] = (
+            blog.category_id or NONE, blog.author_id, [tag.id for tag in blog.tags.all()]
+        )
+
+    def mask(self, filters, size):
+        """Boolean mask over size catalog rows of the items matching filters."""
+        mask = np.zeros(size, dtype=bool)
+        n = min(size, len(self))
+        mask[:n] = True
+
+        if filters.get('category') is not None:
+            mask[:n] &= self.categories[:n] == filters['category']
+        if filters.get('author') is not None:
+            mask[:n] &= self.authors[:n] == filters['author']
+        if filters.get('exclude_author') is not None:
+            mask[:n] &= self.authors[:n] != filters['exclude_author']
+        if filters.get('tag') is not None:
+            tagged = np.zeros(size, dtype=bool)
+            rows = self._tag_rows_array()[self.tags == filters['tag']]
+            tagged[rows[rows < size]] = True
+            mask &= tagged
+
+        for row, attributes in self._changed.items():
+            if row < size:
+                mask[row] = _matches(attributes, filters)
+        return mask
+
+    def _tag_rows_array(self):
+        if self._tag_rows is None:
+            self._tag_rows = np.repeat(
+                np.arange(len(self), dtype=np.int64), np.diff(self.tag_indptr)
+            )
+        return self._tag_rows
+
+    def _merge_changed(self):
+        """Rewrite the arrays with the overlay applied."""
+        changed_rows = np.fromiter(self._changed, dtype=np.int64, count=len(self._changed))
+        n = len(self)
+        size = max(n, int(changed_rows.max()) + 1)
+
+        categories = np.full(size, NONE, dtype=np.int64)
+        categories[:n] = self.categories
+        authors = np.full(size, NONE, dtype=np.int64)
+        authors[:n] = self.authors
+        counts = np.zeros(size, dtype=np.int64)
+        counts[:n] = np.diff(self.tag_indptr)
+        for row, (category_id, author_id, tag_ids) in self._changed.items():
+            categories[row], authors[row], counts[row] = category_id, author_id, len(tag_ids)
+        tag_indptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        # Unchanged rows' tags move to their new offsets, changed rows are written fresh
+        tags = np.empty(tag_indptr[-1], dtype=np.int64)
+        tag_rows = self._tag_rows_array()
+        kept = ~np.isin(tag_rows, changed_rows)
+        offsets = np.arange(len(self.tags)) - self.tag_indptr[tag_rows]
+        tags[tag_indptr[tag_rows[kept]] + offsets[kept]] = self.tags[kept]
+        for row, (_, _, tag_ids) in self._changed.items():
+            tags[tag_indptr[row]:tag_indptr[row + 1]] = tag_ids
+
+        self.categories, self.authors = categories, authors
+        self.tag_indptr, self.tags = tag_indptr, tags
+        self._tag_rows = None
+        self._changed = {}
+
+
+def _matches(attributes, filters):
+    """True if one row's (category id, author id, tag ids) satisfy a filter spec."""
+    category_id, author_id, tag_ids = attributes
+    return (
+        filters.get('category') in (None, category_id)
+        and filters.get('author') in (None, author_id)
+        and (filters.get('exclude_author') is None or filters['exclude_author'] != author_id)
+        and (filters.get('tag') is None or filters['tag'] in tag_ids)
+    )
+
+
+def mask_selector(mask):
+    """IDSelector over labels (catalog rows) whose mask entry is True."""
+    return faiss.IDSelectorBitmap(np.packbits(mask, bitorder='little'))
+
+
+def filter_key(filters):
+    """Hashable form of a filter spec, for cache keys."""
+    if not filters:
+        return ()
+    return tuple(sorted((key, value) for key, value in filters.items() if value is not None))
+
+
+def filter_queryset(queryset, filters):
+    """Apply a filter spec to a Blog queryset (for database fallbacks)."""
+    if not filters:
+        return queryset
+    if filters.get('category') is not None:
+        queryset = queryset.filter(category_id=filters['category'])
+    if filters.get('tag') is not None:
+        queryset = queryset.filter(tags__id=filters['tag'])
+    if filters.get('author') is not None:
+        queryset = queryset.filter(author_id=filters['author'])
+    if filters.get('exclude_author') is not None:
+        queryset = queryset.exclude(author_id=filters['exclude_author'])
+    return queryset
@@ -0,0 +1,159 @@
+"""
+Faiss index construction for the recommendation engine.
+
+Index types are chosen through settings so large catalogues can trade exact
+search for an approximate one:
+
+- flat:     exact brute-force inner product (IndexFlatIP)
+- ivf_flat: inverted file over k-means cells, full vectors stored
+- ivf_pq:   inverted file with product-quantized vectors (smallest memory)
+- hnsw:     hierarchical navigable small-world graph
+
+All indexes use inner product, so on normalized vectors scores are cosine
+similarities. Every index is wrapped in an IndexIDMap2 whose labels are rows
+of the item catalog, so single vectors can be added, replaced or removed by
+row without a rebuild.
+"""
+
+import numpy as np
+import faiss
+
+
+INDEX_TYPES = ('flat', 'ivf_flat', 'ivf_pq', 'hnsw')
+
+# Below this many training points per centroid k-means gives poor cells
+MIN_POINTS_PER_CENTROID = 39
+
+
+def build_index(vectors, config, labels=None):
+    """
+    Create, train and fill an index of config['type'] over vectors.
+
+    Labels default to the row positions of vectors.
+    """
+    index_type = config.get('type', 'flat')
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+
+    n, dimension = vectors.shape
+    nlist = min(config.get('nlist', 1024), n // MIN_POINTS_PER_CENTROID)
+    nbits = config.get('pq_nbits', 8)
+
+    # Small catalogues cannot train the requested structure; degrade gracefully
+    if index_type == 'ivf_pq' and n < MIN_POINTS_PER_CENTROID * 2 ** nbits:
+        index_type = 'ivf_flat'
+    if index_type in ('ivf_flat', 'ivf_pq') and nlist < 1:
+        index_type = 'flat'
+
+    if index_type == 'flat':
+        index = faiss.IndexFlatIP(dimension)
+    elif index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimension, config.get('hnsw_m', 32), faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = config.get('ef_construction', 200)
+    else:
+        quantizer = faiss.IndexFlatIP(dimension)
+        if index_type == 'ivf_flat':
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            m = _pq_subquantizers(dimension, config.get('pq_m', 32))
+            index = faiss.IndexIVFPQ(
+                quantizer, dimension, nlist, m, nbits, faiss.METRIC_INNER_PRODUCT
+            )
+        index.train(vectors)
+
+    if labels is None:
+        labels = np.arange(n, dtype=np.int64)
+    index = faiss.IndexIDMap2(index)
+    index.add_with_ids(vectors, np.asarray(labels, dtype=np.int64))
+    return index
+
+
+def remove_labels(index, labels):
+    """
+    Remove vectors by label. Returns False if the index type cannot delete
+    (HNSW graphs, or legacy indexes without an id map, where deleting would
+    renumber later rows); callers then rely on the catalog tombstone.
+    """
+    if not isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return False
+    try:
+        index.remove_ids(np.asarray(labels, dtype=np.int64))
+    except RuntimeError:
+        return False
+    return True
+
+
+def index_type_of(index):
+    """Name of the INDEX_TYPES entry an index was built as."""
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)
+    if isinstance(index, faiss.IndexHNSW):
+        return 'hnsw'
+    if isinstance(index, faiss.IndexIVFPQ):
+        return 'ivf_pq'
+    if isinstance(index, faiss.IndexIVF):
+        return 'ivf_flat'
+    return 'flat'
+
+
+def search_params(index, params, sel=None, widen=1):
+    """
+    Translate a settings dict with nprobe/efSearch into Faiss SearchParameters.
+
+    Parameters are passed per call instead of being set on the index, so
+    concurrent requests with different request classes do not interfere.
+    sel is an optional IDSelector over labels applied inside the search, and
+    widen multiplies nprobe/efSearch (capped at the number of IVF cells and
+    vectors) for callers that need to search harder.
+    """
+    index_type = index_type_of(index)
+    if index_type in ('ivf_flat', 'ivf_pq') and 'nprobe' in params:
+        nprobe = min(params['nprobe'] * widen, faiss.extract_index_ivf(index).nlist)
+        return faiss.SearchParametersIVF(sel=sel, nprobe=nprobe)
+    if index_type == 'hnsw' and 'efSearch' in params:
+        ef_search = max(params['efSearch'], min(params['efSearch'] * widen, index.ntotal))
+        return faiss.SearchParametersHNSW(sel=sel, efSearch=ef_search)
+    if sel is not None:
+        return faiss.SearchParameters(sel=sel)
+    return None
+
+
+def exclude_labels(labels):
+    """IDSelector matching every label except the given ones."""
+    return faiss.IDSelectorNot(faiss.IDSelectorBatch(np.asarray(labels, dtype=np.int64)))
+
+
+def measure_recall(index, vectors, queries, k, params=None, sample_size=500, seed=42):
+    """
+    Recall@k of index against exact inner-product search over vectors.
+
+    A random sample of queries is searched both ways; the result is the
+    fraction of true top-k neighbours the index returned.
+    """
+    k = min(k, len(vectors))
+    if k < 1 or not len(queries):
+        return None
+    if index_type_of(index) == 'flat':
+        return 1.0
+
+    rng = np.random.default_rng(seed)
+    if len(queries) > sample_size:
+        queries = queries[rng.choice(len(queries), sample_size, replace=False)]
+    queries = np.ascontiguousarray(queries, dtype='float32')
+
+    _, exact = faiss.knn(queries, vectors, k, metric=faiss.METRIC_INNER_PRODUCT)
+    _, approx = index.search(queries, k, params=params)
+
+    hits = sum(
+        len(np.intersect1d(truth, found[found >= 0]))
+        for truth, found in zip(exact, approx)
+    )
+    return hits / (k * len(queries))
+
+
+def _pq_subquantizers(dimension, requested):
+    """Largest number of PQ sub-quantizers <= requested that divides dimension."""
+    for m in range(min(requested, dimension), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
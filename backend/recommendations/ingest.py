@@ -0,0 +1,290 @@
+"""
+Asynchronous, batched ingestion of user interactions.
+
+Request handlers call InteractionWriter.submit(), which only puts the event on
+a bounded in-process queue. A writer thread drains the queue every
+INGEST_FLUSH_INTERVAL seconds (or as soon as INGEST_BATCH_SIZE events are
+waiting) and stores them with one bulk_create per batch, folding them into the
+per-(user, blog) aggregates, the popularity counters and the trending rollups
+in the same transaction. After each batch the
+affected users' cached recommendation lists are dropped and the users are
+logged to users.log, so every worker folds their vectors in again.
+
+Repeated views of the same post by the same user within
+INGEST_VIEW_COLLAPSE_SECONDS are collapsed into the first one. When the queue
+is full, submit() waits up to INGEST_ENQUEUE_TIMEOUT and then writes the
+event synchronously: callers slow down instead of events being dropped.
+stats() reports queue depth, throughput and flush latency.
+
+Events the writer has taken off the queue are held where flush() sees them,
+and at exit the writer thread is stopped and joined before the final flush.
+A batch that fails to write is held again and retried. If the database
+rejects a batch (typically a post deleted since the event was queued), its
+events are written one by one and only the rejected ones are dropped.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import Counter
+
+from django.db import IntegrityError, connection, transaction
+
+from .conf import get_setting
+
+
+class InteractionWriter:
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stop = None  # Set at exit to stop this process's writer thread
+        self._held = []  # Events taken off the queue and not yet written
+        self._held_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.RLock()
+        self._recent_views = {}  # (user id, blog id) -> monotonic time of last stored view
+        self._views_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self.metrics = self._empty_metrics()
+
+    def _empty_metrics(self):
+        return {
+            'submitted': 0,
+            'collapsed_views': 0,
+            'written': 0,
+            'batches': 0,
+            'sync_writes': 0,  # Events written inline because the queue was full
+            'failed': 0,  # Events in failed write attempts (held and retried)
+            'rejected': 0,  # Events the database refused (dropped)
+            'max_queue_depth': 0,
+            'last_flush_seconds': None,
+            'max_flush_seconds': 0.0,
+            'total_flush_seconds': 0.0,
+        }
+
+    def submit(self, user_id, blog_id, interaction_type, rating):
+        """Queue an interaction for writing. Returns False if it was collapsed."""
+        if interaction_type == 'view' and self._is_repeat_view(user_id, blog_id):
+            self._count('collapsed_views')
+            return False
+
+        self._count('submitted')
+        event = (user_id, blog_id, interaction_type, rating)
+        if not get_setting('INGEST_ASYNC'):
+            self._write([event])
+            return True
+
+        self._ensure_writer()
+        try:
+            self._queue.put(event, timeout=get_setting('INGEST_ENQUEUE_TIMEOUT'))
+        except queue.Full:
+            # Backpressure: the caller pays for its own write
+            self._count('sync_writes')
+            self._write([event])
+            return True
+
+        depth = self._queue.qsize()
+        with self._metrics_lock:
+            self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], depth)
+        return True
+
+    def flush(self):
+        """Write everything queued or held. Returns the number of events written."""
+        written = 0
+        while self._queue is not None:
+            self._hold(get_setting('INGEST_BATCH_SIZE'), timeout=None)
+            if not self._held_count():
+                break
+            written += self._write_held()
+        return written
+
+    def stats(self):
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        metrics['queue_depth'] = self._queue.qsize() if self._queue is not None else 0
+        metrics['avg_flush_seconds'] = (
+            metrics.pop('total_flush_seconds') / metrics['batches'] if metrics['batches'] else None
+        )
+        return metrics
+
+    def _is_repeat_view(self, user_id, blog_id):
+        window = get_setting('INGEST_VIEW_COLLAPSE_SECONDS')
+        now = time.monotonic()
+        with self._views_lock:
+            last = self._recent_views.get((user_id, blog_id))
+            if last is not None and now - last < window:
+                return True
+            self._recent_views[user_id, blog_id] = now
+            if len(self._recent_views) > get_setting('INGEST_QUEUE_SIZE') * 10:
+                self._recent_views = {
+                    key: seen for key, seen in self._recent_views.items() if now - seen < window
+                }
+        return False
+
+    def _hold(self, limit, timeout):
+        """
+        Move up to limit queued events to the held batch, waiting up to timeout
+        for the first (None = no wait).
+        """
+        try:
+            event = self._queue.get_nowait() if timeout is None else self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+        with self._held_lock:
+            self._held.append(event)
+            try:
+                for _ in range(limit - 1):
+                    self._held.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+    def _held_count(self):
+        with self._held_lock:
+            return len(self._held)
+
+    def _write_held(self):
+        """Write the held batch; on failure it is held again for the next attempt."""
+        with self._flush_lock:
+            with self._held_lock:
+                events, self._held = self._held, []
+            if not events:
+                return 0
+            try:
+                return self._write(events)
+            except IntegrityError:
+                return self._write_each(events)
+            except Exception:
+                self._requeue(events)
+                raise
+
+    def _write_each(self, events):
+        """Write events one at a time, dropping those the database rejects."""
+        written = 0
+        for i, event in enumerate(events):
+            try:
+                written += self._write([event])
+            except IntegrityError:
+                self._count('rejected')
+            except Exception:
+                self._requeue(events[i:])
+                raise
+        return written
+
+    def _requeue(self, events):
+        with self._held_lock:
+            self._held[:0] = events
+
+    def _write(self, events):
+        """bulk_create a batch of events, then invalidate the users they touch."""
+        from . import cache as recommendation_cache
+        from .aggregates import record_interactions
+        from .engine import record_user_activity
+        from .jobs import maybe_schedule_rebuild
+        from .models import UserInteraction
+
+        started = time.perf_counter()
+        with self._flush_lock:
+            try:
+                with transaction.atomic():
+                    UserInteraction.objects.bulk_create([
+                        UserInteraction(
+                            user_id=user_id, blog_id=blog_id,
+                            interaction_type=interaction_type, rating=rating
+                        )
+                        for user_id, blog_id, interaction_type, rating in events
+                    ])
+                    record_interactions(events)
+                    _record_engagement(events)
+            except Exception:
+                self._count('failed', len(events))
+                raise
+
+            user_ids = {event[0] for event in events}
+            recommendation_cache.invalidate_users(user_ids)
+            record_user_activity(user_ids)
+
+        elapsed = time.perf_counter() - started
+        with self._metrics_lock:
+            self.metrics['written'] += len(events)
+            self.metrics['batches'] += 1
+            self.metrics['last_flush_seconds'] = elapsed
+            self.metrics['max_flush_seconds'] = max(self.metrics['max_flush_seconds'], elapsed)
+            self.metrics['total_flush_seconds'] += elapsed
+
+        maybe_schedule_rebuild()
+        return len(events)
+
+    def _count(self, name, n=1):
+        with self._metrics_lock:
+            self.metrics[name] += n
+
+    def _ensure_writer(self):
+        """Start the queue and writer thread in this process (again after a fork)."""
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # A forked child starts empty; queued events are the parent's to write
+            self._queue = queue.Queue(maxsize=get_setting('INGEST_QUEUE_SIZE'))
+            self._held = []
+            self._stop = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, name='interaction-writer', daemon=True
+            )
+            self._pid = os.getpid()
+            self._thread.start()
+            atexit.register(self._flush_at_exit)
+
+    def _run(self):
+        stop = self._stop
+        while not stop.is_set():
+            limit = get_setting('INGEST_BATCH_SIZE')
+            interval = get_setting('INGEST_FLUSH_INTERVAL')
+            if self._held_count() < limit:
+                self._hold(limit - self._held_count(), timeout=interval)
+            if not self._held_count():
+                continue
+            # Let a partial batch fill up for the rest of the interval
+            deadline = time.monotonic() + interval
+            while self._held_count() < limit and time.monotonic() < deadline and not stop.is_set():
+                self._hold(limit - self._held_count(), timeout=deadline - time.monotonic())
+            try:
+                self._write_held()
+            except Exception:
+                # Held for the next attempt; back off instead of spinning
+                stop.wait(interval)
+            finally:
+                connection.close()
+
+    def _flush_at_exit(self):
+        if self._pid == os.getpid():
+            self._stop.set()
+            self._thread.join(timeout=2 * get_setting('INGEST_FLUSH_INTERVAL') + 5)
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+
+def _record_engagement(events):
+    """
+    Bump popularity counters and trending rollups once per blog and event type
+    in a batch. Views are counted for every visitor by the view counter instead.
+    """
+    from .popularity import record_engagement
+    from .trending import record_event
+
+    counts = Counter(
+        (blog_id, interaction_type)
+        for _, blog_id, interaction_type, _ in events if interaction_type != 'view'
+    )
+    for (blog_id, interaction_type), count in counts.items():
+        record_engagement(blog_id, interaction_type, delta=count)
+        record_event(blog_id, interaction_type, count=count)
+
+
+interaction_writer = InteractionWriter()
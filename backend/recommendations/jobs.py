@@ -0,0 +1,145 @@
+"""
+Background rebuild jobs for the recommendation indices.
+
+Rebuilds run in a daemon thread so HTTP workers return immediately with a job
+id. Each run is recorded in an IndexRebuildJob row (status, per-stage timings,
+build stats, error) and, on success, the freshly built engine is swapped in for
+the current process.
+"""
+
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import evict_stale
+from .conf import get_setting
+from .engine import HybridRecommendationEngine, get_recommendation_engine, set_recommendation_engine
+from .models import IndexRebuildJob, UserInteraction
+from .popularity import refresh_popularity
+
+
+_run_lock = threading.Lock()  # One rebuild at a time per process
+_last_auto_check = None  # time.monotonic() of the last automatic trigger check
+
+
+def active_job():
+    """The queued or running job, if any. Jobs older than the timeout count as dead."""
+    cutoff = timezone.now() - timedelta(seconds=get_setting('REBUILD_JOB_TIMEOUT'))
+    return IndexRebuildJob.objects.filter(
+        status__in=['queued', 'running'], created_at__gte=cutoff
+    ).first()
+
+
+def enqueue_rebuild(mode='full', trigger='api', user=None):
+    """
+    Record a rebuild job and start it in the background.
+
+    If a rebuild is already queued or running, that job is returned instead of
+    starting a second one.
+    """
+    job = active_job()
+    if job:
+        return job
+
+    job = IndexRebuildJob.objects.create(mode=mode, trigger=trigger, requested_by=user)
+    transaction.on_commit(
+        lambda: threading.Thread(
+            target=_run_in_thread, args=(job.pk,), name=f'index-rebuild-{job.pk}', daemon=True
+        ).start()
+    )
+    return job
+
+
+def run_rebuild_job(job_id, snapshot_watermark=None):
+    """
+    Execute a rebuild job in the current thread and record its outcome.
+    snapshot_watermark pins the interactions trained on (see rebuild_indices).
+    """
+    job = IndexRebuildJob.objects.get(pk=job_id)
+
+    with _run_lock:
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+
+        timings = {}
+        try:
+            engine = HybridRecommendationEngine()
+            if job.mode != 'full':
+                # Partial rebuilds keep the other half of the persisted index
+                engine.load_index()
+            job.build_stats = engine.rebuild_indices(
+                mode=job.mode, timings=timings, snapshot_watermark=snapshot_watermark
+            )
+            set_recommendation_engine(engine)
+            evict_stale()
+            refresh_popularity()
+            job.status = 'finished'
+        except Exception:
+            job.status = 'failed'
+            job.error = traceback.format_exc()
+        finally:
+            job.stage_timings = timings
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'build_stats', 'stage_timings', 'error', 'finished_at'])
+
+    return job
+
+
+def _run_in_thread(job_id):
+    try:
+        run_rebuild_job(job_id)
+    finally:
+        connection.close()
+
+
+def maybe_schedule_rebuild():
+    """
+    Debounced automatic trigger, called as new interactions and posts arrive.
+
+    At most once per REBUILD_DEBOUNCE_SECONDS per process, counts what arrived
+    since the last finished rebuild and enqueues one once a threshold is passed:
+    new interactions call for a collaborative rebuild, new posts or vocabulary
+    drift for a content refit.
+    """
+    from blog.models import Blog
+
+    global _last_auto_check
+
+    if not get_setting('AUTO_REBUILD'):
+        return None
+
+    now = time.monotonic()
+    if _last_auto_check is not None and now - _last_auto_check < get_setting('REBUILD_DEBOUNCE_SECONDS'):
+        return None
+    _last_auto_check = now
+
+    if active_job():
+        return None
+
+    last = IndexRebuildJob.objects.filter(status='finished').order_by('-started_at').first()
+    since = last.started_at if last else timezone.now() - timedelta(
+        seconds=get_setting('REBUILD_DEBOUNCE_SECONDS')
+    )
+
+    collab = (
+        UserInteraction.objects.filter(created_at__gte=since).count()
+        >= get_setting('REBUILD_INTERACTION_THRESHOLD')
+    )
+    content = (
+        get_recommendation_engine().needs_content_refit()
+        or Blog.objects.filter(status='published', published_at__gte=since).count()
+        >= get_setting('REBUILD_POST_THRESHOLD')
+    )
+
+    if collab and content:
+        return enqueue_rebuild('full', trigger='auto')
+    if collab:
+        return enqueue_rebuild('collab', trigger='auto')
+    if content:
+        return enqueue_rebuild('content', trigger='auto')
+    return None
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from recommendations.conf import get_setting
+from recommendations.trending import backfill_rollups, prune_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild hourly engagement rollups for trending from stored engagement, and prune old ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=get_setting('TRENDING_RETENTION_DAYS'),
+            help='Rebuild rollups for this many days back'
+        )
+        parser.add_argument(
+            '--prune-only',
+            action='store_true',
+            help='Only delete rollups older than TRENDING_RETENTION_DAYS'
+        )
+
+    def handle(self, *args, **options):
+        if not options['prune_only']:
+            written = backfill_rollups(options['days'])
+            self.stdout.write(f'Wrote {written} hourly rollups')
+        pruned = prune_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} rollups older than retention'))
@@ -0,0 +1,346 @@
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from recommendations.conf import get_setting
+from recommendations.engine import HybridRecommendationEngine
+from recommendations.synthetic import INTERACTION_MIX, synthetic_pairs, synthetic_texts, synthetic_words
+
+
+def _max_rss_mb(who=resource.RUSAGE_SELF):
+    """High-water resident set size so far (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    rss = resource.getrusage(who).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class _StagePeaks:
+    """
+    Peak memory of each benchmark stage, in MiB. On Linux the resident set
+    high-water mark (VmHWM) is reset at every stage boundary through
+    /proc/self/clear_refs, so each peak covers that stage alone. Elsewhere
+    Python-level allocations are traced with tracemalloc, which misses
+    memory allocated natively (e.g. by Faiss).
+    """
+
+    def __init__(self):
+        self.peaks = {}
+        self.method = 'rss' if _reset_rss_peak() else 'tracemalloc'
+        if self.method == 'tracemalloc':
+            tracemalloc.start()
+
+    def done(self, *stages):
+        """Record the peak since the previous boundary for stages and start a new one."""
+        if self.method == 'rss':
+            peak = _rss_peak_kb() / 1024
+            _reset_rss_peak()
+        else:
+            peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.reset_peak()
+        for stage in stages:
+            self.peaks[stage] = round(peak, 1)
+
+    def stop(self):
+        if self.method == 'tracemalloc':
+            tracemalloc.stop()
+
+
+class _StageTimings(dict):
+    """Stage timings that close a peak-memory measurement as each stage's time is stored."""
+
+    def __init__(self, peaks):
+        super().__init__()
+        self._peaks = peaks
+
+    def __setitem__(self, stage, seconds):
+        super().__setitem__(stage, seconds)
+        self._peaks.done(stage)
+
+
+def _reset_rss_peak():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return _rss_peak_kb() is not None
+
+
+def _rss_peak_kb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _latency(call, arguments):
+    """Percentiles in milliseconds of call(*args) over arguments."""
+    samples = []
+    for args in arguments:
+        start = time.perf_counter()
+        call(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples = np.array(samples)
+    return {
+        'p50': round(float(np.percentile(samples, 50)), 3),
+        'p99': round(float(np.percentile(samples, 99)), 3),
+        'mean': round(float(samples.mean()), 3),
+    }
+
+
+def _refuse_queries(execute, sql, params, many, context):
+    """execute_wrapper keeping the benchmark hermetic: it must never read the database."""
+    raise RuntimeError(f'The benchmark issued a database query: {sql}')
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark HybridRecommendationEngine on synthetic corpora and interaction logs, '
+        'reporting stage timings, per-stage peak memory, index size and query latency as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[1000, 10000],
+            help='Posts (and users, unless --users is given) per run (default: 1000 10000)'
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            help='Fixed number of users for every run'
+        )
+        parser.add_argument(
+            '--interactions-per-user',
+            type=int,
+            default=20,
+            help='Mean interactions per user (default: 20)'
+        )
+        parser.add_argument(
+            '--words',
+            type=int,
+            default=80,
+            help='Mean words per post (default: 80)'
+        )
+        parser.add_argument(
+            '--vocabulary',
+            type=int,
+            default=50000,
+            help='Distinct words in the synthetic corpus (default: 50000)'
+        )
+        parser.add_argument(
+            '--item-skew',
+            type=float,
+            default=1.0,
+            help='Zipf exponent of post popularity (default: 1.0)'
+        )
+        parser.add_argument(
+            '--user-skew',
+            type=float,
+            default=1.0,
+            help='Zipf exponent of user activity (default: 1.0)'
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=500,
+            help='Timed queries per recommendation method (default: 500)'
+        )
+        parser.add_argument(
+            '--index-type',
+            choices=['flat', 'ivf_flat', 'ivf_pq', 'hnsw'],
+            help='Override the content and collaborative index type'
+        )
+        parser.add_argument(
+            '--featurizer',
+            choices=['tfidf', 'hashing'],
+            help='Override CONTENT_FEATURIZER'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed; the same seed generates the same data (default: 0)'
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the JSON report to this file instead of stdout'
+        )
+
+    def handle(self, *args, **options):
+        overrides = dict(getattr(settings, 'RECOMMENDATIONS', {}))
+        if options['index_type']:
+            for name in ('CONTENT_INDEX', 'COLLAB_INDEX'):
+                overrides[name] = {**get_setting(name), 'type': options['index_type']}
+        if options['featurizer']:
+            overrides['CONTENT_FEATURIZER'] = options['featurizer']
+
+        # Every stage runs on synthetic in-memory data; a query would mix in real
+        # users' rows and time the database, so one fails the run instead
+        with override_settings(RECOMMENDATIONS=overrides), connection.execute_wrapper(_refuse_queries):
+            report = {
+                'generated_at': timezone.now().isoformat(),
+                'commit': _commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'options': {
+                    name: options[name] for name in (
+                        'users', 'interactions_per_user', 'words', 'vocabulary',
+                        'item_skew', 'user_skew', 'queries', 'seed'
+                    )
+                },
+                'settings': {
+                    name: get_setting(name) for name in (
+                        'CONTENT_FEATURIZER', 'CONTENT_DIMENSION', 'CONTENT_INDEX', 'COLLAB_INDEX',
+                        'CONTENT_WORKERS', 'CONTENT_CHUNK_SIZE', 'SEARCH_PARAMS'
+                    )
+                },
+                'runs': [],
+            }
+            for size in sorted(options['sizes']):
+                self.stderr.write(f'Benchmarking {size} posts...')
+                report['runs'].append(self._run(size, options))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Benchmark report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def _run(self, n_posts, options):
+        from blog.services import INTERACTION_RATINGS
+
+        rng = np.random.default_rng(options['seed'])
+        n_users = options['users'] or n_posts
+        n_interactions = n_users * options['interactions_per_user']
+        peaks = _StagePeaks()
+        timings = _StageTimings(peaks)
+
+        # Synthetic data; ids are 1-based like database keys
+        start = time.perf_counter()
+        words = synthetic_words(options['vocabulary'])
+        chunk_size = get_setting('CONTENT_CHUNK_SIZE')
+        chunks = []
+        for chunk_start in range(0, n_posts, chunk_size):
+            count = min(chunk_size, n_posts - chunk_start)
+            texts = synthetic_texts(rng, words, count, options['words'])
+            categories = rng.integers(1, 21, size=count)
+            authors = rng.integers(1, n_users + 1, size=count)
+            tags = rng.integers(1, 201, size=(count, 3))
+            chunks.append([
+                (chunk_start + i + 1, int(categories[i]), int(authors[i]), tags[i].tolist(), texts[i])
+                for i in range(count)
+            ])
+        users, posts = synthetic_pairs(
+            rng, n_users, n_posts, n_interactions, options['item_skew'], options['user_skew']
+        )
+        types = list(INTERACTION_MIX)
+        ratings = np.array([INTERACTION_RATINGS.get(name, 1.0) for name in types], dtype=np.float32)[
+            rng.choice(len(types), size=n_interactions, p=list(INTERACTION_MIX.values()))
+        ]
+        generate_seconds = round(time.perf_counter() - start, 4)
+        peaks.done('generate')
+
+        engine = HybridRecommendationEngine()
+        with tempfile.TemporaryDirectory() as index_path:
+            engine.index_path = index_path
+
+            # Records each stage's time, closing its peak measurement
+            engine.fit_content(chunks, timings)
+            del chunks
+
+            start = time.perf_counter()
+            engine.build_collaborative_index(users + 1, posts + 1, ratings)
+            timings['collab_index'] = round(time.perf_counter() - start, 4)
+
+            start = time.perf_counter()
+            engine.save_index()
+            timings['save'] = round(time.perf_counter() - start, 4)
+            index_files = {
+                name: os.path.getsize(os.path.join(engine.version_path, name))
+                for name in sorted(os.listdir(engine.version_path))
+            }
+
+            # Queries run against a freshly loaded, memory-mapped engine as in production
+            loaded = HybridRecommendationEngine()
+            loaded.index_path = index_path
+            start = time.perf_counter()
+            loaded.load_index()
+            timings['load'] = round(time.perf_counter() - start, 4)
+
+            latency = self._latencies(loaded, rng, users + 1, n_posts, options['queries'])
+            peaks.done('queries')
+        peaks.stop()
+
+        return {
+            'posts': n_posts,
+            'users': n_users,
+            'interactions': n_interactions,
+            'generate_seconds': generate_seconds,
+            'stage_seconds': dict(timings),
+            'peak_memory_mb': peaks.peaks,
+            'peak_memory_method': peaks.method,
+            'workers_max_rss_mb': _max_rss_mb(resource.RUSAGE_CHILDREN),
+            'index_bytes': sum(index_files.values()),
+            'index_files': index_files,
+            'build_stats': engine.build_stats,
+            'latency_ms': latency,
+        }
+
+    def _latencies(self, engine, rng, user_ids, n_posts, queries):
+        """Time each recommendation method on random known posts and users."""
+        known_users = np.unique(user_ids)
+        blog_ids = rng.integers(1, n_posts + 1, size=queries).tolist()
+        users = rng.choice(known_users, size=queries).tolist()
+
+        def content(blog_id):
+            # Measure the search itself, not the per-engine LRU cache
+            engine.similar_cache.clear()
+            engine.get_content_recommendations(blog_id, 10)
+
+        def hybrid(user_id, blog_id):
+            engine.similar_cache.clear()
+            engine.get_hybrid_recommendations(user_id=user_id, blog_id=blog_id, n_recommendations=10)
+
+        # Warm up page cache and lazily built structures
+        for blog_id, user_id in list(zip(blog_ids, users))[:10]:
+            hybrid(user_id, blog_id)
+
+        return {
+            'content': _latency(content, [(blog_id,) for blog_id in blog_ids]),
+            'collaborative': _latency(
+                lambda user_id: engine.get_collaborative_recommendations(user_id, 10),
+                [(user_id,) for user_id in users]
+            ),
+            'hybrid': _latency(hybrid, list(zip(users, blog_ids))),
+        }
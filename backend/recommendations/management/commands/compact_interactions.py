@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from recommendations.aggregates import prune_interactions, rebuild_aggregates
+from recommendations.conf import get_setting
+
+
+class Command(BaseCommand):
+    help = 'Prune raw interactions past the retention horizon (aggregates keep their ratings)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=get_setting('INTERACTION_RETENTION_DAYS'),
+            help='Keep raw interactions for this many days'
+        )
+        parser.add_argument(
+            '--rebuild-aggregates',
+            action='store_true',
+            help='Recompute user-item aggregates from the raw log first (before the first prune)'
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild_aggregates']:
+            rows = rebuild_aggregates()
+            self.stdout.write(f'Rebuilt {rows} user-item aggregates')
+
+        deleted = prune_interactions(options['retention_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {deleted} interactions older than {options['retention_days']} days"
+        ))
@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from recommendations.cache import evict_stale, store_recommendations
+from recommendations.conf import get_setting
+from recommendations.engine import get_recommendation_engine
+from recommendations.models import UserItemAggregate
+
+
+class Command(BaseCommand):
+    help = 'Precompute top-K collaborative recommendations for active users into RecommendationCache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=10,
+            help='Recommendations stored per user (default: 10)'
+        )
+        parser.add_argument(
+            '--active-days',
+            type=int,
+            default=30,
+            help='Users with an interaction in this many days count as active (default: 30)'
+        )
+        parser.add_argument(
+            '--ttl-hours',
+            type=int,
+            default=get_setting('PRECOMPUTE_TTL_HOURS'),
+            help='Hours before a precomputed list expires'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=get_setting('BATCH_SEARCH_SIZE'),
+            help='Users scored and written per batch'
+        )
+
+    def handle(self, *args, **options):
+        engine = get_recommendation_engine()
+        if engine.collab_index is None:
+            self.stdout.write(self.style.WARNING('No collaborative index; run rebuild_recommendations first'))
+            return
+
+        now = timezone.now()
+        user_ids = list(
+            UserItemAggregate.objects.filter(
+                last_seen__gte=now - timedelta(days=options['active_days'])
+            ).values_list('user_id', flat=True).distinct().order_by('user_id')
+        )
+        self.stdout.write(f'Precomputing recommendations for {len(user_ids)} active users...')
+
+        chunk_size = options['chunk_size']
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            results = engine.batch_collaborative_recommendations(chunk, options['limit'])
+            store_recommendations(
+                results, 'collaborative', options['limit'], engine.version or '',
+                ttl=options['ttl_hours'] * 3600
+            )
+            self.stdout.write(f'  {min(start + chunk_size, len(user_ids))}/{len(user_ids)} users')
+
+        self.stdout.write(f'Evicted {evict_stale()} stale cache rows')
+        self.stdout.write(self.style.SUCCESS('Recommendations precomputed successfully!'))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from recommendations.jobs import active_job, run_rebuild_job
+from recommendations.models import IndexRebuildJob
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the recommendation indices, recording the run as a rebuild job'
+
+    def add_arguments(self, parser):
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument(
+            '--content-only',
+            action='store_true',
+            help='Refit TF-IDF and the content index, keeping collaborative factors'
+        )
+        mode.add_argument(
+            '--collab-only',
+            action='store_true',
+            help='Re-run the collaborative SVD against the existing item catalog'
+        )
+        parser.add_argument(
+            '--snapshot-watermark',
+            type=int,
+            help='Train on the interaction snapshot up to this interaction id, '
+                 'reproducing an earlier build (see build_stats of its job)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Run even if another rebuild job is queued or running'
+        )
+
+    def handle(self, *args, **options):
+        if options['content_only']:
+            mode = 'content'
+        elif options['collab_only']:
+            mode = 'collab'
+        else:
+            mode = 'full'
+
+        running = active_job()
+        if running and not options['force']:
+            raise CommandError(f'Rebuild job #{running.pk} is already {running.status}; use --force')
+
+        job = IndexRebuildJob.objects.create(mode=mode, trigger='command')
+        self.stdout.write(f'Running {job.get_mode_display().lower()} rebuild (job #{job.pk})...')
+        job = run_rebuild_job(job.pk, snapshot_watermark=options['snapshot_watermark'])
+
+        for stage, seconds in job.stage_timings.items():
+            self.stdout.write(f'  {stage}: {seconds:.2f}s')
+        for name, stats in job.build_stats.items():
+            self.stdout.write(
+                f"  {name} index: {stats['index_type']}, {stats['ntotal']} vectors, "
+                f"recall@{stats['recall_k']}={stats['recall']}"
+            )
+
+        if job.status == 'failed':
+            raise CommandError(f'Rebuild failed:\n{job.error}')
+        self.stdout.write(self.style.SUCCESS('Recommendation indices rebuilt successfully!'))
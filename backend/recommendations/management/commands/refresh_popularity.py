@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from recommendations.popularity import refresh_popularity
+
+
+class Command(BaseCommand):
+    help = 'Recount engagement and rewrite the precomputed popularity ranking'
+
+    def handle(self, *args, **options):
+        count = refresh_popularity()
+        self.stdout.write(self.style.SUCCESS(f'Popularity refreshed for {count} blogs'))
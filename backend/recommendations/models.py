@@ -33,8 +33,34 @@ class UserInteraction(models.Model):
         return f"{self.user.username} {self.interaction_type} {self.blog.title}"
 
 
+class UserItemAggregate(models.Model):
+    """One row per (user, blog) summarising their interactions (see aggregates.py)."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='item_aggregates'
+    )
+    blog = models.ForeignKey(
+        'blog.Blog',
+        on_delete=models.CASCADE,
+        related_name='user_aggregates'
+    )
+    max_rating = models.FloatField(default=0.0)
+    interaction_count = models.PositiveIntegerField(default=0)
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['user', 'blog']
+        indexes = [
+            models.Index(fields=['last_seen']),
+        ]
+
+    def __str__(self):
+        return f"User #{self.user_id} on blog #{self.blog_id} (max {self.max_rating})"
+
+
 class RecommendationCache(models.Model):
-    """Cache recommendations to improve performance."""
+    """Cache recommendations to improve performance (see recommendations/cache.py)."""
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -42,11 +68,109 @@ class RecommendationCache(models.Model):
     )
     recommended_blogs = models.JSONField(default=list)
     recommendation_type = models.CharField(max_length=50)  # 'collaborative', 'content', 'hybrid'
+    index_version = models.CharField(max_length=32, blank=True, default='')  # Index the list was computed against
+    list_size = models.PositiveIntegerField(default=0)  # Recommendations requested when computed
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'recommendation_type', 'index_version']),
+            models.Index(fields=['expires_at']),
+        ]
 
     def __str__(self):
         return f"Recommendations for {self.user.username}"
+
+
+class IndexRebuildJob(models.Model):
+    """A background rebuild of the recommendation indices."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('finished', 'Finished'),
+        ('failed', 'Failed'),
+    ]
+    MODE_CHOICES = [
+        ('full', 'Full'),
+        ('content', 'Content only'),
+        ('collab', 'Collaborative only'),
+    ]
+    TRIGGER_CHOICES = [
+        ('api', 'API'),
+        ('command', 'Management command'),
+        ('auto', 'Automatic'),
+    ]
+
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES, default='full')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES, default='api')
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='index_rebuild_jobs'
+    )
+    stage_timings = models.JSONField(default=dict)  # Stage name -> seconds
+    build_stats = models.JSONField(default=dict)  # Index types, sizes and recall@k
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_mode_display()} rebuild #{self.pk} ({self.status})"
+
+
+class BlogPopularity(models.Model):
+    """Precomputed engagement counts and popularity score per blog (see popularity.py)."""
+    blog = models.OneToOneField(
+        'blog.Blog',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='popularity'
+    )
+    likes = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    bookmarks = models.PositiveIntegerField(default=0)
+    views = models.PositiveIntegerField(default=0)
+    score = models.FloatField(default=0.0)  # likes + comments + bookmarks
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-score', '-views']
+        indexes = [
+            models.Index(fields=['-score', '-views']),
+        ]
+
+    def __str__(self):
+        return f"Popularity of blog #{self.blog_id} ({self.score})"
+
+
+class EngagementRollup(models.Model):
+    """Engagement events per blog per hour, the source of trending scores (see trending.py)."""
+    blog = models.ForeignKey(
+        'blog.Blog',
+        on_delete=models.CASCADE,
+        related_name='engagement_rollups'
+    )
+    hour = models.IntegerField()  # Hours since the Unix epoch
+    likes = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    bookmarks = models.PositiveIntegerField(default=0)
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-hour']
+        unique_together = ['blog', 'hour']
+        indexes = [
+            models.Index(fields=['hour']),
+        ]
+
+    def __str__(self):
+        return f"Engagement for blog #{self.blog_id} at hour {self.hour}"
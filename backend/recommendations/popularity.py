@@ -0,0 +1,82 @@
+"""
+Precomputed popularity ranking for cold-start and fallback paths.
+
+BlogPopularity holds per-blog like, comment, bookmark and view counts and a
+score (likes + comments + bookmarks). Engagement events bump a blog's row in
+place, and refresh_popularity() recounts everything with one correlated
+subquery per count, which fixes any drift (e.g. from deleted comments)
+without the row multiplication of joining all three tables at once. Readers
+take the top N straight from the score index, topped up by view count with
+published blogs that have no row yet (new posts, or before the first refresh).
+"""
+
+from django.db import transaction
+from django.db.models import F
+
+from .filters import filter_queryset
+from .models import BlogPopularity
+
+
+# Interaction type -> BlogPopularity counter it bumps
+ENGAGEMENT_FIELDS = {
+    'like': 'likes',
+    'comment': 'comments',
+    'bookmark': 'bookmarks',
+}
+
+
+def refresh_popularity():
+    """Recount engagement for every published blog and rewrite the table."""
+    from blog.models import Blog, Bookmark, Comment, Like, count_related
+
+    counts = Blog.objects.filter(status='published').annotate(
+        n_likes=count_related(Like), n_comments=count_related(Comment),
+        n_bookmarks=count_related(Bookmark)
+    ).values_list('id', 'n_likes', 'n_comments', 'n_bookmarks', 'views_count')
+
+    rows = [
+        BlogPopularity(
+            blog_id=blog_id, likes=likes, comments=comments, bookmarks=bookmarks,
+            views=views, score=likes + comments + bookmarks
+        )
+        for blog_id, likes, comments, bookmarks, views in counts.iterator()
+    ]
+    with transaction.atomic():
+        BlogPopularity.objects.exclude(blog__status='published').delete()
+        BlogPopularity.objects.bulk_create(
+            rows, batch_size=1000, update_conflicts=True, unique_fields=['blog'],
+            update_fields=['likes', 'comments', 'bookmarks', 'views', 'score', 'updated_at']
+        )
+    return len(rows)
+
+
+def record_engagement(blog_id, interaction_type, delta=1):
+    """Bump a blog's counter and score for delta engagement events (negative to undo)."""
+    field = ENGAGEMENT_FIELDS.get(interaction_type)
+    if field is None:
+        return
+    rows = BlogPopularity.objects.filter(blog_id=blog_id)
+    if delta < 0:
+        rows = rows.filter(**{f'{field}__gte': -delta})
+    updated = rows.update(
+        **{field: F(field) + delta}, score=F('score') + delta
+    )
+    if not updated and delta > 0:
+        BlogPopularity.objects.get_or_create(blog_id=blog_id, defaults={field: delta, 'score': delta})
+
+
+def top_blog_ids(n, filters=None):
+    """Ids of the n most popular published blogs, optionally filtered (see filters.py)."""
+    from blog.models import Blog
+
+    blogs = filter_queryset(Blog.objects.filter(status='published'), filters)
+    blog_ids = list(
+        BlogPopularity.objects.filter(blog__in=blogs).order_by('-score', '-views')
+        .values_list('blog_id', flat=True)[:n]
+    )
+    if len(blog_ids) < n:
+        blog_ids += list(
+            blogs.filter(popularity__isnull=True).order_by('-views_count', '-id')
+            .values_list('id', flat=True)[:n - len(blog_ids)]
+        )
+    return blog_ids
@@ -0,0 +1,12 @@
+from rest_framework import serializers
+from .models import IndexRebuildJob
+
+
+class IndexRebuildJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = IndexRebuildJob
+        fields = [
+            'id', 'mode', 'status', 'trigger', 'stage_timings', 'build_stats',
+            'error', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
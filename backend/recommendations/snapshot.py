@@ -0,0 +1,310 @@
+"""
+Columnar, append-only snapshot of the interaction log for index training.
+
+The snapshot lives in SNAPSHOT_PATH as numbered segments, each a directory of
+.npy columns (id, user_id, blog_id, rating, ts) holding a contiguous range of
+UserInteraction ids. manifest.json lists the segments and the watermark: the
+highest interaction id already copied. append() streams only rows past the
+watermark out of the database, SNAPSHOT_SEGMENT_ROWS at a time, and the
+manifest is replaced atomically after each segment is written.
+
+Ids are assigned at insert but become visible at commit, so a concurrent
+writer can commit a lower id after a higher one was copied. append() therefore
+stops at the first row younger than SNAPSHOT_SETTLE_SECONDS; it is picked up
+by a later append once every earlier transaction has had time to commit.
+
+Training reads the segments memory-mapped, chunk by chunk, so memory is
+bounded by the chunk size plus the distinct (user, blog) pairs. Reading up to
+a fixed watermark reproduces the exact input of an earlier build.
+
+Training only needs each pair's maximum rating, so append() then compacts:
+segments whose rows are all older than INTERACTION_RETENTION_DAYS are folded,
+with any earlier compacted segment, into a single compacted segment holding
+one row per (user, blog) pair (its max rating, latest id and latest ts). Disk
+use and rebuild input grow with distinct pairs plus the retention window
+rather than with every event ever recorded. Watermarks inside the compacted
+range can no longer be reproduced.
+"""
+
+import json
+import os
+import shutil
+from datetime import timedelta
+from itertools import islice, takewhile
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .conf import get_setting
+
+
+COLUMNS = (
+    ('id', np.int64),
+    ('user_id', np.int64),
+    ('blog_id', np.int64),
+    ('rating', np.float32),
+    ('ts', np.int64),  # Unix seconds
+)
+
+
+class InteractionSnapshot:
+    def __init__(self, path=None):
+        self.path = path or get_setting('SNAPSHOT_PATH') or os.path.join(
+            settings.BASE_DIR, 'interaction_snapshot'
+        )
+
+    def manifest(self):
+        try:
+            with open(os.path.join(self.path, 'manifest.json')) as f:
+                return json.load(f)
+        except OSError:
+            return {'watermark': 0, 'rows': 0, 'segments': []}
+
+    @property
+    def watermark(self):
+        return self.manifest()['watermark']
+
+    def append(self, settle=None):
+        """
+        Copy interactions past the watermark into new segments. Returns rows appended.
+
+        settle overrides SNAPSHOT_SETTLE_SECONDS; 0 is safe when nothing else
+        is writing interactions, e.g. right after seeding.
+        """
+        from .models import UserInteraction
+
+        settle = get_setting('SNAPSHOT_SETTLE_SECONDS') if settle is None else settle
+        settled = int((timezone.now() - timedelta(seconds=settle)).timestamp())
+        manifest = self.manifest()
+        rows = takewhile(lambda row: row[4] <= settled, (
+            (pk, user_id, blog_id, rating, int(created_at.timestamp()))
+            for pk, user_id, blog_id, rating, created_at in
+            UserInteraction.objects.filter(id__gt=manifest['watermark']).order_by('id')
+            .values_list('id', 'user_id', 'blog_id', 'rating', 'created_at')
+            .iterator(chunk_size=10000)
+        ))
+        dtype = list(COLUMNS)
+
+        appended = 0
+        os.makedirs(self.path, exist_ok=True)
+        while True:
+            segment = np.fromiter(islice(rows, get_setting('SNAPSHOT_SEGMENT_ROWS')), dtype=dtype)
+            if not len(segment):
+                break
+
+            name = f'seg{int(segment["id"][0]):012d}'
+            self._write_segment(name, segment)
+            segment_rows = len(segment)
+
+            manifest['segments'].append({
+                'name': name,
+                'rows': segment_rows,
+                'first_id': int(segment['id'][0]),
+                'last_id': int(segment['id'][-1]),
+                'last_ts': int(segment['ts'].max()),
+            })
+            manifest['watermark'] = int(segment['id'][-1])
+            manifest['rows'] += segment_rows
+            self._write_manifest(manifest)
+            appended += segment_rows
+
+        self.compact()
+        return appended
+
+    def compact(self, before=None):
+        """
+        Fold the leading segments whose rows are all older than Unix time
+        before (default: INTERACTION_RETENTION_DAYS ago) into one compacted
+        segment with a row per (user, blog) pair. Returns rows removed.
+        """
+        if before is None:
+            before = int((
+                timezone.now() - timedelta(days=get_setting('INTERACTION_RETENTION_DAYS'))
+            ).timestamp())
+        manifest = self.manifest()
+        expired = list(takewhile(lambda segment: self._last_ts(segment) < before, manifest['segments']))
+        if not expired or (len(expired) == 1 and expired[0].get('compacted')):
+            return 0
+
+        columns = _reduce_chunks(
+            chunk for segment in expired
+            for chunk in self._segment_chunks(segment, segment['rows'], get_setting('SNAPSHOT_CHUNK_ROWS'))
+        )
+        last_id = expired[-1]['last_id']
+        name = f'compacted{last_id:012d}'
+        self._write_segment(name, np.rec.fromarrays(
+            [columns[column] for column, _ in COLUMNS], dtype=list(COLUMNS)
+        ))
+        compacted = {
+            'name': name,
+            'rows': len(columns['id']),
+            'first_id': expired[0]['first_id'],
+            'last_id': last_id,
+            'last_ts': max(self._last_ts(segment) for segment in expired),
+            'compacted': True,
+        }
+        manifest['segments'] = [compacted] + manifest['segments'][len(expired):]
+        removed = manifest['rows'] - sum(segment['rows'] for segment in manifest['segments'])
+        manifest['rows'] -= removed
+        manifest['compacted_through'] = last_id
+        self._write_manifest(manifest)
+
+        # Readers still mapping these files keep a valid view until they finish
+        for segment in expired:
+            shutil.rmtree(os.path.join(self.path, segment['name']), ignore_errors=True)
+        return removed
+
+    def _write_segment(self, name, segment):
+        segment_path = os.path.join(self.path, name)
+        os.makedirs(segment_path, exist_ok=True)
+        for column, _ in COLUMNS:
+            np.save(os.path.join(segment_path, f'{column}.npy'), np.ascontiguousarray(segment[column]))
+
+    def _last_ts(self, segment):
+        if 'last_ts' in segment:
+            return segment['last_ts']
+        # Segments appended before last_ts was recorded are in id (so time) order
+        return int(np.load(os.path.join(self.path, segment['name'], 'ts.npy'), mmap_mode='r')[-1])
+
+    def reset(self):
+        """Drop every segment, e.g. after the interaction table was recreated."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _write_manifest(self, manifest):
+        path = os.path.join(self.path, 'manifest.json')
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(f'{path}.tmp', path)
+
+    def chunks(self, watermark=None, chunk_size=None):
+        """
+        Yield dicts of column arrays, at most chunk_size rows each, covering
+        every segment up to watermark (default: the whole snapshot). Raises
+        ValueError for a watermark inside the compacted range.
+        """
+        chunk_size = chunk_size or get_setting('SNAPSHOT_CHUNK_ROWS')
+        manifest = self.manifest()
+        self._check_watermark(manifest, watermark)
+        for segment in manifest['segments']:
+            if watermark is not None and segment['first_id'] > watermark:
+                break
+            end = segment['rows']
+            if watermark is not None and segment['last_id'] > watermark:
+                ids = np.load(os.path.join(self.path, segment['name'], 'id.npy'), mmap_mode='r')
+                end = int(np.searchsorted(ids, watermark, side='right'))
+            yield from self._segment_chunks(segment, end, chunk_size)
+
+    def _segment_chunks(self, segment, end, chunk_size):
+        """Yield the first end rows of a segment as dicts of column arrays."""
+        segment_path = os.path.join(self.path, segment['name'])
+        columns = {
+            column: np.load(os.path.join(segment_path, f'{column}.npy'), mmap_mode='r')
+            for column, _ in COLUMNS
+        }
+        for start in range(0, end, chunk_size):
+            yield {
+                column: np.asarray(array[start:min(start + chunk_size, end)])
+                for column, array in columns.items()
+            }
+
+    def _check_watermark(self, manifest, watermark):
+        if watermark is not None and watermark < manifest.get('compacted_through', 0):
+            raise ValueError(
+                f'Snapshot watermark {watermark} predates compaction through '
+                f"{manifest['compacted_through']}; it can no longer be reproduced"
+            )
+
+    def timestamp(self, watermark=None):
+        """Unix time of the last row up to watermark (default: the whole snapshot), or None."""
+        manifest = self.manifest()
+        self._check_watermark(manifest, watermark)
+        for segment in reversed(manifest['segments']):
+            if watermark is not None and segment['first_id'] > watermark:
+                continue
+            if watermark is None or segment['last_id'] <= watermark:
+                return self._last_ts(segment)
+            segment_path = os.path.join(self.path, segment['name'])
+            ids = np.load(os.path.join(segment_path, 'id.npy'), mmap_mode='r')
+            end = int(np.searchsorted(ids, watermark, side='right'))
+            return int(np.load(os.path.join(segment_path, 'ts.npy'), mmap_mode='r')[end - 1])
+        return None
+
+    def max_ratings(self, watermark=None, chunk_size=None):
+        """
+        Stream the snapshot into one (user_id, blog_id, max rating) triple per
+        pair, as parallel arrays, re-reducing as chunks accumulate.
+        """
+        users, blogs, ratings = [], [], []
+        pending = reduced = 0
+        for chunk in self.chunks(watermark, chunk_size):
+            user_ids, blog_ids, chunk_ratings = _max_per_pair(
+                chunk['user_id'], chunk['blog_id'], chunk['rating']
+            )
+            users.append(user_ids)
+            blogs.append(blog_ids)
+            ratings.append(chunk_ratings)
+            pending += len(user_ids)
+
+            # Re-reduce once the unreduced tail outgrows what is already reduced
+            if pending > max(reduced, get_setting('SNAPSHOT_CHUNK_ROWS')):
+                merged = _max_per_pair(
+                    np.concatenate(users), np.concatenate(blogs), np.concatenate(ratings)
+                )
+                users, blogs, ratings = [merged[0]], [merged[1]], [merged[2]]
+                reduced, pending = len(merged[0]), 0
+
+        if not users:
+            return (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float32))
+        return _max_per_pair(np.concatenate(users), np.concatenate(blogs), np.concatenate(ratings))
+
+
+def _reduce_chunks(chunks):
+    """
+    Reduce dicts of snapshot columns to one row per (user, blog) pair, with
+    its max rating and latest id and ts, re-reducing as chunks accumulate.
+    """
+    reduced, pending = [], []
+    reduced_rows = pending_rows = 0
+    for chunk in chunks:
+        pending.append(_reduce_pairs(chunk))
+        pending_rows += len(pending[-1]['id'])
+        if pending_rows > max(reduced_rows, get_setting('SNAPSHOT_CHUNK_ROWS')):
+            reduced = [_reduce_pairs(_concatenate(reduced + pending))]
+            reduced_rows, pending, pending_rows = len(reduced[0]['id']), [], 0
+    return _reduce_pairs(_concatenate(reduced + pending))
+
+
+def _concatenate(chunks):
+    if not chunks:
+        return {column: np.empty(0, dtype) for column, dtype in COLUMNS}
+    return {column: np.concatenate([chunk[column] for chunk in chunks]) for column, _ in COLUMNS}
+
+
+def _reduce_pairs(columns):
+    order = np.lexsort((columns['blog_id'], columns['user_id']))
+    columns = {column: array[order] for column, array in columns.items()}
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (
+        (columns['user_id'][1:] != columns['user_id'][:-1])
+        | (columns['blog_id'][1:] != columns['blog_id'][:-1])
+    )
+    starts = np.flatnonzero(first)
+    if not len(starts):
+        return columns
+    return {
+        'id': np.maximum.reduceat(columns['id'], starts),
+        'user_id': columns['user_id'][starts],
+        'blog_id': columns['blog_id'][starts],
+        'rating': np.maximum.reduceat(columns['rating'], starts),
+        'ts': np.maximum.reduceat(columns['ts'], starts),
+    }
+
+
+def _max_per_pair(user_ids, blog_ids, ratings):
+    """Keep the maximum rating of each (user, blog) pair."""
+    order = np.lexsort((ratings, blog_ids, user_ids))
+    user_ids, blog_ids, ratings = user_ids[order], blog_ids[order], ratings[order]
+    last = np.ones(len(user_ids), dtype=bool)
+    last[:-1] = (user_ids[1:] != user_ids[:-1]) | (blog_ids[1:] != blog_ids[:-1])
+    return user_ids[last], blog_ids[last], ratings[last]
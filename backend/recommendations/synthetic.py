@@ -0,0 +1,46 @@
+"""
+Synthetic corpora and interaction logs for benchmarks and load testing.
+
+Draws are skewed the way real traffic is: a few posts attract most
+interactions (Zipfian popularity), a few users generate most of them
+(power-law activity), and post text follows a Zipfian word distribution.
+Everything is drawn from a numpy Generator, so a seed reproduces a dataset.
+"""
+
+import numpy as np
+
+
+# Share of generated interactions per type
+INTERACTION_MIX = {'view': 0.7, 'like': 0.15, 'bookmark': 0.1, 'comment': 0.05}
+
+
+def zipf_choice(rng, n, size, exponent):
+    """
+    Draw size values from range(n); value r has probability proportional to
+    (r + 1) ** -exponent. An exponent of 0 is uniform.
+    """
+    weights = np.arange(1, n + 1, dtype=np.float64) ** -exponent
+    return rng.choice(n, size=size, p=weights / weights.sum())
+
+
+def synthetic_pairs(rng, n_users, n_posts, size, item_skew=1.0, user_skew=1.0):
+    """
+    Parallel arrays of user and post indexes for size interactions. Popularity
+    ranks are shuffled, so the busiest users and posts are not the first ones.
+    """
+    users = rng.permutation(n_users)[zipf_choice(rng, n_users, size, user_skew)]
+    posts = rng.permutation(n_posts)[zipf_choice(rng, n_posts, size, item_skew)]
+    return users, posts
+
+
+def synthetic_words(vocabulary_size):
+    """Distinct pseudo-words, indexed by frequency rank."""
+    return np.array([f'w{rank:x}' for rank in range(vocabulary_size)])
+
+
+def synthetic_texts(rng, words, count, mean_length, skew=1.0):
+    """count texts of about mean_length words drawn from words with Zipfian frequency."""
+    lengths = rng.poisson(mean_length, size=count) + 1
+    ranks = zipf_choice(rng, len(words), int(lengths.sum()), skew)
+    ends = np.cumsum(lengths)
+    return [' '.join(words[ranks[end - length:end]]) for end, length in zip(ends, lengths)]
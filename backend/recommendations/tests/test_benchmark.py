@@ -0,0 +1,24 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+
+class BenchmarkCommandTests(SimpleTestCase):
+    def test_runs_without_the_database(self):
+        # SimpleTestCase refuses queries, so this also checks the run is hermetic
+        with tempfile.TemporaryDirectory() as path:
+            output = os.path.join(path, 'report.json')
+            call_command(
+                'benchmark_recommendations', sizes=[200], queries=5, vocabulary=500,
+                output=output, stderr=io.StringIO()
+            )
+            with open(output) as f:
+                run = json.load(f)['runs'][0]
+
+        self.assertEqual(run['posts'], 200)
+        self.assertEqual(set(run['latency_ms']), {'content', 'collaborative', 'hybrid'})
+        self.assertIn('collab_index', run['peak_memory_mb'])
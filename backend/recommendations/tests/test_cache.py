@@ -0,0 +1,87 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from ..cache import evict_stale, get_or_compute, invalidate_users
+from ..engine import HybridRecommendationEngine
+from ..models import RecommendationCache
+from .utils import make_blogs, make_users
+
+
+@override_settings(RECOMMENDATIONS={'CACHE_LIST_SIZE': 5})
+class RecommendationCacheTests(TestCase):
+    def setUp(self):
+        self.users = make_users(2)
+        self.engine = mock.Mock(version='v1')
+        patcher = mock.patch('recommendations.cache.get_recommendation_engine', return_value=self.engine)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.compute = mock.Mock(side_effect=lambda size: list(range(size)))
+
+    def get(self, user, n=3):
+        return get_or_compute(user.id, 'hybrid', n, self.compute)
+
+    def test_hit_serves_stored_list(self):
+        self.assertEqual(self.get(self.users[0]), [0, 1, 2])
+        self.compute.assert_called_once_with(5)
+        self.assertEqual(self.get(self.users[0], n=5), [0, 1, 2, 3, 4])
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_larger_request_or_new_version_recomputes(self):
+        self.get(self.users[0])
+        self.assertEqual(len(self.get(self.users[0], n=8)), 8)
+        self.engine.version = 'v2'
+        self.get(self.users[0])
+        self.assertEqual(self.compute.call_count, 3)
+        self.assertEqual(RecommendationCache.objects.count(), 1)
+
+    def test_invalidate_users(self):
+        self.get(self.users[0])
+        self.get(self.users[1])
+        invalidate_users([self.users[0].id])
+        self.assertEqual(
+            list(RecommendationCache.objects.values_list('user_id', flat=True)), [self.users[1].id]
+        )
+        self.get(self.users[0])
+        self.assertEqual(self.compute.call_count, 3)
+
+    def test_evict_stale(self):
+        self.get(self.users[0])
+        self.engine.version = 'v2'
+        self.assertEqual(evict_stale(), 1)
+        self.assertFalse(RecommendationCache.objects.exists())
+
+
+class SimilarCacheTests(TestCase):
+    def setUp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        settings = override_settings(RECOMMENDATIONS={'INDEX_PATH': path, 'CONTENT_WORKERS': 1})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.author = make_users(1)[0]
+        self.blogs = make_blogs(self.author, 8)
+        self.engine = HybridRecommendationEngine()
+        self.engine.build_content_index()
+
+    def similar(self, blog):
+        return self.engine.get_content_recommendations(blog.id, 3)
+
+    def test_repeat_lookup_hits(self):
+        first = self.similar(self.blogs[0])
+        first.append('not cached')
+        self.assertEqual(self.similar(self.blogs[0]), first[:-1])
+        self.assertEqual(self.engine.similar_cache.stats()['hits'], 1)
+
+    def test_index_change_clears(self):
+        self.similar(self.blogs[0])
+        self.similar(self.blogs[1])
+        self.assertEqual(len(self.engine.similar_cache), 2)
+
+        post = make_blogs(self.author, 1, start=3)[0]
+        self.engine.upsert_blog(post)
+        self.assertEqual(len(self.engine.similar_cache), 0)
+        self.assertIn(post.id, [rec['blog_id'] for rec in self.similar(self.blogs[3])])
@@ -0,0 +1,40 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from ..catalog import IdCatalog, MISSING
+
+
+class IdCatalogTests(SimpleTestCase):
+    def test_discard_leaves_tombstone(self):
+        catalog = IdCatalog([10, 20, 30])
+        self.assertEqual(catalog.discard(20), 1)
+        self.assertEqual(catalog.discard(20), MISSING)
+        self.assertEqual(len(catalog), 2)
+        self.assertEqual(catalog.size, 3)
+        self.assertNotIn(20, catalog)
+        self.assertEqual(catalog.row(30), 2)
+        self.assertEqual(catalog.id_at(1), MISSING)
+
+    def test_rows_are_not_reused(self):
+        catalog = IdCatalog([10, 20])
+        catalog.discard(10)
+        self.assertEqual(catalog.add(10), 2)
+        self.assertEqual(catalog.add(10), 2)
+        self.assertEqual(catalog.ids.tolist(), [MISSING, 20, 10])
+
+    def test_bulk_rows(self):
+        catalog = IdCatalog([30, 10, 20])
+        np.testing.assert_array_equal(catalog.rows([10, 20, 30, 40]), [1, 2, 0, MISSING])
+        # The sorted lookup is rebuilt after changes
+        catalog.discard(10)
+        catalog.add(40)
+        np.testing.assert_array_equal(catalog.rows([10, 40, 30]), [MISSING, 3, 0])
+        np.testing.assert_array_equal(catalog.ids_at([0, 1, 3, 7, -1]), [30, MISSING, 40, MISSING, MISSING])
+
+    def test_read_only_ids_are_copied_on_write(self):
+        ids = np.array([10, 20], dtype=np.int64)
+        ids.flags.writeable = False
+        catalog = IdCatalog(ids)
+        catalog.discard(10)
+        self.assertEqual(ids.tolist(), [10, 20])
+        self.assertEqual(catalog.ids.tolist(), [MISSING, 20])
@@ -0,0 +1,70 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from ..engine import HybridRecommendationEngine
+from .utils import aggregate, make_blogs, make_users
+
+
+class CollaborativeTests(TestCase):
+    def setUp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        settings = override_settings(RECOMMENDATIONS={
+            'INDEX_PATH': path, 'TRAINING_SOURCE': 'aggregates', 'CONTENT_WORKERS': 1
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.users = make_users(5)
+        self.blogs = make_blogs(self.users[0], 10)
+        for i, user in enumerate(self.users):
+            aggregate(user, self.blogs[i:i + 4])
+        HybridRecommendationEngine().rebuild_indices('full')
+        self.engine = self._loaded()
+
+    def _loaded(self):
+        engine = HybridRecommendationEngine()
+        self.assertTrue(engine.load_index())
+        return engine
+
+    def _recommended_ids(self, engine, user, n=10):
+        return {rec['blog_id'] for rec in engine.get_collaborative_recommendations(user.id, n)}
+
+    def test_seen_items_are_excluded_inside_the_search(self):
+        recommended = self._recommended_ids(self.engine, self.users[0])
+        self.assertEqual(recommended, {blog.id for blog in self.blogs[4:]})
+
+        batch = self.engine.batch_collaborative_recommendations([self.users[0].id], 10)
+        self.assertEqual({rec['blog_id'] for rec in batch[self.users[0].id]}, recommended)
+
+    def test_trained_profiles_need_no_queries(self):
+        with self.assertNumQueries(0):
+            self.engine.get_collaborative_recommendations(self.users[1].id, 3)
+
+    def test_logged_activity_refreshes_profiles_in_other_workers(self):
+        other = self._loaded()
+        user = self.users[0]
+        self.assertIn(self.blogs[8].id, self._recommended_ids(other, user))
+
+        aggregate(user, [self.blogs[8]], rating=5.0)
+        self.engine.record_user_activity([user.id])
+        self.assertNotIn(self.blogs[8].id, self._recommended_ids(self.engine, user))
+
+        # Until the other worker replays users.log it serves the trained profile
+        self.assertIn(self.blogs[8].id, self._recommended_ids(other, user))
+        self.assertEqual(other.apply_logged_interactions(), 1)
+        self.assertNotIn(self.blogs[8].id, self._recommended_ids(other, user))
+        # The fold-in is cached until the user is logged again
+        with self.assertNumQueries(0):
+            self._recommended_ids(other, user)
+
+    def test_activity_since_training_is_replayed_on_load(self):
+        user = self.users[0]
+        aggregate(user, [self.blogs[8]])
+        self.engine.record_user_activity([user.id])
+
+        loaded = self._loaded()
+        loaded.apply_logged_interactions()
+        self.assertNotIn(self.blogs[8].id, self._recommended_ids(loaded, user))
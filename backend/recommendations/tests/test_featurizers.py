@@ -0,0 +1,70 @@
+import shutil
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from ..featurizers import HashingFeaturizer, TfidfFeaturizer, featurize_chunks, load_featurizer
+from .utils import TOPICS
+
+
+def corpus(n):
+    return [
+        ' '.join(TOPICS[(i * k + j) % len(TOPICS)] for k in (1, 2, 3) for j in range(i % 4 + 1))
+        for i in range(n)
+    ]
+
+
+class HashingFeaturizerTests(SimpleTestCase):
+    def test_partial_fits_match_a_single_fit(self):
+        contents = corpus(40)
+        featurizer = HashingFeaturizer(2 ** 10)
+        featurizer.fit_transform(contents[:25])
+        featurizer.partial_fit(contents[25:])
+
+        reference = HashingFeaturizer(2 ** 10)
+        expected = reference.fit_transform(contents)
+        self.assertEqual(featurizer.n_docs, 40)
+        np.testing.assert_array_equal(featurizer.doc_freq, reference.doc_freq)
+        np.testing.assert_allclose(
+            featurizer.transform(contents).toarray(), expected.toarray(), rtol=1e-5
+        )
+
+    def test_saved_statistics_are_copied_on_update(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        featurizer = HashingFeaturizer(2 ** 10)
+        featurizer.fit_transform(corpus(10))
+        featurizer.save(path)
+
+        loaded = load_featurizer('hashing', path)
+        self.assertFalse(loaded.doc_freq.flags.writeable)
+        loaded.partial_fit(corpus(12)[10:])
+        self.assertEqual(loaded.n_docs, 12)
+        self.assertEqual(load_featurizer('hashing', path).n_docs, 10)
+
+
+class FeaturizeChunksTests(SimpleTestCase):
+    def _assert_matches_single_fit(self, featurizer, reference, workers):
+        contents = corpus(40)
+        chunks = [contents[i:i + 7] for i in range(0, len(contents), 7)]
+        matrix = featurize_chunks(featurizer, iter(chunks), workers=workers)
+        expected = reference.fit_transform(contents)
+        np.testing.assert_allclose(matrix.toarray(), expected.toarray(), rtol=1e-5)
+        return featurizer
+
+    @override_settings(RECOMMENDATIONS={'TFIDF_MAX_FEATURES': 12, 'TFIDF_MIN_DF': 2})
+    def test_tfidf_chunks_match_a_single_fit(self):
+        for workers in (1, 2):
+            featurizer = self._assert_matches_single_fit(
+                TfidfFeaturizer(), TfidfFeaturizer(), workers
+            )
+            vocabulary = featurizer.vectorizer.vocabulary_
+            self.assertEqual(len(vocabulary), 12)
+            self.assertEqual(vocabulary, TfidfFeaturizer().vectorizer.fit(corpus(40)).vocabulary_)
+
+    def test_hashing_chunks_match_a_single_fit(self):
+        featurizer = self._assert_matches_single_fit(
+            HashingFeaturizer(2 ** 10), HashingFeaturizer(2 ** 10), workers=1
+        )
+        self.assertEqual(featurizer.n_docs, 40)
@@ -0,0 +1,136 @@
+import shutil
+import tempfile
+from types import SimpleNamespace
+
+import faiss
+import numpy as np
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from blog.models import Blog, Category, Tag
+from ..engine import HybridRecommendationEngine
+from ..filters import NONE, ItemAttributes, filter_key, mask_selector
+from ..indexes import build_index, exclude_labels
+from .utils import make_blogs, make_users
+
+
+def fake_blog(category_id, author_id, tag_ids):
+    tags = [SimpleNamespace(id=tag_id) for tag_id in tag_ids]
+    return SimpleNamespace(
+        category_id=category_id, author_id=author_id, tags=SimpleNamespace(all=lambda: tags)
+    )
+
+
+class ItemAttributesTests(SimpleTestCase):
+    def setUp(self):
+        # Rows: (category, author, tags)
+        self.attributes = ItemAttributes.from_columns(
+            [1, None, 1, 2], [10, 10, 20, 30], [[5], [], [5, 6], [6]]
+        )
+
+    def _rows(self, filters, size=None):
+        return np.flatnonzero(self.attributes.mask(filters, size or 4)).tolist()
+
+    def test_masks(self):
+        self.assertEqual(self._rows({}), [0, 1, 2, 3])
+        self.assertEqual(self._rows({'category': 1}), [0, 2])
+        self.assertEqual(self._rows({'author': 10}), [0, 1])
+        self.assertEqual(self._rows({'exclude_author': 10}), [2, 3])
+        self.assertEqual(self._rows({'tag': 6}), [2, 3])
+        self.assertEqual(self._rows({'tag': 5, 'author': 20}), [2])
+        # Rows past the attribute arrays match no filter
+        self.assertEqual(self._rows({'tag': 6}, size=6), [2, 3])
+
+    def test_set_rows_are_overlaid(self):
+        self.attributes.set(1, fake_blog(2, 20, [6]))
+        self.attributes.set(5, fake_blog(None, 40, [5]))
+
+        self.assertEqual(self._rows({'category': 2}, size=6), [1, 3])
+        self.assertEqual(self._rows({'tag': 5}, size=6), [0, 2, 5])
+        self.assertEqual(self._rows({'exclude_author': 20}, size=6), [0, 3, 5])
+        self.assertEqual(self._rows({'category': 2}, size=3), [1])
+
+    def test_arrays_merge_the_overlay(self):
+        self.attributes.set(2, fake_blog(3, 20, [7, 8]))
+        self.attributes.set(5, fake_blog(None, 40, [5]))
+        merged = ItemAttributes.from_arrays(self.attributes.arrays())
+
+        expected = ItemAttributes.from_columns(
+            [1, None, 3, 2, None, None], [10, 10, 20, 30, NONE, 40], [[5], [], [7, 8], [6], [], [5]]
+        )
+        for name, array in expected.arrays().items():
+            np.testing.assert_array_equal(merged.arrays()[name], array)
+
+    def test_filter_key(self):
+        self.assertEqual(filter_key(None), ())
+        self.assertEqual(
+            filter_key({'tag': 2, 'category': None, 'author': 1}), (('author', 1), ('tag', 2))
+        )
+
+
+class SelectorTests(SimpleTestCase):
+    def setUp(self):
+        self.index = build_index(np.eye(4, dtype='float32'), {'type': 'flat'})
+        self.query = np.ones((1, 4), dtype='float32')
+
+    def _search(self, sel):
+        _, labels = self.index.search(self.query, 4, params=faiss.SearchParameters(sel=sel))
+        return sorted(label for label in labels[0].tolist() if label >= 0)
+
+    def test_mask_selector(self):
+        self.assertEqual(self._search(mask_selector(np.array([False, True, False, True]))), [1, 3])
+
+    def test_exclude_labels(self):
+        self.assertEqual(self._search(exclude_labels([0, 2])), [1, 3])
+
+
+class FilteredSearchTests(TestCase):
+    def setUp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        settings = override_settings(RECOMMENDATIONS={'INDEX_PATH': path, 'CONTENT_WORKERS': 1})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.authors = make_users(2, prefix='author')
+        self.category = Category.objects.create(name='Science')
+        self.tag = Tag.objects.create(name='space')
+        self.blogs = make_blogs(self.authors[0], 6) + make_blogs(self.authors[1], 4, start=6)
+        for blog in self.blogs[::2]:
+            blog.category = self.category
+            blog.save()
+            blog.tags.add(self.tag)
+        self.engine = HybridRecommendationEngine()
+        self.engine.build_content_index()
+
+    def _similar_ids(self, filters):
+        recommendations = self.engine.get_content_recommendations(
+            self.blogs[1].id, 20, filters=filters
+        )
+        return {rec['blog_id'] for rec in recommendations}
+
+    def test_filters_are_applied_inside_the_search(self):
+        science = {blog.id for blog in self.blogs[::2]}
+        self.assertEqual(self._similar_ids({'category': self.category.id}), science)
+        self.assertEqual(self._similar_ids({'tag': self.tag.id}), science)
+        self.assertEqual(
+            self._similar_ids({'author': self.authors[1].id}), {blog.id for blog in self.blogs[6:]}
+        )
+        self.assertEqual(
+            self._similar_ids({'exclude_author': self.authors[1].id}),
+            {blog.id for blog in self.blogs[:6]} - {self.blogs[1].id}
+        )
+
+    def test_live_updates_are_filtered(self):
+        post = Blog.objects.create(
+            title='New science post', author=self.authors[1], content=self.blogs[1].content,
+            status='published', category=self.category
+        )
+        self.engine.upsert_blog(post)
+        self.blogs[0].category = None
+        self.blogs[0].save()
+        self.engine.upsert_blog(self.blogs[0])
+
+        self.assertEqual(
+            self._similar_ids({'category': self.category.id}),
+            {blog.id for blog in self.blogs[2::2]} | {post.id}
+        )
@@ -0,0 +1,112 @@
+import os
+import queue
+import shutil
+import tempfile
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+
+from ..ingest import InteractionWriter
+from ..models import BlogPopularity, EngagementRollup, UserInteraction, UserItemAggregate
+from .utils import make_blogs, make_users
+
+
+class IngestTestCase(TestCase):
+    def setUp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        settings = override_settings(RECOMMENDATIONS={
+            'INDEX_PATH': path, 'AUTO_REBUILD': False, 'INGEST_ASYNC': False, 'INGEST_BATCH_SIZE': 2
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.users = make_users(2)
+        self.blogs = make_blogs(self.users[0], 2)
+        self.writer = InteractionWriter()
+
+
+class EngagementTests(IngestTestCase):
+    def test_engagement_is_counted_in_the_batch(self):
+        (u0, u1), (b0, b1) = [user.id for user in self.users], [blog.id for blog in self.blogs]
+        self.writer._write([
+            (u0, b0, 'like', 4.0), (u1, b0, 'like', 4.0), (u0, b0, 'view', 1.0),
+            (u0, b1, 'bookmark', 5.0),
+        ])
+
+        popularity = BlogPopularity.objects.get(blog_id=b0)
+        self.assertEqual((popularity.likes, popularity.views, popularity.score), (2, 0, 2))
+        self.assertEqual(BlogPopularity.objects.get(blog_id=b1).bookmarks, 1)
+        rollup = EngagementRollup.objects.get(blog_id=b0)
+        self.assertEqual((rollup.likes, rollup.views), (2, 0))
+
+    def test_failed_batch_counts_nothing(self):
+        with mock.patch('recommendations.trending.record_event', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.writer._write([(self.users[0].id, self.blogs[0].id, 'like', 4.0)])
+
+        self.assertFalse(UserInteraction.objects.exists())
+        self.assertFalse(UserItemAggregate.objects.exists())
+        self.assertFalse(BlogPopularity.objects.exists())
+        self.assertFalse(EngagementRollup.objects.exists())
+
+
+class WriterTests(IngestTestCase):
+    def queue(self, events):
+        """Queue events as submit() would, without starting the writer thread."""
+        self.writer._queue = queue.Queue()
+        self.writer._pid = os.getpid()
+        for event in events:
+            self.writer._queue.put(event)
+
+    def likes(self):
+        return [(user.id, blog.id, 'like', 4.0) for user in self.users for blog in self.blogs]
+
+    def test_flush_writes_in_batches(self):
+        self.queue(self.likes()[:3])
+        self.assertEqual(self.writer.flush(), 3)
+        self.assertEqual(UserInteraction.objects.count(), 3)
+        self.assertEqual(self.writer.stats()['batches'], 2)
+        self.assertEqual(self.writer.flush(), 0)
+
+    def test_failed_batch_is_held_and_retried(self):
+        self.queue(self.likes()[:2])
+        with mock.patch('recommendations.aggregates.record_interactions', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.writer.flush()
+        self.assertFalse(UserInteraction.objects.exists())
+        self.assertEqual(self.writer._held_count(), 2)
+
+        self.assertEqual(self.writer.flush(), 2)
+        self.assertEqual(UserInteraction.objects.count(), 2)
+        self.assertEqual(self.writer.stats()['failed'], 2)
+
+    def test_rejected_events_are_dropped(self):
+        from ..aggregates import record_interactions
+
+        rejected = self.blogs[1].id
+
+        def refuse(events):
+            if any(event[1] == rejected for event in events):
+                raise IntegrityError
+            record_interactions(events)
+
+        self.queue(self.likes())
+        with mock.patch('recommendations.aggregates.record_interactions', side_effect=refuse):
+            self.assertEqual(self.writer.flush(), 2)
+        self.assertEqual(
+            set(UserInteraction.objects.values_list('blog_id', flat=True)), {self.blogs[0].id}
+        )
+        self.assertEqual(self.writer.stats()['rejected'], 2)
+        self.assertEqual(self.writer._held_count(), 0)
+
+    def test_repeat_views_are_collapsed(self):
+        (u0, u1), b0 = [user.id for user in self.users], self.blogs[0].id
+        self.assertTrue(self.writer.submit(u0, b0, 'view', 1.0))
+        self.assertFalse(self.writer.submit(u0, b0, 'view', 1.0))
+        self.assertTrue(self.writer.submit(u0, b0, 'like', 4.0))
+        self.assertTrue(self.writer.submit(u1, b0, 'view', 1.0))
+
+        self.assertEqual(UserInteraction.objects.count(), 3)
+        self.assertEqual(self.writer.stats()['collapsed_views'], 1)
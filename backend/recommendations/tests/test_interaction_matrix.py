@@ -0,0 +1,30 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from ..catalog import IdCatalog
+from ..engine import HybridRecommendationEngine
+
+
+class InteractionMatrixTests(SimpleTestCase):
+    def test_keeps_max_rating_per_pair(self):
+        engine = HybridRecommendationEngine()
+        engine.items = IdCatalog([100, 200, 300])
+        matrix = engine._interaction_matrix(
+            [2, 1, 2, 1, 2, 1],
+            [200, 100, 200, 999, 300, 100],
+            [1.0, 3.0, 5.0, 4.0, 2.0, 1.0],
+        )
+
+        self.assertEqual(engine.users.ids.tolist(), [1, 2])
+        self.assertEqual(matrix.shape, (2, 3))
+        np.testing.assert_array_equal(matrix.toarray(), [
+            [3.0, 0.0, 0.0],
+            [0.0, 5.0, 2.0],
+        ])
+
+    def test_users_only_seen_on_unknown_blogs_are_dropped(self):
+        engine = HybridRecommendationEngine()
+        engine.items = IdCatalog([100])
+        matrix = engine._interaction_matrix([1, 2], [100, 999], [1.0, 1.0])
+        self.assertEqual(engine.users.ids.tolist(), [1])
+        self.assertEqual(matrix.nnz, 1)
@@ -0,0 +1,148 @@
+import shutil
+import tempfile
+
+import numpy as np
+from django.test import TestCase, override_settings
+
+from blog.models import Blog
+from ..changelog import ChangeLog
+from ..engine import HybridRecommendationEngine
+from .utils import make_blogs, make_users
+
+
+class LiveUpdateTests(TestCase):
+    def setUp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        settings = override_settings(RECOMMENDATIONS={'INDEX_PATH': path, 'CONTENT_WORKERS': 1})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.author = make_users(1)[0]
+        self.blogs = make_blogs(self.author, 8)
+        engine = HybridRecommendationEngine()
+        engine.build_content_index()
+        engine.save_index()
+        self.engine = self._loaded()
+
+    def _loaded(self):
+        engine = HybridRecommendationEngine()
+        self.assertTrue(engine.load_index())
+        return engine
+
+    def _similar_ids(self, engine, blog, n=5):
+        return [rec['blog_id'] for rec in engine.get_content_recommendations(blog.id, n)]
+
+    def _assert_base_shared(self, engine):
+        self.assertTrue(engine._is_index_mapped('content_index'))
+        self.assertIsInstance(engine.blog_vectors, np.memmap)
+
+    def test_published_post_is_recommendable(self):
+        post = Blog.objects.create(
+            title=self.blogs[3].title, author=self.author, content=self.blogs[3].content,
+            status='published'
+        )
+        self.assertTrue(self.engine.upsert_blog(post))
+
+        self.assertEqual(self._similar_ids(self.engine, post)[0], self.blogs[3].id)
+        self.assertEqual(self._similar_ids(self.engine, self.blogs[3])[0], post.id)
+        self._assert_base_shared(self.engine)
+
+    def test_edited_post_replaces_its_vector(self):
+        blog = self.blogs[1]
+        blog.title, blog.content = self.blogs[5].title, self.blogs[5].content
+        blog.save()
+        self.engine.upsert_blog(blog)
+        self.engine.upsert_blog(blog)
+
+        similar = self._similar_ids(self.engine, self.blogs[5], n=len(self.blogs) - 1)
+        self.assertEqual(similar[0], blog.id)
+        self.assertEqual(len(similar), len(set(similar)))
+        batch = self.engine.batch_content_recommendations([self.blogs[5].id], len(self.blogs) - 1)
+        self.assertEqual([rec['blog_id'] for rec in batch[self.blogs[5].id]], similar)
+        self._assert_base_shared(self.engine)
+
+    def test_removed_post_is_hidden(self):
+        removed = self.blogs[2]
+        self.assertTrue(self.engine.remove_blog(removed.id))
+        self.assertFalse(self.engine.remove_blog(removed.id))
+
+        self.assertEqual(self._similar_ids(self.engine, removed), [])
+        for blog in self.blogs:
+            if blog != removed:
+                similar = self._similar_ids(self.engine, blog)
+                self.assertEqual(len(similar), 5)
+                self.assertNotIn(removed.id, similar)
+        self._assert_base_shared(self.engine)
+
+    def test_unpublishing_removes(self):
+        blog = self.blogs[4]
+        blog.status = 'draft'
+        self.assertTrue(self.engine.upsert_blog(blog))
+        self.assertNotIn(blog.id, self.engine.items)
+
+    def test_saving_merges_the_overlay(self):
+        post = Blog.objects.create(
+            title='Fresh post', author=self.author, content=self.blogs[0].content,
+            status='published'
+        )
+        self.engine.upsert_blog(post)
+        self.engine.remove_blog(self.blogs[6].id)
+        expected = self._similar_ids(self.engine, post)
+        self.engine.save_index()
+
+        loaded = self._loaded()
+        self.assertEqual(loaded.content_index.ntotal, len(self.blogs) + 1)
+        self.assertEqual(loaded.blog_vectors.shape[0], len(self.blogs) + 1)
+        self.assertEqual(self._similar_ids(loaded, post), expected)
+        self.assertFalse(loaded.delta_vectors)
+
+    def test_logged_changes_are_replayed_by_other_workers(self):
+        other = self._loaded()
+        post = Blog.objects.create(
+            title='Shared post', author=self.author, content=self.blogs[0].content,
+            status='published'
+        )
+        self.engine.upsert_blog(post)
+        self.engine.record_blog_change(post.id)
+        removed_id = self.blogs[1].id
+        self.blogs[1].delete()
+        self.engine.remove_blog(removed_id)
+        self.engine.record_blog_change(removed_id)
+
+        self.assertEqual(other.apply_logged_changes(), 2)
+        self.assertIn(post.id, other.items)
+        self.assertNotIn(removed_id, other.items)
+        self.assertEqual(self._similar_ids(other, post), self._similar_ids(self.engine, post))
+        # The writer already applied its own entries; nothing is replayed twice
+        self.assertEqual(self.engine.apply_logged_changes(), 0)
+        self.assertEqual(other.apply_logged_changes(), 0)
+
+
+class ChangeLogTests(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path, ignore_errors=True)
+
+    def test_read_from_position(self):
+        log = ChangeLog(self.path)
+        self.assertEqual(log.read(), ([], None))
+        position = log.append(1)
+        log.append(2)
+        self.assertEqual(log.read(position)[0], [2])
+
+        blog_ids, position = log.read()
+        self.assertEqual(blog_ids, [1, 2])
+        self.assertEqual(log.append(3, position), log.read(position)[1])
+
+    def test_compaction_drops_old_entries(self):
+        log = ChangeLog(self.path)
+        log.append(1)
+        _, position = log.read()
+        with open(log.path, 'a') as f:
+            f.write('9999999999.0 2\n')
+        log.compact(since=9999999999.0)
+
+        # A position into the replaced file falls back to reading by time
+        self.assertEqual(log.read(position, since=0)[0], [2])
+        self.assertEqual(log.read(since=10 ** 10)[0], [])
@@ -0,0 +1,23 @@
+from django.test import TestCase
+
+from ..models import BlogPopularity
+from ..popularity import record_engagement, top_blog_ids
+from .utils import make_blogs, make_users
+
+
+class TopBlogIdsTests(TestCase):
+    def setUp(self):
+        self.author = make_users(1)[0]
+        self.blogs = make_blogs(self.author, 4)
+        for blog, views in zip(self.blogs, (5, 50, 20, 0)):
+            blog.views_count = views
+            blog.save(update_fields=['views_count'])
+
+    def test_empty_table_falls_back_to_views(self):
+        self.assertFalse(BlogPopularity.objects.exists())
+        self.assertEqual(top_blog_ids(3), [self.blogs[1].id, self.blogs[2].id, self.blogs[0].id])
+
+    def test_ranked_blogs_come_first(self):
+        record_engagement(self.blogs[3].id, 'like')
+        self.assertEqual(top_blog_ids(2), [self.blogs[3].id, self.blogs[1].id])
+        self.assertEqual(top_blog_ids(2, {'author': self.author.id + 1}), [])
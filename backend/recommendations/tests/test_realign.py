@@ -0,0 +1,26 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from ..catalog import IdCatalog
+from ..engine import HybridRecommendationEngine
+
+
+class RealignCollabTests(SimpleTestCase):
+    def test_rekeys_factors_and_seen_rows(self):
+        engine = HybridRecommendationEngine()
+        old_items = IdCatalog([10, 20, 30])
+        engine.item_factors = np.array([[1, 0], [0, 1], [1, 1]], dtype='float32')
+        # User 0 saw 10 and 30, user 1 saw 20
+        engine.seen_indptr = np.array([0, 2, 3], dtype=np.int64)
+        engine.seen_items = np.array([0, 2, 1], dtype=np.int64)
+
+        # 30 left the catalog, 40 joined, 10 and 20 moved
+        engine.items = IdCatalog([20, 40, 10])
+        engine._realign_collab(old_items)
+
+        np.testing.assert_array_equal(engine.item_factors, [[0, 1], [0, 0], [1, 0]])
+        np.testing.assert_array_equal(engine.seen_indptr, [0, 1, 2])
+        np.testing.assert_array_equal(engine.seen_items, [2, 0])
+        self.assertEqual(engine.collab_index.ntotal, 2)
+        _, labels = engine.collab_index.search(np.array([[1, 0]], dtype='float32'), 2)
+        self.assertEqual(sorted(labels[0].tolist()), [0, 2])
@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from blog.models import Blog
+from ..models import UserInteraction
+from ..snapshot import InteractionSnapshot
+
+
+class InteractionSnapshotTests(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path, ignore_errors=True)
+        self.users = [
+            get_user_model().objects.create_user(username=f'reader{i}', password='x') for i in range(3)
+        ]
+        self.blogs = [
+            Blog.objects.create(
+                title=f'Post {i}', slug=f'post-{i}', author=self.users[0], content='text',
+                status='published'
+            )
+            for i in range(3)
+        ]
+
+    def _interact(self, pairs):
+        UserInteraction.objects.bulk_create([
+            UserInteraction(
+                user=self.users[user], blog=self.blogs[blog], interaction_type='view', rating=rating
+            )
+            for user, blog, rating in pairs
+        ])
+
+    def _triples(self, snapshot, watermark=None):
+        user_ids, blog_ids, ratings = snapshot.max_ratings(watermark)
+        return sorted(zip(user_ids.tolist(), blog_ids.tolist(), ratings.tolist()))
+
+    @override_settings(RECOMMENDATIONS={'SNAPSHOT_SEGMENT_ROWS': 2, 'SNAPSHOT_CHUNK_ROWS': 2})
+    def test_watermark_reproduces_earlier_input(self):
+        snapshot = InteractionSnapshot(self.path)
+        self._interact([(0, 0, 1.0), (0, 1, 2.0), (1, 0, 3.0)])
+        self.assertEqual(snapshot.append(settle=0), 3)
+        watermark = snapshot.watermark
+        before = self._triples(snapshot)
+
+        self._interact([(0, 0, 5.0), (2, 2, 1.0)])
+        snapshot.append(settle=0)
+
+        self.assertEqual(self._triples(snapshot, watermark), before)
+        self.assertIn((self.users[0].pk, self.blogs[0].pk, 5.0), self._triples(snapshot))
+
+        # A watermark inside a segment stops at that row
+        first_id = UserInteraction.objects.order_by('id').first().pk
+        self.assertEqual(
+            self._triples(snapshot, first_id), [(self.users[0].pk, self.blogs[0].pk, 1.0)]
+        )
+
+    @override_settings(RECOMMENDATIONS={'SNAPSHOT_SEGMENT_ROWS': 2, 'SNAPSHOT_CHUNK_ROWS': 2})
+    def test_compaction_keeps_max_ratings(self):
+        snapshot = InteractionSnapshot(self.path)
+        self._interact([(0, 0, 1.0), (0, 0, 4.0), (1, 2, 2.0), (0, 0, 3.0), (1, 2, 1.0)])
+        snapshot.append(settle=0)
+        before = self._triples(snapshot)
+        first_id = snapshot.manifest()['segments'][0]['last_id']
+
+        self.assertEqual(snapshot.compact(before=2 ** 40), 3)
+        self.assertEqual(self._triples(snapshot), before)
+        self.assertEqual(snapshot.manifest()['rows'], 2)
+        with self.assertRaises(ValueError):
+            snapshot.max_ratings(first_id)
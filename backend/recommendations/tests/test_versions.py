@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from ..engine import HybridRecommendationEngine, current_index_version
+from .utils import aggregate, make_blogs, make_users
+
+
+class IndexVersionTests(TestCase):
+    def setUp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        settings = override_settings(RECOMMENDATIONS={
+            'INDEX_PATH': path, 'TRAINING_SOURCE': 'aggregates', 'CONTENT_WORKERS': 1
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.users = make_users(4)
+        self.blogs = make_blogs(self.users[0], 6)
+        for i, user in enumerate(self.users):
+            aggregate(user, self.blogs[i:i + 3])
+        HybridRecommendationEngine().rebuild_indices('full')
+
+    def _loaded(self):
+        engine = HybridRecommendationEngine()
+        self.assertTrue(engine.load_index())
+        return engine
+
+    def _assert_consistent(self, engine):
+        self.assertEqual(engine.content_index.d, engine.blog_vectors.shape[1])
+        self.assertEqual(engine.collab_index.d, engine.item_factors.shape[1])
+        self.assertTrue(engine.get_content_recommendations(self.blogs[0].id, 3))
+        self.assertTrue(engine.get_collaborative_recommendations(self.users[0].id, 3))
+
+    def _inode(self, engine, filename):
+        return os.stat(os.path.join(engine.version_path, filename)).st_ino
+
+    def test_content_rebuild_writes_new_indexes(self):
+        before = self._loaded()
+        # More posts raise the content dimension
+        self.blogs += make_blogs(self.users[0], 4, start=6)
+        engine = self._loaded()
+        engine.rebuild_indices('content')
+
+        after = self._loaded()
+        self.assertNotEqual(after.version, before.version)
+        self.assertGreater(after.blog_vectors.shape[1], before.blog_vectors.shape[1])
+        self._assert_consistent(after)
+        # The collaborative index was re-keyed to the new catalog, so it is rewritten too
+        self.assertNotEqual(self._inode(after, 'collab.index'), self._inode(before, 'collab.index'))
+
+    def test_collab_rebuild_links_unchanged_content(self):
+        before = self._loaded()
+        # More users raise the number of latent factors
+        for user in make_users(2, prefix='new'):
+            aggregate(user, self.blogs[:2])
+        engine = self._loaded()
+        engine.rebuild_indices('collab')
+
+        after = self._loaded()
+        self.assertEqual(current_index_version(engine.index_path), after.version)
+        self.assertGreater(after.item_factors.shape[1], before.item_factors.shape[1])
+        self._assert_consistent(after)
+        self.assertEqual(self._inode(after, 'content.index'), self._inode(before, 'content.index'))
+        self.assertNotEqual(self._inode(after, 'collab.index'), self._inode(before, 'collab.index'))
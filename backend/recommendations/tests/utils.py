@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from blog.models import Blog
+from ..models import UserItemAggregate
+
+
+TOPICS = [
+    'python', 'django', 'faiss', 'numpy', 'travel', 'cooking', 'gardening', 'music',
+    'history', 'football', 'chess', 'painting', 'astronomy', 'cycling', 'coffee', 'poetry',
+]
+
+
+def make_users(n, prefix='reader'):
+    return [
+        get_user_model().objects.create_user(username=f'{prefix}{i}', password='x') for i in range(n)
+    ]
+
+
+def make_blogs(author, n, start=0, **fields):
+    """n published blogs, each mixing a few TOPICS so their TF-IDF vectors differ."""
+    fields.setdefault('status', 'published')
+    return [
+        Blog.objects.create(
+            title=f'Post {i} about {TOPICS[i % len(TOPICS)]}', author=author,
+            content=' '.join(TOPICS[(i * k) % len(TOPICS)] for k in (1, 3, 5, 7)), **fields
+        )
+        for i in range(start, start + n)
+    ]
+
+
+def aggregate(user, blogs, rating=1.0):
+    """Record that user interacted with every blog in blogs."""
+    UserItemAggregate.objects.bulk_create([
+        UserItemAggregate(
+            user=user, blog=blog, max_rating=rating, interaction_count=1, last_seen=timezone.now()
+        )
+        for blog in blogs
+    ])
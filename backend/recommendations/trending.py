@@ -0,0 +1,129 @@
+"""
+Time-decayed trending scores from hourly engagement rollups.
+
+Each like, comment, bookmark and view bumps its blog's EngagementRollup row
+for the current hour, so the table grows with blogs x active hours rather than
+with raw engagement history. A trending query for any window sums the rollups
+of that window in the database, weighting each hour by
+
+    weight(event) * exp(-ln 2 * age_in_hours / TRENDING_HALF_LIFE_HOURS)
+
+so recent engagement dominates. backfill_rollups() rebuilds the rollups from
+existing likes, comments, bookmarks and view interactions.
+"""
+
+import math
+import time
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Sum, Value
+from django.db.models.functions import Exp
+
+from .conf import get_setting
+from .filters import filter_queryset
+from .models import EngagementRollup
+
+
+# Interaction type -> EngagementRollup counter it bumps
+EVENT_FIELDS = {
+    'like': 'likes',
+    'comment': 'comments',
+    'bookmark': 'bookmarks',
+    'view': 'views',
+}
+
+
+def current_hour():
+    return int(time.time() // 3600)
+
+
+def hour_of(dt):
+    return int(dt.timestamp() // 3600)
+
+
+def record_event(blog_id, event_type, hour=None, count=1):
+    """Count engagement events in a blog's rollup for an hour (default: the current one)."""
+    field = EVENT_FIELDS.get(event_type)
+    if field is None:
+        return
+    hour = current_hour() if hour is None else hour
+
+    rollup = EngagementRollup.objects.filter(blog_id=blog_id, hour=hour)
+    if rollup.update(**{field: F(field) + count}):
+        return
+    try:
+        with transaction.atomic():
+            EngagementRollup.objects.create(blog_id=blog_id, hour=hour, **{field: count})
+    except IntegrityError:
+        # Another worker created this hour's row first
+        rollup.update(**{field: F(field) + count})
+
+
+def trending_blog_ids(n, days=7, filters=None):
+    """Ids of the n published blogs with the highest decayed score over the last days."""
+    from blog.models import Blog
+
+    now = current_hour()
+    weights = get_setting('TRENDING_WEIGHTS')
+    decay = math.log(2) / get_setting('TRENDING_HALF_LIFE_HOURS')
+
+    engagement = sum(
+        (F(field) * Value(float(weights.get(field, 0))) for field in EVENT_FIELDS.values()),
+        Value(0.0)
+    )
+    blogs = filter_queryset(Blog.objects.filter(status='published'), filters)
+    return list(
+        EngagementRollup.objects.filter(hour__gt=now - days * 24, blog__in=blogs)
+        .values('blog_id')
+        .annotate(score=Sum(
+            engagement * Exp(Value(decay) * (F('hour') - Value(now))),
+            output_field=FloatField()
+        ))
+        .order_by('-score')
+        .values_list('blog_id', flat=True)[:n]
+    )
+
+
+def backfill_rollups(days=None):
+    """
+    Rebuild rollups from stored likes, comments, bookmarks and view interactions,
+    over the last days (default TRENDING_RETENTION_DAYS). Returns rows written.
+    """
+    from blog.models import Bookmark, Comment, Like
+    from .models import UserInteraction
+
+    days = get_setting('TRENDING_RETENTION_DAYS') if days is None else days
+    start = current_hour() - days * 24
+
+    counts = Counter()
+    sources = (
+        ('likes', Like.objects.all()),
+        ('comments', Comment.objects.all()),
+        ('bookmarks', Bookmark.objects.all()),
+        ('views', UserInteraction.objects.filter(interaction_type='view')),
+    )
+    for field, queryset in sources:
+        for blog_id, created_at in queryset.values_list('blog_id', 'created_at').iterator():
+            hour = hour_of(created_at)
+            if hour > start:
+                counts[blog_id, hour, field] += 1
+
+    rollups = {}
+    for (blog_id, hour, field), count in counts.items():
+        rollup = rollups.setdefault(
+            (blog_id, hour), EngagementRollup(blog_id=blog_id, hour=hour)
+        )
+        setattr(rollup, field, count)
+
+    with transaction.atomic():
+        EngagementRollup.objects.filter(hour__gt=start).delete()
+        EngagementRollup.objects.bulk_create(rollups.values(), batch_size=1000)
+    return len(rollups)
+
+
+def prune_rollups(days=None):
+    """Delete rollups older than TRENDING_RETENTION_DAYS. Returns rows deleted."""
+    days = get_setting('TRENDING_RETENTION_DAYS') if days is None else days
+    deleted, _ = EngagementRollup.objects.filter(hour__lte=current_hour() - days * 24).delete()
+    return deleted
@@ -1,7 +1,8 @@
 from django.urls import path
 from .views import (
     RecommendationsView, SimilarBlogsView,
-    RebuildIndexView, TrendingBlogsView
+    RebuildIndexView, RebuildJobStatusView, BatchRecommendationsView,
+    RecommendationStatsView, TrendingBlogsView
 )
 
 urlpatterns = [
@@ -9,4 +10,7 @@ urlpatterns = [
     path('similar/<slug:blog_slug>/', SimilarBlogsView.as_view(), name='similar-blogs'),
     path('trending/', TrendingBlogsView.as_view(), name='trending'),
     path('rebuild/', RebuildIndexView.as_view(), name='rebuild-index'),
+    path('rebuild/<int:job_id>/', RebuildJobStatusView.as_view(), name='rebuild-job-status'),
+    path('batch/', BatchRecommendationsView.as_view(), name='batch-recommendations'),
+    path('stats/', RecommendationStatsView.as_view(), name='recommendation-stats'),
 ]
@@ -2,14 +2,45 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework import status
-from django.db import models
-from django.db.models import Count, F
-from django.utils import timezone
-from datetime import timedelta
+from django.contrib.auth import get_user_model
 
-from blog.models import Blog
+from blog.models import Blog, Category, Tag
 from blog.serializers import BlogListSerializer
-from .engine import get_recommendation_engine
+from . import cache as recommendation_cache
+from .engine import REBUILD_MODES, get_recommendation_engine
+from .filters import filter_queryset
+from .ingest import interaction_writer
+from .popularity import top_blog_ids
+from .trending import trending_blog_ids
+from .jobs import enqueue_rebuild
+from .models import IndexRebuildJob
+from .serializers import IndexRebuildJobSerializer
+
+
+def get_recommendation_filters(request):
+    """
+    Filter spec from ?category=<slug>&tag=<slug>&author=<username>&exclude_own=1.
+
+    Returns None when a slug or username does not exist, as nothing can match.
+    """
+    params = request.query_params
+    filters = {}
+    try:
+        if params.get('category'):
+            filters['category'] = Category.objects.values_list('id', flat=True).get(
+                slug=params['category']
+            )
+        if params.get('tag'):
+            filters['tag'] = Tag.objects.values_list('id', flat=True).get(slug=params['tag'])
+        if params.get('author'):
+            filters['author'] = get_user_model().objects.values_list('id', flat=True).get(
+                username=params['author']
+            )
+    except (Category.DoesNotExist, Tag.DoesNotExist, get_user_model().DoesNotExist):
+        return None
+    if params.get('exclude_own') and request.user.is_authenticated:
+        filters['exclude_author'] = request.user.id
+    return filters
 
 
 class RecommendationsView(APIView):
@@ -20,6 +51,10 @@ class RecommendationsView(APIView):
         blog_slug = request.query_params.get('blog')
         n = int(request.query_params.get('limit', 6))
 
+        filters = get_recommendation_filters(request)
+        if filters is None:
+            return Response([])
+
         engine = get_recommendation_engine()
 
         # Get current blog ID if provided
@@ -33,28 +68,35 @@ class RecommendationsView(APIView):
         # Get user ID if authenticated
         user_id = request.user.id if request.user.is_authenticated else None
 
-        # Get hybrid recommendations
-        if engine.content_index or engine.collab_index:
+        if user_id and not blog_id and not filters and engine.collab_index:
+            # Without a current blog the hybrid list is the collaborative one;
+            # serve it through the per-user cache (also filled by precompute)
+            recommendations = recommendation_cache.get_or_compute(
+                user_id, 'collaborative', n,
+                lambda size: engine.get_collaborative_recommendations(user_id, size)
+            )
+            blog_ids = [r['blog_id'] for r in recommendations]
+        elif engine.content_index or engine.collab_index:
+            # Get hybrid recommendations
             recommendations = engine.get_hybrid_recommendations(
                 user_id=user_id,
                 blog_id=blog_id,
-                n_recommendations=n
+                n_recommendations=n,
+                filters=filters
             )
             blog_ids = [r['blog_id'] for r in recommendations]
         else:
             # Fallback to popular blogs if no index exists
             blog_ids = []
 
-        if blog_ids:
-            # Preserve order from recommendations with optimized query
-            blogs = Blog.objects.published_with_relations().filter(id__in=blog_ids)
-            blog_dict = {b.id: b for b in blogs}
-            ordered_blogs = [blog_dict[bid] for bid in blog_ids if bid in blog_dict]
-        else:
-            # Fallback to recent popular blogs
-            ordered_blogs = Blog.objects.published_with_relations().order_by(
-                '-views_count', '-created_at'
-            )[:n]
+        if not blog_ids:
+            # Fallback to popular blogs from the precomputed ranking
+            blog_ids = top_blog_ids(n, filters)
+
+        # Preserve order from recommendations with optimized query
+        blogs = Blog.objects.published_with_relations().filter(id__in=blog_ids)
+        blog_dict = {b.id: b for b in blogs}
+        ordered_blogs = [blog_dict[bid] for bid in blog_ids if bid in blog_dict]
 
         serializer = BlogListSerializer(
             ordered_blogs,
@@ -71,6 +113,10 @@ class SimilarBlogsView(APIView):
     def get(self, request, blog_slug):
         n = int(request.query_params.get('limit', 6))
 
+        filters = get_recommendation_filters(request)
+        if filters is None:
+            return Response([])
+
         try:
             blog = Blog.objects.only('id', 'category_id').get(slug=blog_slug)
         except Blog.DoesNotExist:
@@ -82,7 +128,7 @@ class SimilarBlogsView(APIView):
         engine = get_recommendation_engine()
 
         if engine.content_index:
-            recommendations = engine.get_content_recommendations(blog.id, n)
+            recommendations = engine.get_content_recommendations(blog.id, n, filters=filters)
             blog_ids = [r['blog_id'] for r in recommendations]
         else:
             blog_ids = []
@@ -93,8 +139,9 @@ class SimilarBlogsView(APIView):
             ordered_blogs = [blog_dict[bid] for bid in blog_ids if bid in blog_dict]
         else:
             # Fallback to same category/tags
-            ordered_blogs = Blog.objects.published_with_relations().filter(
-                category=blog.category
+            ordered_blogs = filter_queryset(
+                Blog.objects.published_with_relations().filter(category=blog.category),
+                filters
             ).exclude(id=blog.id).order_by('-views_count')[:n]
 
         serializer = BlogListSerializer(
@@ -106,7 +153,7 @@ class SimilarBlogsView(APIView):
 
 
 class RebuildIndexView(APIView):
-    """Admin endpoint to rebuild recommendation indices."""
+    """Admin endpoint to queue a background rebuild of the recommendation indices."""
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -116,10 +163,93 @@ class RebuildIndexView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
 
+        mode = request.data.get('mode', 'full')
+        if mode not in REBUILD_MODES:
+            return Response(
+                {'error': f"mode must be one of {', '.join(REBUILD_MODES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        job = enqueue_rebuild(mode=mode, trigger='api', user=request.user)
+
+        return Response(
+            IndexRebuildJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class RebuildJobStatusView(APIView):
+    """Admin endpoint reporting the status and stage timings of a rebuild job."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        if not request.user.is_staff:
+            return Response(
+                {'error': 'Admin access required'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            job = IndexRebuildJob.objects.get(pk=job_id)
+        except IndexRebuildJob.DoesNotExist:
+            return Response(
+                {'error': 'Job not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(IndexRebuildJobSerializer(job).data)
+
+
+class BatchRecommendationsView(APIView):
+    """
+    Admin endpoint scoring many users and/or blogs in one vectorized search.
+
+    POST {"user_ids": [...], "blog_ids": [...], "limit": 10} returns
+    {"users": {user_id: [...]}, "similar": {blog_id: [...]}}.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not request.user.is_staff:
+            return Response(
+                {'error': 'Admin access required'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            user_ids = [int(pk) for pk in request.data.get('user_ids', [])]
+            blog_ids = [int(pk) for pk in request.data.get('blog_ids', [])]
+            n = int(request.data.get('limit', 10))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'user_ids and blog_ids must be lists of ids, limit an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         engine = get_recommendation_engine()
-        engine.rebuild_indices()
+        return Response({
+            'users': engine.batch_collaborative_recommendations(user_ids, n),
+            'similar': engine.batch_content_recommendations(blog_ids, n),
+        })
 
-        return Response({'message': 'Indices rebuilt successfully'})
+
+class RecommendationStatsView(APIView):
+    """Admin endpoint reporting this worker's index version, cache and ingestion metrics."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_staff:
+            return Response(
+                {'error': 'Admin access required'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        engine = get_recommendation_engine()
+        return Response({
+            'index_version': engine.version,
+            'similar_cache': engine.similar_cache.stats(),
+            'ingestion': interaction_writer.stats(),
+        })
 
 
 class TrendingBlogsView(APIView):
@@ -130,16 +260,22 @@ class TrendingBlogsView(APIView):
         n = int(request.query_params.get('limit', 10))
         days = int(request.query_params.get('days', 7))
 
-        # Get blogs with recent engagement
-        recent_date = timezone.now() - timedelta(days=days)
+        filters = get_recommendation_filters(request)
+        if filters is None:
+            return Response([])
+
+        # Decayed scores from hourly engagement rollups (see trending.py)
+        blog_ids = trending_blog_ids(n, days, filters)
+        if len(blog_ids) < n:
+            # Top up quiet periods from the all-time popularity ranking
+            blog_ids += [
+                blog_id for blog_id in top_blog_ids(n + len(blog_ids), filters)
+                if blog_id not in blog_ids
+            ][:n - len(blog_ids)]
 
-        trending = Blog.objects.published().select_related(
-            'author', 'category'
-        ).prefetch_related('tags', 'likes', 'comments', 'bookmarks').annotate(
-            recent_likes=Count('likes', filter=models.Q(likes__created_at__gte=recent_date)),
-            recent_comments=Count('comments', filter=models.Q(comments__created_at__gte=recent_date)),
-            engagement_score=F('recent_likes') * 2 + F('recent_comments') * 3 + F('views_count') * 0.1
-        ).order_by('-engagement_score')[:n]
+        blogs = Blog.objects.published_with_relations().filter(id__in=blog_ids)
+        blog_dict = {b.id: b for b in blogs}
+        trending = [blog_dict[bid] for bid in blog_ids if bid in blog_dict]
 
         serializer = BlogListSerializer(
             trending,